@@ -48,12 +48,18 @@ export interface PongMessage {
   type: 'pong';
 }
 
+export interface BatchMessage {
+  type: 'batch';
+  messages: ServerMessage[];
+}
+
 export type ServerMessage =
   | EventMessage
   | SubscribeResponse
   | UnsubscribeResponse
   | ErrorMessage
-  | PongMessage;
+  | PongMessage
+  | BatchMessage;
 
 export type EventCallback<T = any> = (data: T) => void;
 
@@ -297,34 +303,41 @@ export class EventWebSocketClient {
 
   private handleMessage(event: MessageEvent): void {
     try {
-      const message: ServerMessage = JSON.parse(event.data);
+      this.dispatch(JSON.parse(event.data));
+    } catch (error) {
+      this.log('Failed to parse message:', error);
+    }
+  }
 
-      switch (message.type) {
-        case 'event':
-          this.handleEventMessage(message);
-          break;
+  private dispatch(message: ServerMessage): void {
+    switch (message.type) {
+      case 'batch':
+        // messages queued on the server while the previous frame was sent
+        message.messages.forEach(m => this.dispatch(m));
+        break;
 
-        case 'subscribe_response':
-          this.handleSubscribeResponse(message);
-          break;
+      case 'event':
+        this.handleEventMessage(message);
+        break;
 
-        case 'unsubscribe_response':
-          this.handleUnsubscribeResponse(message);
-          break;
+      case 'subscribe_response':
+        this.handleSubscribeResponse(message);
+        break;
 
-        case 'error':
-          this.log('Server error:', message.message);
-          break;
+      case 'unsubscribe_response':
+        this.handleUnsubscribeResponse(message);
+        break;
 
-        case 'pong':
-          this.log('Received pong');
-          break;
+      case 'error':
+        this.log('Server error:', message.message);
+        break;
 
-        default:
-          this.log('Unknown message type:', message);
-      }
-    } catch (error) {
-      this.log('Failed to parse message:', error);
+      case 'pong':
+        this.log('Received pong');
+        break;
+
+      default:
+        this.log('Unknown message type:', message);
     }
   }
 
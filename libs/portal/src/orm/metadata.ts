@@ -3,6 +3,23 @@
 export type SemanticType = "string" | "number" | "time" | "boolean";
 export type Cardinality = "one" | "many";
 
+// -------------------------
+// Statistics
+// -------------------------
+export interface ColumnStatistics {
+  null_fraction?: number;
+  distinct_count?: number; // estimated from a sample unless the sample covers the table
+
+  // numeric and time columns only
+  min?: any;
+  max?: any;
+}
+
+export interface TableStatistics {
+  row_count: number;
+  sample_size: number;
+}
+
 // -------------------------
 // Column descriptor
 // -------------------------
@@ -14,6 +31,8 @@ export interface ColumnDescriptor {
   nullable: boolean;
   is_primary_key: boolean;
   is_foreign_key: boolean;
+
+  statistics?: ColumnStatistics;
 }
 
 // -------------------------
@@ -70,6 +89,8 @@ export interface TableDescriptor {
 
   foreign_keys: ForeignKeyDescriptor[];
   relations: RelationDescriptor[];
+
+  statistics?: TableStatistics;
 }
 
 export interface SchemaDescriptor {
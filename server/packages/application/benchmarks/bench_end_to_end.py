@@ -0,0 +1,185 @@
+"""
+drives the portal and cube services through the asgi app in-process - no sockets - and reports throughput and
+p50 / p99 latency of the main requests at several scales of synthetic data.
+
+    python benchmarks/bench_end_to_end.py [--scales small,medium,large] [--concurrency 8] [--output results.json] [--compare baseline.json]
+
+Every scale runs in a fresh process with its own in-memory sqlite database, since the application and the orm
+entities can be set up once per process only.
+The results are saved as json, `--compare` prints the change of throughput and latency against an earlier run.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List
+
+SCALES = {
+    "small":  {"modules": 10,  "features": 10, "dashboards": 10,  "widgets": 8,  "cubes": 10,  "tables": 50},
+    "medium": {"modules": 50,  "features": 20, "dashboards": 100, "widgets": 16, "cubes": 50,  "tables": 500},
+    "large":  {"modules": 200, "features": 40, "dashboards": 500, "widgets": 32, "cubes": 200, "tables": 2000},
+}
+
+# -------------------------
+# Measurement
+# -------------------------
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+async def drive(name: str, request: Callable, count: int, concurrency: int) -> dict:
+    """
+    send `count` requests, at most `concurrency` at a time, and return throughput and latencies
+    """
+    latencies = []
+    queue = iter(range(count))
+
+    async def worker():
+        for index in queue:
+            start = time.perf_counter()
+            response = await request(index)
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name}: {response.status_code} {response.text[:200]}")
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "requests": count,
+        "seconds": elapsed,
+        "throughput": count / elapsed,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000
+    }
+
+# -------------------------
+# Scale run, in a separate process
+# -------------------------
+
+def run_scale(scale: Dict[str, int], requests: int, concurrency: int) -> Dict[str, dict]:
+    import synthetic
+    from application.harness import ApplicationHarness
+
+    synthetic.create_entities(scale["tables"])
+
+    harness = ApplicationHarness().start()
+    try:
+        from cube.interface import CubeService, DashboardService
+        from portal.interface import PortalCRUDService
+        from portal.server.deployment_manager import DeploymentManager
+
+        # data
+
+        crud = harness.get(PortalCRUDService)
+        for microfrontend in synthetic.create_microfrontends(scale["modules"], scale["features"]):
+            crud.create_microfrontend(microfrontend)
+
+        harness.get(DeploymentManager).reload()
+
+        dashboard_service = harness.get(DashboardService)
+        dashboards = [dashboard_service.create_dashboard(synthetic.create_dashboard(i, scale["widgets"])) for i in range(scale["dashboards"])]
+
+        cube_service = harness.get(CubeService)
+        with contextlib.redirect_stdout(io.StringIO()): # cube deployment prints the generated javascript
+            for cube in synthetic.create_cubes(scale["cubes"], scale["tables"]):
+                cube_service.create_cube(cube)
+
+        deployment_requests = [request.model_dump(mode="json", by_alias=True) for request in synthetic.create_deployment_requests(100)]
+        for request in deployment_requests:
+            request["client"] = request.pop("client_info")
+
+        new_dashboard = synthetic.create_dashboard(0, scale["widgets"]).model_dump(mode="json")
+
+        # requests
+
+        async def measure() -> Dict[str, dict]:
+            async with harness.client() as client:
+                operations = {
+                    "compute_deployment": lambda i: client.post("/portal/deployment", json=deployment_requests[i % len(deployment_requests)]),
+                    "create_dashboard": lambda i: client.post("/api/dashboard/create", json=new_dashboard),
+                    "find_dashboard": lambda i: client.get(f"/api/dashboard/find/{dashboards[i % len(dashboards)].id}"),
+                    "update_dashboard": lambda i: client.post("/api/dashboard/update", json=dashboards[i % len(dashboards)].model_dump(mode="json")),
+                    "list_dashboards": lambda i: client.get("/api/dashboard/list"),
+                    "list_cubes": lambda i: client.get("/api/cube/list"),
+                    "get_metadata": lambda i: client.get("/api/metadata/fetch")
+                }
+
+                results = {}
+                for name, operation in operations.items():
+                    await drive(name, operation, min(requests, 10), 1) # warm up
+                    results[name] = await drive(name, operation, requests, concurrency)
+
+                return results
+
+        with contextlib.redirect_stdout(io.StringIO()): # the deployment manager prints every request
+            results = asyncio.run(measure())
+    finally:
+        harness.stop()
+
+    return results
+
+# -------------------------
+# Report
+# -------------------------
+
+def report(scales: Dict[str, Dict[str, dict]], baseline: dict = None):
+    for scale, operations in scales.items():
+        print(f"\n{scale}: {SCALES[scale]}")
+        print(f"  {'operation':<20} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+
+        for name, result in operations.items():
+            line = f"  {name:<20} {result['throughput']:10.1f} {result['p50_ms']:10.2f} {result['p99_ms']:10.2f}"
+
+            before = (baseline or {}).get("scales", {}).get(scale, {}).get(name)
+            if before is not None:
+                line += f"   throughput {result['throughput'] / before['throughput'] - 1:+7.1%}   p99 {result['p99_ms'] / before['p99_ms'] - 1:+7.1%}"
+
+            print(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="end to end benchmarks")
+    parser.add_argument("--scales", default="small,medium", help=f"comma separated, of {', '.join(SCALES)}")
+    parser.add_argument("--requests", type=int, default=200, help="requests per operation")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", default=f"results-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument("--compare", help="results of an earlier run")
+    args = parser.parse_args()
+
+    results = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scales": {}
+    }
+
+    for scale in args.scales.split(","):
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            results["scales"][scale] = executor.submit(run_scale, SCALES[scale], args.requests, args.concurrency).result()
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    report(results["scales"], baseline)
+
+    print(f"\nsaved {args.output}")
+
+if __name__ == "__main__":
+    main()
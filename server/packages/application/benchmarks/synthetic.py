@@ -0,0 +1,210 @@
+"""
+synthetic microfrontends, dashboards, cubes and orm entities used by the end to end benchmarks
+"""
+import json
+import random
+from typing import List
+from uuid import uuid4
+
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey
+from sqlalchemy.orm import relationship
+
+from cube.interface import CubeDescriptor, MeasureDescriptor, DimensionDescriptor, JoinDescriptor
+from cube.interface.dashboard_service import Dashboard
+from cube.server.persistence.base import Base
+from portal.interface.portal_model import Microfrontend, DeploymentRequest
+
+# -------------------------
+# Microfrontends
+# -------------------------
+
+SCREEN_SIZES = ["xs", "sm", "md", "lg", "xl"]
+PLATFORMS = ["web", "ios", "android"]
+CAPABILITIES = ["touch", "camera", "geolocation", "notifications", "offline"]
+
+def client_constraints(rng: random.Random) -> dict:
+    """
+    return a random mix of the constraints a feature may declare, half of the features have none
+    """
+    constraints = {}
+
+    if rng.random() < 0.5:
+        return constraints
+
+    if rng.random() < 0.5:
+        constraints["screenSizes"] = rng.sample(SCREEN_SIZES, rng.randint(1, 3))
+    if rng.random() < 0.3:
+        constraints["orientation"] = [rng.choice(["portrait", "landscape"])]
+    if rng.random() < 0.4:
+        constraints["platforms"] = rng.sample(PLATFORMS, rng.randint(1, 2))
+    if rng.random() < 0.3:
+        constraints["minWidth"] = rng.choice([320, 768, 1024])
+    if rng.random() < 0.2:
+        constraints["maxWidth"] = rng.choice([767, 1023, 1920])
+    if rng.random() < 0.2:
+        constraints["minHeight"] = rng.choice([480, 600])
+    if rng.random() < 0.3:
+        constraints["capabilities"] = rng.sample(CAPABILITIES, rng.randint(1, 2))
+
+    return constraints
+
+def create_microfrontends(modules: int, features: int, seed: int = 1) -> List[Microfrontend]:
+    """
+    return `modules` microfrontends with `features` features each, with varied client constraints, tags and
+    permissions. Some features share a path, so that the deduplication of the deployment has work to do.
+    """
+    rng = random.Random(seed)
+    microfrontends = []
+
+    for m in range(modules):
+        feature_list = []
+
+        for f in range(features):
+            feature = {
+                "id": f"mfe{m}-feature{f}",
+                "label": f"Feature {f} of module {m}",
+                "path": f"/mfe{m}/feature{f % max(1, features - 2)}" if f % 5 else None,
+                "icon": "📄",
+                "component": f"Feature{f}",
+                "tags": rng.sample(["reporting", "beta", "admin", "secret"], rng.randint(0, 2)),
+                "permissions": [],
+                "features": []
+            }
+
+            clients = client_constraints(rng)
+            if clients:
+                feature["clients"] = clients
+
+            feature_list.append(feature)
+
+        microfrontends.append(Microfrontend(
+            id=uuid4(),
+            version_id=1,
+            name=f"mfe{m}",
+            uri=f"http://localhost:{3000 + m}",
+            enabled=m % 10 != 9,
+            configuration=json.dumps({"features": feature_list})
+        ))
+
+    return microfrontends
+
+def create_deployment_requests(count: int, seed: int = 1) -> List[DeploymentRequest]:
+    """
+    return deployment requests of different clients, from phones to desktops
+    """
+    rng = random.Random(seed)
+    devices = [
+        ("phone", "xs", 390, 844),
+        ("phone", "sm", 430, 932),
+        ("tablet", "md", 820, 1180),
+        ("tablet", "lg", 1180, 820),
+        ("desktop", "xl", 1920, 1080)
+    ]
+
+    requests = []
+    for _ in range(count):
+        device, screen_size, width, height = rng.choice(devices)
+
+        requests.append(DeploymentRequest.model_validate({
+            "application": "shell",
+            "client": {
+                "width": width,
+                "height": height,
+                "screenSize": screen_size,
+                "orientation": "portrait" if height > width else "landscape",
+                "pixelRatio": 2.0,
+                "platform": "web" if device == "desktop" else rng.choice(PLATFORMS),
+                "browser": "chrome",
+                "os": "linux",
+                "osVersion": "6",
+                "capabilities": rng.sample(CAPABILITIES, rng.randint(0, len(CAPABILITIES))),
+                "deviceType": device
+            }
+        }))
+
+    return requests
+
+# -------------------------
+# Dashboards
+# -------------------------
+
+def create_dashboard(index: int, widgets: int) -> Dashboard:
+    """
+    return a dashboard with `widgets` cube widgets
+    """
+    configuration = {
+        "widgets": [
+            {
+                "id": f"widget-{w}",
+                "type": "chart",
+                "title": f"Widget {w}",
+                "layout": {"x": w % 4 * 3, "y": w // 4 * 4, "w": 3, "h": 4},
+                "query": {
+                    "measures": [f"Cube{w % 7}.count"],
+                    "dimensions": [f"Cube{w % 7}.name"],
+                    "timeDimensions": [{"dimension": f"Cube{w % 7}.created", "granularity": "month", "dateRange": "last year"}]
+                }
+            }
+            for w in range(widgets)
+        ]
+    }
+
+    return Dashboard(name=f"Dashboard {index}", configuration=json.dumps(configuration))
+
+# -------------------------
+# Cubes
+# -------------------------
+
+def create_cubes(count: int, tables: int) -> List[CubeDescriptor]:
+    """
+    return cubes on the synthetic tables, every cube joins the table of its predecessor
+    """
+    cubes = []
+
+    for i in range(count):
+        table = i % max(1, tables)
+
+        cubes.append(CubeDescriptor(
+            name=f"Cube{i}",
+            table=f"synthetic_{table}",
+            measures=[
+                MeasureDescriptor(name="count", type="count"),
+                MeasureDescriptor(name="amount", type="sum", column="amount")
+            ],
+            dimensions=[
+                DimensionDescriptor(name="id", column="id", type="number", primary_key=True),
+                DimensionDescriptor(name="name", column="name", type="string"),
+                DimensionDescriptor(name="created", column="created", type="time")
+            ],
+            joins=[JoinDescriptor(name=f"Cube{i - 1}", relationship="belongsTo", on=f"${{CUBE}}.parent_id = ${{Cube{i - 1}}}.id")] if table > 0 else []
+        ))
+
+    return cubes
+
+# -------------------------
+# ORM
+# -------------------------
+
+entities = [] # the class registry holds weak references only
+
+def create_entities(count: int) -> list:
+    """
+    map `count` synthetic tables on the cube base, which is the registry the metadata service describes.
+    Every table references its predecessor. Can be called once per process only.
+    """
+    for i in range(count):
+        attributes = {
+            "__tablename__": f"synthetic_{i}",
+            "id": Column(Integer, primary_key=True),
+            "name": Column(String(100)),
+            "amount": Column(Numeric(10, 2)),
+            "created": Column(Date),
+        }
+
+        if i > 0:
+            attributes["parent_id"] = Column(Integer, ForeignKey(f"synthetic_{i - 1}.id"))
+            attributes["parent"] = relationship(f"Synthetic{i - 1}")
+
+        entities.append(type(f"Synthetic{i}", (Base,), attributes))
+
+    return entities
@@ -0,0 +1,76 @@
+import os
+import threading
+from typing import Dict, Optional, Type, TypeVar
+
+import httpx
+
+from aspyx.di import Environment
+
+from cube.server.cube_warmup import CubeWarmup
+
+from .main import app, boot, shutdown
+
+T = TypeVar("T")
+
+class ApplicationHarness:
+    """
+    Boots the `ApplicationModule` in-process - by default against an in-memory sqlite database - without a server.
+    Requests are sent through an httpx client on an asgi transport, so no port is bound and every process,
+    e.g. every pytest-xdist worker, can run its own application.
+
+    `start` returns once the environment is booted and the cache warmup has signaled its end.
+    The application is a singleton, so there is one harness per process.
+
+    The application reads its configuration from the environment, so the database url and any further
+    `configuration` are set as environment variables while the harness runs.
+    """
+    # constructor
+
+    def __init__(self, database_url: str = "sqlite://", warmup_timeout: float = 30.0, configuration: Optional[Dict[str, str]] = None):
+        self.database_url = database_url
+        self.warmup_timeout = warmup_timeout
+        self.configuration = {"DATABASE_URL": database_url, **(configuration or {})}
+        self.previous: Dict[str, Optional[str]] = {}
+
+        self.environment: Optional[Environment] = None
+        self.started = threading.Event()
+
+    # public
+
+    def start(self) -> "ApplicationHarness":
+        for name, value in self.configuration.items():
+            self.previous[name] = os.environ.get(name)
+            os.environ[name] = value
+
+        self.environment = boot()
+
+        if not self.environment.get(CubeWarmup).wait(self.warmup_timeout):
+            raise TimeoutError(f"warmup did not finish within {self.warmup_timeout}s")
+
+        self.started.set()
+
+        return self
+
+    def stop(self):
+        if self.environment is not None:
+            shutdown()
+            self.environment = None
+
+        for name, value in self.previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+        self.previous.clear()
+
+        self.started.clear()
+
+    def get(self, type: Type[T]) -> T:
+        return self.environment.get(type)
+
+    def client(self, **kwargs) -> httpx.AsyncClient:
+        """
+        return a client sending its requests directly to the app
+        """
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://application", **kwargs)
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import importlib.abc
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from aspyx.di.di import ClassInstanceProvider, FunctionInstanceProvider, FactoryInstanceProvider
+
+class _Timings:
+    """
+    inclusive and exclusive durations of nested, named operations
+    """
+    __slots__ = [
+        "total",
+        "self",
+        "stack"
+    ]
+
+    def __init__(self):
+        self.total: Dict[str, float] = {}
+        self.self: Dict[str, float] = {}
+        self.stack: List[List] = [] # [name, start, time spent in nested operations]
+
+    def enter(self, name: str):
+        self.stack.append([name, time.perf_counter(), 0.0])
+
+    def exit(self):
+        name, start, nested = self.stack.pop()
+        spent = time.perf_counter() - start
+
+        self.total[name] = self.total.get(name, 0.0) + spent
+        self.self[name] = self.self.get(name, 0.0) + spent - nested
+
+        if self.stack:
+            self.stack[-1][2] += spent
+
+    def top(self, limit: int) -> List[Tuple[str, float, float]]:
+        return sorted(((name, self.self[name], self.total[name]) for name in self.total), key=lambda entry: -entry[1])[:limit]
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """
+    meta path finder that times the execution of the modules found by the other finders
+    """
+    def __init__(self, timings: _Timings):
+        self.timings = timings
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                loader = spec.loader
+
+                # only per module loader instances - like source file loaders - are instrumented, shared loader classes are left alone
+
+                if loader is not None and not isinstance(loader, type) and hasattr(loader, "__dict__") and hasattr(loader, "exec_module"):
+                    exec_module = loader.exec_module
+                    timings = self.timings
+
+                    def timed_exec_module(module, exec_module=exec_module, name=fullname):
+                        timings.enter(name)
+                        try:
+                            exec_module(module)
+                        finally:
+                            timings.exit()
+
+                    loader.exec_module = timed_exec_module
+
+                return spec
+
+        return None
+
+class StartupProfiler:
+    """
+    Reports where the startup time goes: the import time per module and the construction time per
+    managed component - constructors, `@create` methods and factories including their lifecycle callbacks.
+
+    Times are reported inclusive and exclusive, i.e. without the time spent in nested imports or constructions.
+
+    Usage: start the profiler before the application modules are imported and stop it once the environment is booted.
+    """
+    logger = logging.getLogger("application.startup")
+
+    _PROVIDERS = [ClassInstanceProvider, FunctionInstanceProvider, FactoryInstanceProvider]
+
+    # class methods
+
+    @classmethod
+    def from_environment(cls, variable: str = "PROFILE_STARTUP") -> Optional[StartupProfiler]:
+        """
+        return a started profiler if the environment variable is set
+        """
+        if os.environ.get(variable, "").lower() in ("1", "true", "yes"):
+            return cls().start()
+
+        return None
+
+    # constructor
+
+    def __init__(self):
+        self.imports = _Timings()
+        self.components = _Timings()
+        self.phases: Dict[str, float] = {}
+
+        self.start_time = 0.0
+        self.thread: Optional[threading.Thread] = None
+        self.import_timer: Optional[_ImportTimer] = None
+        self.originals = {}
+
+    # internal
+
+    def instrument(self, provider_class: type):
+        create = provider_class.create
+        profiler = self
+
+        def timed_create(provider, environment, *args):
+            # only the booting thread is measured
+
+            if threading.current_thread() is not profiler.thread:
+                return create(provider, environment, *args)
+
+            profiler.components.enter(provider.report())
+            try:
+                return create(provider, environment, *args)
+            finally:
+                profiler.components.exit()
+
+        self.originals[provider_class] = create
+        provider_class.create = timed_create
+
+    # public
+
+    def start(self) -> StartupProfiler:
+        self.start_time = time.perf_counter()
+        self.thread = threading.current_thread()
+
+        self.import_timer = _ImportTimer(self.imports)
+        sys.meta_path.insert(0, self.import_timer)
+
+        for provider_class in self._PROVIDERS:
+            self.instrument(provider_class)
+
+        return self
+
+    def phase(self, name: str):
+        """
+        record the time elapsed since start under the given name
+        """
+        self.phases[name] = time.perf_counter() - self.start_time
+
+    def stop(self) -> StartupProfiler:
+        self.phase("total")
+
+        if self.import_timer in sys.meta_path:
+            sys.meta_path.remove(self.import_timer)
+
+        for provider_class, create in self.originals.items():
+            provider_class.create = create
+
+        self.originals = {}
+
+        return self
+
+    def report(self, limit: int = 20) -> str:
+        lines = ["startup profile"]
+
+        for name, elapsed in self.phases.items():
+            lines.append(f"  {name:<60} {elapsed * 1000:10.1f} ms")
+
+        for title, timings in (("imports", self.imports), ("components", self.components)):
+            lines.append(f"  {title} (self / total ms)")
+            for name, own, total in timings.top(limit):
+                lines.append(f"    {name:<58} {own * 1000:10.1f} {total * 1000:10.1f}")
+
+        return "\n".join(lines)
+
+    def log(self, limit: int = 20):
+        self.logger.info(self.report(limit))
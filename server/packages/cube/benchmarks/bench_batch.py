@@ -0,0 +1,83 @@
+"""
+compares executing the widget queries of a dashboard one by one with a batch.
+
+    python benchmarks/bench_batch.py [url of an empty database]
+
+Without url a temporary sqlite database is used. sqlite has no GROUPING SETS, batches are merged with UNION ALL there.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from cube.interface import CubeQuery
+from cube.server.persistence.base import Base
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore
+
+from synthetic import CUBES, populate
+
+RANGE = {"dimension": "Orders.orderDate", "dateRange": ["2023-01-01", "2023-12-31"]}
+
+def widgets() -> list:
+    queries = []
+
+    for dimension in ["Customers.country", "Products.category", None]:
+        for measures in (["OrderItems.quantity"], ["OrderItems.revenue"], ["OrderItems.orders", "OrderItems.count"]):
+            queries.append({"measures": measures, "dimensions": [dimension] if dimension else [], "timeDimensions": [RANGE]})
+
+    for granularity in ["month", "quarter", "week"]:
+        queries.append({"measures": ["OrderItems.revenue"], "timeDimensions": [{**RANGE, "granularity": granularity}]})
+        queries.append({"measures": ["OrderItems.quantity"], "timeDimensions": [{**RANGE, "granularity": granularity}]})
+
+    # duplicates, as different widgets show the same kpi
+
+    queries += queries[:5]
+
+    return [CubeQuery.model_validate(query) for query in queries]
+
+def create_query_engine() -> CubeQueryEngine:
+    engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+    engine.cache.default_ttl = 0 # measure the database, not the cache
+    engine.set_cubes(CUBES)
+
+    return engine
+
+def measure(name: str, run, repeat: int = 5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    print(f"{name:<14} best {min(timings) * 1000:8.1f} ms   avg {sum(timings) / len(timings) * 1000:8.1f} ms")
+
+def main():
+    url = sys.argv[1] if len(sys.argv) > 1 else None
+    directory = None
+
+    if url is None:
+        directory = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(directory.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+
+    with Session(engine) as session:
+        populate(session)
+
+    queries = widgets()
+    query_engine = create_query_engine()
+
+    print(f"{len(queries)} widget queries on {engine.dialect.name}")
+
+    with Session(engine) as session:
+        measure("one by one", lambda: [query_engine.execute(query, session) for query in queries])
+        measure("batch", lambda: query_engine.execute_batch(queries, session))
+
+    engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+compares the row based json result format with the columnar formats.
+
+    python benchmarks/bench_columnar.py [rows]
+"""
+import json
+import random
+import sys
+import time
+from decimal import Decimal
+
+from cube.server.query import to_columnar, encode_json, encode_arrow
+from cube.server.query.query_columnar import arrow_available
+from cube.server.query.query_engine import _json_default
+
+COLUMNS = ["Customers.country", "Orders.orderDate.month", "Products.category", "OrderItems.orders", "OrderItems.revenue"]
+TYPES = ["string", "time", "string", "integer", "number"]
+
+def generate(count: int) -> list:
+    random.seed(1)
+
+    countries = [f"C{i:02d}" for i in range(50)]
+    months = [f"20{year:02d}-{month:02d}-01" for year in range(20, 25) for month in range(1, 13)]
+    categories = [f"category {i}" for i in range(200)]
+
+    return [
+        (random.choice(countries), random.choice(months), random.choice(categories), random.randint(1, 1000), Decimal(random.randint(1, 10_000_000)) / 100)
+        for _ in range(count)
+    ]
+
+def measure(name: str, encode) -> None:
+    start = time.perf_counter()
+    payload = encode()
+    elapsed = time.perf_counter() - start
+
+    print(f"{name:<20} {elapsed * 1000:10.1f} ms {len(payload) / 1024 / 1024:10.2f} MB")
+
+def rows_json(rows: list) -> bytes:
+    data = [dict(zip(COLUMNS, row)) for row in rows]
+
+    return json.dumps({"columns": COLUMNS, "data": data}, default=_json_default).encode()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rows = generate(count)
+
+    print(f"{count} rows")
+    print(f"{'format':<20} {'encode':>13} {'size':>13}")
+
+    measure("rows / json", lambda: rows_json(rows))
+    measure("columnar / json", lambda: encode_json(to_columnar(COLUMNS, TYPES, rows)))
+
+    if arrow_available():
+        measure("columnar / arrow", lambda: encode_arrow(to_columnar(COLUMNS, TYPES, rows)))
+    else:
+        print("columnar / arrow     skipped, pyarrow is not installed")
+
+if __name__ == "__main__":
+    main()
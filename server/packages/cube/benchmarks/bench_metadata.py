@@ -0,0 +1,78 @@
+"""
+measures orm metadata extraction on a synthetic registry, uncached and cached, and the size of its encodings.
+
+    python benchmarks/bench_metadata.py [classes]
+"""
+import dataclasses
+import itertools
+import json
+import sys
+import time
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey
+from sqlalchemy.orm import DeclarativeBase, relationship
+
+from cube.server.orm import MetadataCache, extract_all_entities, encode_compact
+
+def create_registry(count: int) -> type:
+    class Base(DeclarativeBase):
+        pass
+
+    # the class registry holds weak references only
+
+    Base.classes = []
+
+    for i in range(count):
+        attributes = {
+            "__tablename__": f"table_{i}",
+            "id": Column(Integer, primary_key=True),
+            "name": Column(String(100)),
+            "amount": Column(Numeric(10, 2)),
+            "created": Column(Date),
+        }
+
+        # every table references its predecessor
+
+        if i > 0:
+            attributes["parent_id"] = Column(Integer, ForeignKey(f"table_{i - 1}.id"))
+            attributes["parent"] = relationship(f"Entity{i - 1}")
+
+        Base.classes.append(type(f"Entity{i}", (Base,), attributes))
+
+    return Base
+
+def measure(name: str, run, repeat: int = 5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    print(f"{name:<24} best {min(timings) * 1000:10.3f} ms")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    base = create_registry(count)
+    base.registry.configure()
+
+    cache = MetadataCache()
+
+    print(f"{count} mapped classes")
+
+    measure("extract", lambda: extract_all_entities(base, dialect="postgres"))
+    measure("cached descriptor", lambda: cache.get_metadata(base, "postgres"))
+    measure("cached json", lambda: cache.get_json(base, "postgres"))
+    measure("jsonable_encoder", lambda: jsonable_encoder(cache.get_metadata(base, "postgres")), repeat=2)
+    measure("json", lambda: json.dumps(dataclasses.asdict(cache.get_metadata(base, "postgres"))), repeat=2)
+    measure("compact", lambda: list(encode_compact(cache.get_metadata(base, "postgres"))), repeat=2)
+    measure("compact first chunk", lambda: list(itertools.islice(encode_compact(cache.get_metadata(base, "postgres")), 2)))
+
+    descriptor = cache.get_metadata(base, "postgres")
+
+    print(f"{'json size':<24} {len(json.dumps(dataclasses.asdict(descriptor), separators=(',', ':'))):>10} bytes")
+    print(f"{'compact size':<24} {sum(len(line) for line in encode_compact(descriptor)):>10} bytes")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+synthetic orders data and the matching cube definitions used by the benchmarks
+"""
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from cube.interface import CubeDescriptor, MeasureDescriptor, DimensionDescriptor, JoinDescriptor, SegmentDescriptor
+from cube.server.persistence.orders import Customer, Product, Order, OrderItem
+
+CUBES = [
+    CubeDescriptor(
+        name="OrderItems",
+        table="order_items",
+        measures=[
+            MeasureDescriptor(name="quantity", type="sum", column="quantity"),
+            MeasureDescriptor(name="avgQuantity", type="avg", column="quantity"),
+            MeasureDescriptor(name="orders", type="countDistinct", column="order_id"),
+            MeasureDescriptor(name="revenue", type="sum", expression="${CUBE}.quantity * ${Products}.price"),
+            MeasureDescriptor(name="count", type="count"),
+        ],
+        dimensions=[
+            DimensionDescriptor(name="orderItemId", column="order_item_id", type="number", primary_key=True),
+        ],
+        joins=[
+            JoinDescriptor(name="Orders", relationship="belongsTo", on="${CUBE}.order_id = ${Orders}.order_id"),
+            JoinDescriptor(name="Products", relationship="belongsTo", on="${CUBE}.product_id = ${Products}.product_id"),
+        ]
+    ),
+    CubeDescriptor(
+        name="Orders",
+        table="orders",
+        measures=[MeasureDescriptor(name="count", type="count")],
+        dimensions=[
+            DimensionDescriptor(name="orderId", column="order_id", type="number", primary_key=True),
+            DimensionDescriptor(name="orderDate", column="order_date", type="time"),
+        ],
+        joins=[
+            JoinDescriptor(name="Customers", relationship="belongsTo", on="${CUBE}.customer_id = ${Customers}.customer_id")
+        ]
+    ),
+    CubeDescriptor(
+        name="Customers",
+        table="customers",
+        measures=[MeasureDescriptor(name="count", type="count")],
+        dimensions=[
+            DimensionDescriptor(name="customerId", column="customer_id", type="number", primary_key=True),
+            DimensionDescriptor(name="name", column="name", type="string"),
+            DimensionDescriptor(name="country", column="country", type="string"),
+        ],
+        segments=[SegmentDescriptor(name="german", expression="${CUBE}.country = 'DE'")]
+    ),
+    CubeDescriptor(
+        name="Products",
+        table="products",
+        measures=[MeasureDescriptor(name="count", type="count")],
+        dimensions=[
+            DimensionDescriptor(name="productId", column="product_id", type="number", primary_key=True),
+            DimensionDescriptor(name="category", column="category", type="string"),
+        ]
+    ),
+]
+
+COUNTRIES = ["DE", "US", "FR", "IT", "ES", "NL", "PL", "SE", "CH", "AT"]
+
+def populate(session: Session, orders: int = 50_000, items_per_order: int = 4, customers: int = 1_000, products: int = 200, seed: int = 1):
+    """
+    insert synthetic customers, products, orders and order items
+    """
+    random.seed(seed)
+    start = date(2022, 1, 1)
+
+    session.execute(insert(Customer), [
+        {"customer_id": i, "name": f"customer {i}", "country": random.choice(COUNTRIES)} for i in range(1, customers + 1)
+    ])
+    session.execute(insert(Product), [
+        {"product_id": i, "name": f"product {i}", "category": f"category {i % 20}", "price": random.randint(100, 100_000) / 100} for i in range(1, products + 1)
+    ])
+    session.execute(insert(Order), [
+        {"order_id": i, "customer_id": random.randint(1, customers), "order_date": start + timedelta(days=random.randint(0, 3 * 365))} for i in range(1, orders + 1)
+    ])
+
+    items = []
+    for order in range(1, orders + 1):
+        for _ in range(random.randint(1, 2 * items_per_order - 1)):
+            items.append({"order_item_id": len(items) + 1, "order_id": order, "product_id": random.randint(1, products), "quantity": random.randint(1, 10)})
+
+    session.execute(insert(OrderItem), items)
+    session.commit()
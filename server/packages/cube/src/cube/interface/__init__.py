@@ -1,10 +1,11 @@
 from .cube_component import CubeComponent
 
-from .orm_descriptors import DatabaseDescriptor, SchemaDescriptor, TableDescriptor, ColumnDescriptor, ForeignKeyDescriptor, RelationMappingDescriptor, RelationDescriptor
+from .orm_descriptors import DatabaseDescriptor, SchemaDescriptor, TableDescriptor, ColumnDescriptor, ForeignKeyDescriptor, RelationMappingDescriptor, RelationDescriptor, TableStatistics, ColumnStatistics
 from .orm_service import MetadataService
 from .cube_service import CubeService
 from .dashboard_service import DashboardService
 from .cube_descriptors import CubeDescriptor, MeasureType, DimensionType, JoinRelationship, TimeGranularity, MeasureDescriptor, DimensionDescriptor, SegmentDescriptor,JoinDescriptor,PreAggregationDescriptor, CubeSchemaDescriptor
+from .cube_query import CubeQuery, CubeQueryResult, CubeBatchQuery, CubeBatchResult, QueryFilter, QueryTimeDimension, FilterOperator, OrderDirection
 
 __all__ = [
     # cube_component
@@ -37,6 +38,17 @@ __all__ = [
     "PreAggregationDescriptor",
     "CubeSchemaDescriptor",
 
+    # cube_query
+
+    "CubeQuery",
+    "CubeQueryResult",
+    "CubeBatchQuery",
+    "CubeBatchResult",
+    "QueryFilter",
+    "QueryTimeDimension",
+    "FilterOperator",
+    "OrderDirection",
+
     # orm_descriptors
 
     "DatabaseDescriptor",
@@ -45,5 +57,7 @@ __all__ = [
     "ColumnDescriptor",
     "ForeignKeyDescriptor",
     "RelationMappingDescriptor",
-    "RelationDescriptor"
+    "RelationDescriptor",
+    "TableStatistics",
+    "ColumnStatistics"
 ]
\ No newline at end of file
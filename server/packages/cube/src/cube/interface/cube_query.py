@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+from typing import List, Dict, Optional, Literal, Union, Any
+
+from pydantic import BaseModel, Field, ConfigDict
+
+from .cube_descriptors import TimeGranularity
+
+# -------------------------
+# Enums
+# -------------------------
+
+FilterOperator = Literal[
+    "equals",
+    "notEquals",
+    "contains",
+    "notContains",
+    "startsWith",
+    "endsWith",
+    "gt",
+    "gte",
+    "lt",
+    "lte",
+    "set",
+    "notSet",
+    "inDateRange",
+    "notInDateRange",
+    "beforeDate",
+    "afterDate"
+]
+
+OrderDirection = Literal[
+    "asc",
+    "desc"
+]
+
+FilterValue = Union[str, int, float, bool]
+
+# -------------------------
+# Query parts
+# -------------------------
+
+class QueryFilter(BaseModel):
+    """
+    a filter on a dimension or measure, e.g. `{"member": "Orders.status", "operator": "equals", "values": ["open"]}`
+    """
+    member: str
+    operator: FilterOperator
+    values: List[FilterValue] = Field(default_factory=list)
+
+
+class QueryTimeDimension(BaseModel):
+    """
+    a time dimension, optionally bucketed by a granularity and restricted to a date range
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    dimension: str
+    granularity: Optional[TimeGranularity] = None
+    date_range: Optional[List[str]] = Field(None, validation_alias='dateRange')
+
+# -------------------------
+# Query
+# -------------------------
+
+class CubeQuery(BaseModel):
+    """
+    a Cube.js style query. Members are referenced as `<cube>.<member>`.
+    """
+    model_config = ConfigDict(populate_by_name=True)
+
+    measures: List[str] = Field(default_factory=list)
+    dimensions: List[str] = Field(default_factory=list)
+    time_dimensions: List[QueryTimeDimension] = Field(default_factory=list, validation_alias='timeDimensions')
+    filters: List[QueryFilter] = Field(default_factory=list)
+    segments: List[str] = Field(default_factory=list)
+    order: Dict[str, OrderDirection] = Field(default_factory=dict)
+
+    limit: Optional[int] = None
+    offset: Optional[int] = None
+
+# -------------------------
+# Result
+# -------------------------
+
+class CubeQueryResult(BaseModel):
+    """
+    the query result. Row keys are the member names, time dimensions are keyed as `<cube>.<member>.<granularity>`
+    """
+    columns: List[str]
+    data: List[Dict[str, Any]] = Field(default_factory=list)
+
+# -------------------------
+# Batch
+# -------------------------
+
+class CubeBatchQuery(BaseModel):
+    """
+    the queries of all widgets of a dashboard
+    """
+    queries: List[CubeQuery]
+
+class CubeBatchResult(BaseModel):
+    """
+    one result per query, in the order of the queries
+    """
+    results: List[CubeQueryResult]
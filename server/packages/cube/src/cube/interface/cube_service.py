@@ -3,6 +3,7 @@ from typing import List
 from aspyx_service import service, Service, rest, get, post, Body
 
 from .cube_descriptors import CubeDescriptor
+from .cube_query import CubeQuery, CubeQueryResult, CubeBatchQuery, CubeBatchResult
 
 
 @service(name="cube-service", description="metadata stuff")
@@ -30,4 +31,33 @@ class CubeService(Service):
     @abstractmethod
     @post("deploy")
     def deploy_cube(self, cube: Body(CubeDescriptor)):
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    @post("query")
+    def query(self, query: Body(CubeQuery)) -> CubeQueryResult:
+        """
+        Execute a cube query against the stored cube definitions.
+
+        Args:
+            query: measures, dimensions, time dimensions, filters, order and limit
+
+        Returns:
+            the result rows keyed by member name
+        """
+        pass
+
+    @abstractmethod
+    @post("query/batch")
+    def query_batch(self, batch: Body(CubeBatchQuery)) -> CubeBatchResult:
+        """
+        Execute the queries of a dashboard at once. Identical queries are executed once and compatible queries
+        on the same cube are merged into a single statement.
+
+        Args:
+            batch: the queries
+
+        Returns:
+            the results in the order of the queries
+        """
+        pass
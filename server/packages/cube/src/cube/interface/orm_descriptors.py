@@ -1,16 +1,44 @@
 from __future__ import annotations
 
+import sys
 from dataclasses import dataclass, field
-from typing import List, Tuple, Optional, Literal
+from typing import List, Tuple, Optional, Literal, Any
 
 SemanticType = Literal["string", "number", "time", "boolean"]
 Cardinality = Literal["one", "many"]
 
+# descriptors of large schemas are numerous and repeat the same names and types, so they are slotted
+# and their strings are interned
+
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if type(value) is str else value
+
+# -------------------------
+# Statistics
+# -------------------------
+
+@dataclass(**_SLOTS)
+class ColumnStatistics:
+    null_fraction: Optional[float] = None
+    distinct_count: Optional[float] = None  # estimated from a sample unless the sample covers the table
+
+    # numeric and time columns only
+
+    min: Optional[Any] = None
+    max: Optional[Any] = None
+
+@dataclass(**_SLOTS)
+class TableStatistics:
+    row_count: int
+    sample_size: int        # number of rows the distinct counts are based on
+
 # -------------------------
 # Column descriptor
 # -------------------------
 
-@dataclass
+@dataclass(**_SLOTS)
 class ColumnDescriptor:
     name: str
     db_type: str
@@ -22,11 +50,19 @@ class ColumnDescriptor:
     is_primary_key: bool
     is_foreign_key: bool
 
+    statistics: Optional[ColumnStatistics] = None
+
+    def __post_init__(self):
+        self.name = _intern(self.name)
+        self.db_type = _intern(self.db_type)
+        self.sqlalchemy_type = _intern(self.sqlalchemy_type)
+        self.semantic_type = _intern(self.semantic_type)
+
 # -------------------------
 # Optional: low-level FK descriptor
 # -------------------------
 
-@dataclass
+@dataclass(**_SLOTS)
 class ForeignKeyDescriptor:
     name: Optional[str]
 
@@ -34,10 +70,15 @@ class ForeignKeyDescriptor:
     target_table: str          # schema.table
     target_column: str
 
+    def __post_init__(self):
+        self.source_column = _intern(self.source_column)
+        self.target_table = _intern(self.target_table)
+        self.target_column = _intern(self.target_column)
+
 # -------------------------
 # Canonical relation mapping
 # -------------------------
-@dataclass
+@dataclass(**_SLOTS)
 class RelationMappingDescriptor:
     left_table: str
     right_table: str
@@ -54,10 +95,14 @@ class RelationMappingDescriptor:
     # Optional raw FKs for debugging
     foreign_keys: Optional[List[ForeignKeyDescriptor]] = None
 
+    def __post_init__(self):
+        self.left_table = _intern(self.left_table)
+        self.right_table = _intern(self.right_table)
+
 # -------------------------
 # Table-local relation descriptor
 # -------------------------
-@dataclass
+@dataclass(**_SLOTS)
 class RelationDescriptor:
     table: str
     other_table: str
@@ -68,10 +113,14 @@ class RelationDescriptor:
     attribute_name: Optional[str] = None
     inverse_name: Optional[str] = None
 
+    def __post_init__(self):
+        self.table = _intern(self.table)
+        self.other_table = _intern(self.other_table)
+
 # -------------------------
 # Table / schema / database descriptors
 # -------------------------
-@dataclass
+@dataclass(**_SLOTS)
 class TableDescriptor:
     id: str                   # schema.table
     schema: str
@@ -83,12 +132,14 @@ class TableDescriptor:
     foreign_keys: List[ForeignKeyDescriptor] = field(default_factory=list)
     relations: List[RelationDescriptor] = field(default_factory=list)
 
-@dataclass
+    statistics: Optional[TableStatistics] = None
+
+@dataclass(**_SLOTS)
 class SchemaDescriptor:
     name: str
     tables: List[TableDescriptor]
 
-@dataclass
+@dataclass(**_SLOTS)
 class DatabaseDescriptor:
     dialect: str
     schemas: List[SchemaDescriptor]
@@ -1,8 +1,10 @@
 from abc import abstractmethod
+from typing import List, Optional
 
 from aspyx_service import service, Service, rest, get
 
-from .orm_descriptors import DatabaseDescriptor
+from .orm_descriptors import DatabaseDescriptor, RelationDescriptor
+from .cube_descriptors import JoinDescriptor
 
 @service(name="metadata-service", description="metadata stuff")
 @rest("/api/metadata/")
@@ -15,3 +17,37 @@ class MetadataService(Service):
     @get("fetch")
     def get_metadata(self, dialect: str = "postgres") -> DatabaseDescriptor:
         pass
+
+    @abstractmethod
+    @get("reflect")
+    def reflect_database(self, schema: Optional[str] = None) -> DatabaseDescriptor:
+        """
+        reflect the tables of the live database, including tables that are not mapped by the orm
+        """
+        pass
+
+    @abstractmethod
+    @get("path")
+    def get_join_path(self, source: str, target: str, dialect: str = "postgres") -> List[RelationDescriptor]:
+        """
+        return the relations of the shortest join path between two tables, which is empty if there is none
+        """
+        pass
+
+    @abstractmethod
+    @get("joins")
+    def get_joins(self, root: str, tables: str, dialect: str = "postgres") -> List[JoinDescriptor]:
+        """
+        derive the joins of a cube on the root table that reach all tables of the comma separated list
+        """
+        pass
+
+    @abstractmethod
+    @get("statistics")
+    def get_statistics(self, schema: Optional[str] = None, tables: Optional[str] = None, budget: float = 10.0) -> DatabaseDescriptor:
+        """
+        reflect the live database and attach table and column statistics - row counts, null fractions, ranges
+        and distinct estimates - of the tables of the comma separated list, default all, as far as they are
+        computed within the time budget in seconds
+        """
+        pass
@@ -0,0 +1,26 @@
+from aspyx_service import implementation, health, AbstractComponent, HealthCheckManager, ChannelAddress
+from ..interface import CubeComponent
+
+@implementation()
+@health("/cube/health")
+class CubeComponentImpl(AbstractComponent, CubeComponent):
+    # constructor
+
+    def __init__(self, health_check_manager: HealthCheckManager):
+        super().__init__()
+
+        self.health_check_manager = health_check_manager
+
+    # implement
+
+    async def get_health(self) -> HealthCheckManager.Health:
+        # all components share the process, so its pools, caches and event loop count for every one of them
+
+        return await self.health_check_manager.check()
+
+    def get_addresses(self, port: int) -> list[ChannelAddress]:
+        local_ip = "127.0.0.1"
+        return [
+            ChannelAddress("rest", f"http://{local_ip}:{port}"),
+            ChannelAddress("dispatch-json", f"http://{local_ip}:{port}")
+        ]
@@ -0,0 +1,79 @@
+from aspyx.di import injectable
+from aspyx.di.configuration import inject_value
+from aspyx_service import HealthCheckManager, HealthStatus, health_checks, health_check
+
+from .query import CubeQueryCache
+
+@injectable()
+@health_checks()
+class CubeHealth:
+    """
+    Reports the state of the query cache in the `cube-cache` health check:
+
+    - the hit ratio of the lookups since the previous check, which turns into a warning below `min_hit_ratio`
+      once at least `min_lookups` were made. A ratio of 0 disables the threshold.
+    - the number of queries running against the database, which turns into a warning above `max_queries_in_flight`
+    """
+    # class properties
+
+    min_hit_ratio = 0.0
+    min_lookups = 100
+    max_queries_in_flight = 50
+
+    # constructor
+
+    def __init__(self, cache: CubeQueryCache):
+        self.cache = cache
+
+        self.hits = 0
+        self.lookups = 0
+
+    # configuration
+
+    @inject_value("HEALTH_MIN_CACHE_HIT_RATIO", default=min_hit_ratio)
+    def set_min_hit_ratio(self, min_hit_ratio: float):
+        self.min_hit_ratio = min_hit_ratio
+
+    @inject_value("HEALTH_MAX_QUERIES_IN_FLIGHT", default=max_queries_in_flight)
+    def set_max_queries_in_flight(self, max_queries_in_flight: int):
+        self.max_queries_in_flight = max_queries_in_flight
+
+    # internal
+
+    def window(self):
+        """
+        return hits and lookups since the last window with at least `min_lookups` lookups
+        """
+        statistics = self.cache.get_statistics()
+
+        hits = statistics.hits + statistics.collapsed
+        lookups = hits + statistics.misses
+
+        window = hits - self.hits, lookups - self.lookups
+        if window[1] >= self.min_lookups:
+            self.hits, self.lookups = hits, lookups
+
+        return window
+
+    # health
+
+    @health_check(name="cube-cache")
+    def check_cache(self, result: HealthCheckManager.Result):
+        hits, lookups = self.window()
+        running = len(self.cache.in_flight)
+
+        details = [f"{running} queries running"]
+        status = HealthStatus.OK
+
+        if lookups:
+            details.append(f"hit ratio {hits / lookups:.2f} of {lookups} lookups")
+
+            if lookups >= self.min_lookups and hits / lookups < self.min_hit_ratio:
+                status = HealthStatus.WARNING
+                details[-1] += f" below {self.min_hit_ratio:.2f}"
+
+        if running > self.max_queries_in_flight:
+            status = HealthStatus.WARNING
+            details[0] += f" exceed {self.max_queries_in_flight}"
+
+        result.set_status(status, ", ".join(details))
@@ -1,29 +1,53 @@
 import json
 from typing import List
 
+from sqlalchemy import event
+
 from aspyx_persistence import transactional, get_current_session
 
 from aspyx_service import implementation
 
 from ..interface.cube_service import CubeService
 from .cube.cube_generator import generate_cube_js
-from ..interface import CubeDescriptor
+from ..interface import CubeDescriptor, CubeQuery, CubeQueryResult, CubeBatchQuery, CubeBatchResult
 
 from .persistence import CubeRepository
 from .persistence.entity import CubeEntity
+from .query import CubeQueryEngine
 
 @implementation()
 class CubeServiceServiceImpl(CubeService):
     # slots
 
     __slots__ = [
-        "repository"
+        "repository",
+        "engine"
     ]
 
     # constructor
 
-    def __init__(self, repository: CubeRepository):
+    def __init__(self, repository: CubeRepository, engine: CubeQueryEngine):
         self.repository = repository
+        self.engine = engine
+
+    # internal
+
+    def invalidate_after_commit(self):
+        """
+        invalidate the query engine once the current transaction is committed - so that it is not rebuilt from the
+        uncommitted state meanwhile - and not at all on a rollback
+        """
+        session = get_current_session()
+
+        def committed(session):
+            event.remove(session, "after_rollback", rolled_back)
+            self.engine.invalidate()
+
+        def rolled_back(session):
+            event.remove(session, "after_commit", committed)
+
+        event.listen(session, "after_commit", committed, once=True)
+        event.listen(session, "after_rollback", rolled_back, once=True)
 
     # implement CubeService
 
@@ -39,6 +63,10 @@ class CubeServiceServiceImpl(CubeService):
 
         get_current_session().flush()
 
+        # the query engine needs to see the new cube
+
+        self.invalidate_after_commit()
+
         return cube
 
     @transactional()
@@ -60,3 +88,10 @@ class CubeServiceServiceImpl(CubeService):
 
         #console.log(cube)
 
+    @transactional()
+    def query(self, query: CubeQuery) -> CubeQueryResult:
+        return self.engine.execute(query)
+
+    @transactional()
+    def query_batch(self, batch: CubeBatchQuery) -> CubeBatchResult:
+        return CubeBatchResult(results=self.engine.execute_batch(batch.queries))
@@ -0,0 +1,103 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+from sqlalchemy.orm import configure_mappers
+
+from aspyx.di import injectable, on_running
+from aspyx.di.configuration import inject_value
+from aspyx_persistence import transaction, get_current_session
+from aspyx_service import HealthCheckManager, HealthStatus, health_checks, health_check
+
+from .orm import MetadataCache
+from .persistence.base import Base
+from .query import CubeQueryEngine
+
+@injectable()
+@health_checks()
+class CubeWarmup:
+    """
+    Warms the caches the first requests depend on - the sqlalchemy mappers, the orm metadata and the cube catalog
+    with its compiler - in a background thread once the environment is running.
+
+    Until that is done, the `cube-warmup` health check reports a warning, so that readiness can wait for it.
+    A failed warmup is not fatal, the caches are then initialized on first use.
+
+    With `lazy` set nothing is warmed and every cache is initialized on first use instead, which trades the
+    latency of the first requests for a shorter startup.
+    """
+    logger = logging.getLogger("cube.warmup")
+
+    # class properties
+
+    lazy = False
+    metadata_dialects = ["postgres"]
+
+    # constructor
+
+    def __init__(self, metadata: MetadataCache, engine: CubeQueryEngine):
+        self.metadata = metadata
+        self.engine = engine
+
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+        self.timings: Dict[str, float] = {}
+
+    # configuration
+
+    @inject_value("LAZY_INIT", default=lazy)
+    def set_lazy(self, lazy: bool):
+        self.lazy = lazy
+
+    # lifecycle
+
+    @on_running()
+    def start(self):
+        if self.lazy:
+            self.done.set()
+        else:
+            threading.Thread(target=self.warm, name="cube-warmup", daemon=True).start()
+
+    # internal
+
+    def step(self, name: str, function):
+        start = time.perf_counter()
+
+        function()
+
+        self.timings[name] = time.perf_counter() - start
+
+    def load_catalog(self):
+        with transaction():
+            self.engine.get_compiler(get_current_session())
+
+    def warm(self):
+        try:
+            self.step("mappers", configure_mappers)
+
+            for dialect in self.metadata_dialects:
+                self.step(f"metadata {dialect}", lambda: self.metadata.get_index(Base, dialect))
+
+            self.step("catalog", self.load_catalog)
+
+            self.logger.info("warmed up in %s", ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.timings.items()))
+        except Exception as e:
+            self.error = e
+            self.logger.warning("warmup failed: %s", e)
+        finally:
+            self.done.set()
+
+    # public
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.done.wait(timeout)
+
+    # health
+
+    @health_check(name="cube-warmup")
+    def check_warm(self, result: HealthCheckManager.Result):
+        if not self.done.is_set():
+            result.set_status(HealthStatus.WARNING, "warming up")
+        elif self.error is not None:
+            result.set_status(HealthStatus.OK, f"warmup failed, caches are initialized on first use: {self.error}")
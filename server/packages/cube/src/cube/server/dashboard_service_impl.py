@@ -1,4 +1,5 @@
 from typing import List, Optional
+from uuid import UUID
 
 from aspyx_persistence import transactional, get_current_session
 
@@ -63,7 +64,7 @@ class DashboardServiceServiceImpl(DashboardService):
 
     @transactional()
     def find_dashboard_by_id(self, id: str) -> Dashboard:
-        return self.repository.find(id, self.get_entity_to_dto_mapper())
+        return self.repository.find(UUID(id), self.get_entity_to_dto_mapper())
 
     @transactional()
     def update_dashboard(self, dashboard: Dashboard) -> Dashboard:
@@ -1,7 +1,47 @@
-from .sqlalchemy_orm_extractor import extract_database_from_orm
+from .sqlalchemy_orm_extractor import extract_database_from_orm, extract_all_entities
+from .metadata_cache import MetadataCache
+from .relation_graph import RelationGraph, RelationGraphException, UnknownTableException, Edge, mapping_id
+from .metadata_encoding import CompactMetadataEncoder, encode_compact, decode_compact
+from .metadata_index import MetadataIndex, SchemaIndex
+from .database_reflector import DatabaseReflector, semantic_type_from_name
+from .table_statistics import StatisticsCollector, estimate_distinct
 
 __all__ = [
     # sqlalchemy_orm_extractor
 
-    "extract_database_from_orm"
+    "extract_database_from_orm",
+    "extract_all_entities",
+
+    # metadata_cache
+
+    "MetadataCache",
+
+    # relation_graph
+
+    "RelationGraph",
+    "RelationGraphException",
+    "UnknownTableException",
+    "Edge",
+    "mapping_id",
+
+    # metadata_encoding
+
+    "CompactMetadataEncoder",
+    "encode_compact",
+    "decode_compact",
+
+    # metadata_index
+
+    "MetadataIndex",
+    "SchemaIndex",
+
+    # database_reflector
+
+    "DatabaseReflector",
+    "semantic_type_from_name",
+
+    # table_statistics
+
+    "StatisticsCollector",
+    "estimate_distinct"
 ]
\ No newline at end of file
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple, Any
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Connection, Engine, inspect, text
+
+from aspyx.di import injectable
+
+from cube.interface import (
+    DatabaseDescriptor,
+    SchemaDescriptor,
+    TableDescriptor,
+    ColumnDescriptor,
+    ForeignKeyDescriptor,
+    RelationMappingDescriptor,
+    RelationDescriptor,
+)
+
+from .sqlalchemy_orm_extractor import semantic_type_from_sqla
+
+# -------------------------
+# Helpers
+# -------------------------
+
+def semantic_type_from_name(db_type: str) -> str:
+    """
+    map a declared database type to a semantic type, following the sqlite type affinity rules
+    """
+    name = db_type.upper()
+
+    if "DATE" in name or "TIME" in name:
+        return "time"
+    if "BOOL" in name:
+        return "boolean"
+    if "INT" in name or any(token in name for token in ("REAL", "FLOA", "DOUB", "NUM", "DEC")):
+        return "number"
+
+    return "string"
+
+class _RawTable:
+    """
+    catalog rows of a single table before they are turned into descriptors
+    """
+    __slots__ = [
+        "columns",
+        "primary_key",
+        "foreign_keys"
+    ]
+
+    def __init__(self):
+        self.columns: List[ColumnDescriptor] = []
+        self.primary_key: List[str] = []
+        self.foreign_keys: Dict[str, List[Tuple[str, str, Optional[str]]]] = defaultdict(list) # name -> (source, target table, target column)
+
+# -------------------------
+# Reflector
+# -------------------------
+
+@injectable()
+class DatabaseReflector:
+    """
+    Reflects tables of a live database - including tables that are not mapped by the orm - into descriptors.
+
+    The catalog is read with a few bulk queries per schema instead of per table inspector calls.
+    Results are cached per engine and schema under a cheap schema fingerprint, so unchanged schemas are not reflected again.
+    The engine - not its url - identifies the database, since in-memory sqlite databases share the url `sqlite://`.
+    """
+    # constructor
+
+    def __init__(self):
+        self.cache: WeakKeyDictionary[Engine, Dict[str, Tuple[str, SchemaDescriptor]]] = WeakKeyDictionary()
+        self.lock = threading.Lock()
+
+    # public
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+
+    def reflect(self, engine: Engine, schemas: Optional[List[str]] = None) -> DatabaseDescriptor:
+        """
+        reflect the given schemas, by default the default schema
+
+        Args:
+            engine: the engine
+            schemas: optional schema names
+
+        Returns:
+            the database descriptor
+        """
+        with engine.connect() as connection:
+            schemas = schemas or [inspect(connection).default_schema_name]
+
+            return DatabaseDescriptor(dialect=engine.dialect.name, schemas=[self.reflect_schema(connection, schema) for schema in schemas])
+
+    def reflect_schema(self, connection: Connection, schema: str) -> SchemaDescriptor:
+        engine = connection.engine
+        fingerprint = self.fingerprint(connection, schema)
+
+        with self.lock:
+            cached = self.cache.get(engine, {}).get(schema)
+            if cached is not None and cached[0] == fingerprint:
+                return cached[1]
+
+        descriptor = SchemaDescriptor(name=schema, tables=self.create_tables(schema, self.read_catalog(connection, schema)))
+
+        with self.lock:
+            self.cache.setdefault(engine, {})[schema] = (fingerprint, descriptor)
+
+        return descriptor
+
+    # fingerprints
+
+    def fingerprint(self, connection: Connection, schema: str) -> str:
+        """
+        return a value that changes whenever tables, columns or constraints of the schema change
+        """
+        dialect = connection.dialect.name
+
+        if dialect == "sqlite":
+            # incremented by sqlite on every schema change
+
+            return str(connection.exec_driver_sql(f"PRAGMA {self.quote(connection, schema)}.schema_version").scalar())
+
+        if dialect == "postgresql":
+            # columns with their types, modifiers and nullability - dropped ones included, since they shift the
+            # attribute numbers - and constraints with their referenced table and columns
+
+            return connection.execute(text(
+                "select md5("
+                "coalesce((select string_agg(c.relname || ':' || c.relkind::text || ':' || a.attnum::text || ':' || a.attname || ':' || a.atttypid::text || ':' || a.atttypmod::text || ':' || a.attnotnull::text || ':' || a.attisdropped::text, ',' order by c.oid, a.attnum) "
+                "from pg_class c join pg_namespace n on n.oid = c.relnamespace join pg_attribute a on a.attrelid = c.oid and a.attnum > 0 "
+                "where n.nspname = :schema and c.relkind in ('r', 'v', 'p', 'm')), '') || '|' || "
+                "coalesce((select string_agg(c.relname || ':' || con.conname || ':' || con.contype::text || ':' || coalesce(con.conkey::text, '') || ':' || con.confrelid::text || ':' || coalesce(con.confkey::text, ''), ',' order by c.oid, con.oid) "
+                "from pg_class c join pg_namespace n on n.oid = c.relnamespace join pg_constraint con on con.conrelid = c.oid "
+                "where n.nspname = :schema and c.relkind in ('r', 'v', 'p', 'm')), ''))"
+            ), {"schema": schema}).scalar()
+
+        # generic: hash the column catalog
+
+        rows = connection.execute(text(
+            "select table_name, column_name, data_type, is_nullable from information_schema.columns "
+            "where table_schema = :schema order by table_name, ordinal_position"
+        ), {"schema": schema}).all()
+
+        return hashlib.sha1(repr(rows).encode()).hexdigest()
+
+    # catalog
+
+    def quote(self, connection: Connection, name: str) -> str:
+        return connection.dialect.identifier_preparer.quote(name)
+
+    def read_catalog(self, connection: Connection, schema: str) -> Dict[str, _RawTable]:
+        if connection.dialect.name == "sqlite":
+            return self.read_sqlite_catalog(connection, schema)
+
+        return self.read_inspector_catalog(connection, schema)
+
+    def read_sqlite_catalog(self, connection: Connection, schema: str) -> Dict[str, _RawTable]:
+        """
+        read all columns and foreign keys of a sqlite schema with two queries using the table valued pragma functions
+        """
+        tables: Dict[str, _RawTable] = defaultdict(_RawTable)
+        master = f"{self.quote(connection, schema)}.sqlite_master"
+
+        columns = connection.execute(text(
+            f"select m.name, p.name, p.type, p.\"notnull\", p.pk from {master} m join pragma_table_info(m.name, :schema) p "
+            f"where m.type in ('table', 'view') and m.name not like 'sqlite_%' order by m.name, p.cid"
+        ), {"schema": schema})
+
+        primary_keys: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+        foreign_key_columns = set()
+
+        foreign_keys = connection.execute(text(
+            f"select m.name, f.id, f.\"table\", f.\"from\", f.\"to\" from {master} m join pragma_foreign_key_list(m.name, :schema) f "
+            f"where m.type = 'table' and m.name not like 'sqlite_%' order by m.name, f.id, f.seq"
+        ), {"schema": schema}).all()
+
+        for table, id, target, source, target_column in foreign_keys:
+            tables[table].foreign_keys[f"fk_{table}_{id}"].append((source, target, target_column))
+            foreign_key_columns.add((table, source))
+
+        for table, name, db_type, not_null, pk in columns:
+            tables[table].columns.append(ColumnDescriptor(
+                name=name,
+                db_type=db_type or "",
+                sqlalchemy_type=db_type or "",
+                semantic_type=semantic_type_from_name(db_type or ""),
+                nullable=not not_null and not pk,
+                is_primary_key=pk > 0,
+                is_foreign_key=(table, name) in foreign_key_columns,
+            ))
+
+            if pk > 0:
+                primary_keys[table].append((pk, name))
+
+        for table, columns in primary_keys.items():
+            tables[table].primary_key = [name for _, name in sorted(columns)]
+
+        # a foreign key without target column references the primary key of the target
+
+        for raw in tables.values():
+            for name, columns in raw.foreign_keys.items():
+                if any(target_column is None for _, _, target_column in columns):
+                    target_pk = tables[columns[0][1]].primary_key if columns[0][1] in tables else []
+                    raw.foreign_keys[name] = [(source, target, target_pk[i] if i < len(target_pk) else None) for i, (source, target, _) in enumerate(columns)]
+
+        return tables
+
+    def read_inspector_catalog(self, connection: Connection, schema: str) -> Dict[str, _RawTable]:
+        """
+        read a schema with the bulk `get_multi_*` inspector methods, which issue one catalog query per kind on dialects like postgresql
+        """
+        inspector = inspect(connection)
+        tables: Dict[str, _RawTable] = defaultdict(_RawTable)
+
+        foreign_key_columns = set()
+        for (_, table), foreign_keys in inspector.get_multi_foreign_keys(schema=schema).items():
+            for i, foreign_key in enumerate(foreign_keys):
+                name = foreign_key.get("name") or f"fk_{table}_{i}"
+                target = foreign_key["referred_table"]
+                if foreign_key.get("referred_schema") and foreign_key["referred_schema"] != schema:
+                    target = f"{foreign_key['referred_schema']}.{target}"
+
+                for source, target_column in zip(foreign_key["constrained_columns"], foreign_key["referred_columns"]):
+                    tables[table].foreign_keys[name].append((source, target, target_column))
+                    foreign_key_columns.add((table, source))
+
+        primary_keys = {table: constraint.get("constrained_columns") or [] for (_, table), constraint in inspector.get_multi_pk_constraint(schema=schema).items()}
+
+        for (_, table), columns in inspector.get_multi_columns(schema=schema).items():
+            primary_key = primary_keys.get(table, [])
+
+            tables[table].primary_key = list(primary_key)
+            for column in columns:
+                tables[table].columns.append(ColumnDescriptor(
+                    name=column["name"],
+                    db_type=str(column["type"]),
+                    sqlalchemy_type=column["type"].__class__.__name__,
+                    semantic_type=semantic_type_from_sqla(column["type"]),
+                    nullable=column.get("nullable", True),
+                    is_primary_key=column["name"] in primary_key,
+                    is_foreign_key=(table, column["name"]) in foreign_key_columns,
+                ))
+
+        return tables
+
+    # descriptors
+
+    def create_tables(self, schema: str, raw_tables: Dict[str, _RawTable]) -> List[TableDescriptor]:
+        tables = {
+            name: TableDescriptor(id=f"{schema}.{name}", schema=schema, name=name, columns=raw.columns, primary_key=raw.primary_key)
+            for name, raw in sorted(raw_tables.items())
+        }
+
+        for name, raw in sorted(raw_tables.items()):
+            table = tables[name]
+
+            for fk_name, columns in raw.foreign_keys.items():
+                target = columns[0][1]
+                foreign_keys = [ForeignKeyDescriptor(name=fk_name, source_column=source, target_table=target if "." in target else f"{schema}.{target}", target_column=target_column) for source, _, target_column in columns]
+                table.foreign_keys.extend(foreign_keys)
+
+                mapping = RelationMappingDescriptor(
+                    left_table=table.id,
+                    right_table=foreign_keys[0].target_table,
+                    column_pairs=[(source, target_column) for source, _, target_column in columns],
+                    left_cardinality="many",
+                    right_cardinality="one",
+                    foreign_keys=foreign_keys
+                )
+
+                table.relations.append(RelationDescriptor(table=table.id, other_table=mapping.right_table, mapping=mapping, direction="left"))
+
+                other = tables.get(target)
+                if other is not None:
+                    other.relations.append(RelationDescriptor(table=other.id, other_table=table.id, mapping=mapping, direction="right"))
+
+        return list(tables.values())
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import DeclarativeBase, Mapper
+
+from aspyx.di import injectable
+
+from cube.interface import DatabaseDescriptor
+
+from .sqlalchemy_orm_extractor import extract_all_entities
+from .relation_graph import RelationGraph
+from .metadata_encoding import encode_compact
+from .metadata_index import MetadataIndex
+
+class _Entry:
+    __slots__ = [
+        "generation",
+        "descriptor",
+        "json",
+        "compact",
+        "index",
+        "graph"
+    ]
+
+    def __init__(self, generation: int, descriptor: DatabaseDescriptor):
+        self.generation = generation
+        self.descriptor = descriptor
+        self.json: Optional[bytes] = None
+        self.compact: Optional[List[bytes]] = None
+        self.index: Optional[MetadataIndex] = None
+        self.graph: Optional[RelationGraph] = None
+
+@injectable()
+class MetadataCache:
+    """
+    Memoizes the metadata extracted from the orm per declarative base and dialect, together with its json encoding.
+
+    The mapper registry does not change at runtime, so entries are only invalidated if mappers are (re)configured,
+    which sqlalchemy signals with the `after_configured` event.
+    """
+    # class properties
+
+    generation = 0 # incremented whenever mappers are configured
+
+    @staticmethod
+    def mappers_configured():
+        MetadataCache.generation += 1
+
+    # constructor
+
+    def __init__(self):
+        self.entries: Dict[Tuple[type, str], _Entry] = {}
+        self.lock = threading.Lock()
+
+    # public
+
+    def invalidate(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_metadata(self, base: type[DeclarativeBase], dialect: str) -> DatabaseDescriptor:
+        return self.get_entry(base, dialect).descriptor
+
+    def get_json(self, base: type[DeclarativeBase], dialect: str) -> bytes:
+        """
+        return the json encoded metadata
+        """
+        entry = self.get_entry(base, dialect)
+        if entry.json is None:
+            entry.json = json.dumps(dataclasses.asdict(entry.descriptor), separators=(",", ":")).encode()
+
+        return entry.json
+
+    def iter_compact(self, base: type[DeclarativeBase], dialect: str) -> Iterator[bytes]:
+        """
+        yield the lines of the compact encoding of the metadata. The first call encodes lazily while yielding.
+        """
+        entry = self.get_entry(base, dialect)
+        if entry.compact is not None:
+            yield from entry.compact
+            return
+
+        lines = []
+        for line in encode_compact(entry.descriptor):
+            lines.append(line)
+            yield line
+
+        entry.compact = lines
+
+    def get_index(self, base: type[DeclarativeBase], dialect: str) -> MetadataIndex:
+        """
+        return the schema and table index of the metadata
+        """
+        entry = self.get_entry(base, dialect)
+        if entry.index is None:
+            entry.index = MetadataIndex(entry.descriptor)
+
+        return entry.index
+
+    def get_graph(self, base: type[DeclarativeBase], dialect: str) -> RelationGraph:
+        """
+        return the relation graph of the metadata
+        """
+        entry = self.get_entry(base, dialect)
+        if entry.graph is None:
+            entry.graph = RelationGraph(entry.descriptor)
+
+        return entry.graph
+
+    # internal
+
+    def get_entry(self, base: type[DeclarativeBase], dialect: str) -> _Entry:
+        # configure pending mappers first, so that new classes bump the generation before it is checked
+
+        base.registry.configure()
+
+        key = (base, dialect)
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry.generation != MetadataCache.generation:
+                entry = _Entry(MetadataCache.generation, extract_all_entities(base, dialect=dialect))
+                self.entries[key] = entry
+
+            return entry
+
+event.listen(Mapper, "after_configured", MetadataCache.mappers_configured)
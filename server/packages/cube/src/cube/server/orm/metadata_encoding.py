@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Union, Any
+
+from cube.interface import (
+    DatabaseDescriptor,
+    SchemaDescriptor,
+    TableDescriptor,
+    ColumnDescriptor,
+    ForeignKeyDescriptor,
+    RelationMappingDescriptor,
+    RelationDescriptor,
+)
+
+# -------------------------
+# Compact metadata encoding
+# -------------------------
+
+COMPACT_FORMAT = "compact-metadata"
+COMPACT_VERSION = 1
+
+# column flags
+
+NULLABLE = 1
+PRIMARY_KEY = 2
+FOREIGN_KEY = 4
+
+_DIRECTIONS = ["left", "right"]
+
+def _line(value: dict) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode() + b"\n"
+
+class CompactMetadataEncoder:
+    """
+    Encodes a database descriptor as newline delimited json chunks, each of which describes a number of tables
+    column by column, i.e. as parallel arrays instead of one object per column, relation or foreign key.
+
+    Strings are replaced by indices into a string table, which is transferred incrementally: every chunk
+    carries the strings it introduces, so a client can decode - and render - every chunk as soon as it arrives.
+    `None` is encoded as -1.
+
+    The first line is a header with format, version and dialect. Chunk layout:
+
+    - `tables`: `id`, `schema`, `name`, `columns`, `foreign_keys`, `relations` and `primary_key_columns` counts, `primary_key` as a flat list of names
+    - `columns`: `name`, `db_type`, `sqlalchemy_type`, `semantic_type`, `flags` (nullable = 1, primary key = 2, foreign key = 4)
+    - `foreign_keys`: `name`, `source_column`, `target_table`, `target_column`
+    - `mappings`: relation mappings introduced by this chunk, numbered globally in order of appearance
+    - `relations`: `other_table`, `mapping` (the global mapping number), `direction` (left = 0, right = 1), `attribute_name`, `inverse_name`.
+      The table of a relation is the table it belongs to.
+    """
+    # constructor
+
+    def __init__(self, chunk_size: int = 256):
+        self.chunk_size = chunk_size
+        self.strings: Dict[str, int] = {}
+        self.pending: List[str] = []
+        self.mappings: Dict[int, int] = {} # id of a mapping -> number
+
+    # internal
+
+    def string(self, value: Optional[str]) -> int:
+        if value is None:
+            return -1
+
+        index = self.strings.get(value)
+        if index is None:
+            index = self.strings[value] = len(self.strings)
+            self.pending.append(value)
+
+        return index
+
+    def foreign_keys(self, foreign_keys: Iterable[ForeignKeyDescriptor], into: Dict[str, List[int]]):
+        string = self.string
+
+        for foreign_key in foreign_keys:
+            into["name"].append(string(foreign_key.name))
+            into["source_column"].append(string(foreign_key.source_column))
+            into["target_table"].append(string(foreign_key.target_table))
+            into["target_column"].append(string(foreign_key.target_column))
+
+    def mapping(self, mapping: RelationMappingDescriptor, mappings: Dict[str, list]) -> int:
+        number = self.mappings.get(id(mapping))
+        if number is not None:
+            return number
+
+        number = self.mappings[id(mapping)] = len(self.mappings)
+        string = self.string
+
+        mappings["left_table"].append(string(mapping.left_table))
+        mappings["right_table"].append(string(mapping.right_table))
+        mappings["left_cardinality"].append(string(mapping.left_cardinality))
+        mappings["right_cardinality"].append(string(mapping.right_cardinality))
+        mappings["bridge_table"].append(string(mapping.bridge_table))
+        mappings["pairs"].append(len(mapping.column_pairs))
+        for left, right in mapping.column_pairs:
+            mappings["columns"].append(string(left))
+            mappings["columns"].append(string(right))
+
+        if mapping.foreign_keys is None:
+            mappings["foreign_keys"].append(-1)
+        else:
+            mappings["foreign_keys"].append(len(mapping.foreign_keys))
+            self.foreign_keys(mapping.foreign_keys, mappings["foreign_key"])
+
+        return number
+
+    def chunk(self, schema: SchemaDescriptor, tables: List[TableDescriptor]) -> dict:
+        string = self.string
+
+        table_arrays = {key: [] for key in ("id", "schema", "name", "columns", "foreign_keys", "relations", "primary_key_columns", "primary_key")}
+        columns = {key: [] for key in ("name", "db_type", "sqlalchemy_type", "semantic_type", "flags")}
+        foreign_keys = {key: [] for key in ("name", "source_column", "target_table", "target_column")}
+        mappings = {key: [] for key in ("left_table", "right_table", "left_cardinality", "right_cardinality", "bridge_table", "pairs", "columns", "foreign_keys")}
+        mappings["foreign_key"] = {key: [] for key in foreign_keys}
+        relations = {key: [] for key in ("other_table", "mapping", "direction", "attribute_name", "inverse_name")}
+
+        for table in tables:
+            table_arrays["id"].append(string(table.id))
+            table_arrays["schema"].append(string(table.schema))
+            table_arrays["name"].append(string(table.name))
+            table_arrays["columns"].append(len(table.columns))
+            table_arrays["foreign_keys"].append(len(table.foreign_keys))
+            table_arrays["relations"].append(len(table.relations))
+            table_arrays["primary_key_columns"].append(len(table.primary_key))
+            table_arrays["primary_key"].extend(string(name) for name in table.primary_key)
+
+            for column in table.columns:
+                columns["name"].append(string(column.name))
+                columns["db_type"].append(string(column.db_type))
+                columns["sqlalchemy_type"].append(string(column.sqlalchemy_type))
+                columns["semantic_type"].append(string(column.semantic_type))
+                columns["flags"].append((NULLABLE if column.nullable else 0) | (PRIMARY_KEY if column.is_primary_key else 0) | (FOREIGN_KEY if column.is_foreign_key else 0))
+
+            self.foreign_keys(table.foreign_keys, foreign_keys)
+
+            for relation in table.relations:
+                relations["other_table"].append(string(relation.other_table))
+                relations["mapping"].append(self.mapping(relation.mapping, mappings))
+                relations["direction"].append(_DIRECTIONS.index(relation.direction))
+                relations["attribute_name"].append(string(relation.attribute_name))
+                relations["inverse_name"].append(string(relation.inverse_name))
+
+        strings, self.pending = self.pending, []
+
+        return {
+            "schema": schema.name,
+            "strings": strings,
+            "tables": table_arrays,
+            "columns": columns,
+            "foreign_keys": foreign_keys,
+            "mappings": mappings,
+            "relations": relations
+        }
+
+    # public
+
+    def encode(self, database: DatabaseDescriptor) -> Iterator[bytes]:
+        """
+        yield the encoded lines - header first - lazily, so that a response can be streamed while encoding
+        """
+        yield _line({"format": COMPACT_FORMAT, "version": COMPACT_VERSION, "dialect": database.dialect})
+
+        for schema in database.schemas:
+            tables = schema.tables
+            if not tables:
+                yield _line(self.chunk(schema, []))
+
+            for start in range(0, len(tables), self.chunk_size):
+                yield _line(self.chunk(schema, tables[start:start + self.chunk_size]))
+
+def encode_compact(database: DatabaseDescriptor, chunk_size: int = 256) -> Iterator[bytes]:
+    return CompactMetadataEncoder(chunk_size).encode(database)
+
+# -------------------------
+# Decoding
+# -------------------------
+
+def decode_compact(lines: Iterable[Union[bytes, str]]) -> DatabaseDescriptor:
+    """
+    decode the lines produced by `encode_compact`
+    """
+    strings: List[str] = []
+    mappings: List[RelationMappingDescriptor] = []
+    schemas: Dict[str, SchemaDescriptor] = {}
+    database: Optional[DatabaseDescriptor] = None
+
+    def string(index: int) -> Optional[str]:
+        return strings[index] if index >= 0 else None
+
+    def foreign_keys(arrays: Dict[str, List[int]], start: int, count: int) -> List[ForeignKeyDescriptor]:
+        return [
+            ForeignKeyDescriptor(
+                name=string(arrays["name"][i]),
+                source_column=string(arrays["source_column"][i]),
+                target_table=string(arrays["target_table"][i]),
+                target_column=string(arrays["target_column"][i])
+            ) for i in range(start, start + count)
+        ]
+
+    for line in lines:
+        if not line.strip():
+            continue
+
+        chunk: Dict[str, Any] = json.loads(line)
+
+        if database is None:
+            if chunk.get("format") != COMPACT_FORMAT or chunk.get("version") != COMPACT_VERSION:
+                raise ValueError("not a compact metadata stream")
+
+            database = DatabaseDescriptor(dialect=chunk["dialect"], schemas=[])
+            continue
+
+        strings.extend(chunk["strings"])
+
+        schema = schemas.get(chunk["schema"])
+        if schema is None:
+            schema = schemas[chunk["schema"]] = SchemaDescriptor(name=chunk["schema"], tables=[])
+            database.schemas.append(schema)
+
+        # mappings
+
+        m = chunk["mappings"]
+        pair = fk = 0
+        for i in range(len(m["left_table"])):
+            pairs = [(strings[m["columns"][2 * j]], strings[m["columns"][2 * j + 1]]) for j in range(pair, pair + m["pairs"][i])]
+            pair += m["pairs"][i]
+
+            mapping_foreign_keys = None
+            if m["foreign_keys"][i] >= 0:
+                mapping_foreign_keys = foreign_keys(m["foreign_key"], fk, m["foreign_keys"][i])
+                fk += m["foreign_keys"][i]
+
+            mappings.append(RelationMappingDescriptor(
+                left_table=string(m["left_table"][i]),
+                right_table=string(m["right_table"][i]),
+                column_pairs=pairs,
+                left_cardinality=string(m["left_cardinality"][i]),
+                right_cardinality=string(m["right_cardinality"][i]),
+                bridge_table=string(m["bridge_table"][i]),
+                foreign_keys=mapping_foreign_keys
+            ))
+
+        # tables
+
+        t, c, f, r = chunk["tables"], chunk["columns"], chunk["foreign_keys"], chunk["relations"]
+        column = foreign_key = relation = primary_key = 0
+
+        for i in range(len(t["id"])):
+            id = strings[t["id"][i]]
+
+            columns = [
+                ColumnDescriptor(
+                    name=strings[c["name"][j]],
+                    db_type=strings[c["db_type"][j]],
+                    sqlalchemy_type=strings[c["sqlalchemy_type"][j]],
+                    semantic_type=strings[c["semantic_type"][j]],
+                    nullable=bool(c["flags"][j] & NULLABLE),
+                    is_primary_key=bool(c["flags"][j] & PRIMARY_KEY),
+                    is_foreign_key=bool(c["flags"][j] & FOREIGN_KEY)
+                ) for j in range(column, column + t["columns"][i])
+            ]
+            column += t["columns"][i]
+
+            table_foreign_keys = foreign_keys(f, foreign_key, t["foreign_keys"][i])
+            foreign_key += t["foreign_keys"][i]
+
+            relations = [
+                RelationDescriptor(
+                    table=id,
+                    other_table=strings[r["other_table"][j]],
+                    mapping=mappings[r["mapping"][j]],
+                    direction=_DIRECTIONS[r["direction"][j]],
+                    attribute_name=string(r["attribute_name"][j]),
+                    inverse_name=string(r["inverse_name"][j])
+                ) for j in range(relation, relation + t["relations"][i])
+            ]
+            relation += t["relations"][i]
+
+            primary = [strings[index] for index in t["primary_key"][primary_key:primary_key + t["primary_key_columns"][i]]]
+            primary_key += t["primary_key_columns"][i]
+
+            schema.tables.append(TableDescriptor(
+                id=id,
+                schema=string(t["schema"][i]),
+                name=strings[t["name"][i]],
+                columns=columns,
+                primary_key=primary,
+                foreign_keys=table_foreign_keys,
+                relations=relations
+            ))
+
+    if database is None:
+        raise ValueError("empty compact metadata stream")
+
+    return database
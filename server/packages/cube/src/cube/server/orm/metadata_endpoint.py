@@ -0,0 +1,121 @@
+import dataclasses
+import hashlib
+import json
+from typing import Any, Callable, Optional
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response, StreamingResponse
+
+from aspyx.di import injectable
+from aspyx_service import FastAPIServer
+
+from ..persistence.base import Base
+from .metadata_cache import MetadataCache
+from .metadata_index import SchemaIndex
+
+def _matches(request: Request, etag: str) -> bool:
+    """
+    return `True` if the etag matches the `If-None-Match` header of the request
+    """
+    header = request.headers.get("if-none-match")
+    if header is None:
+        return False
+
+    tags = [tag.strip() for tag in header.split(",")]
+
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def _response(request: Request, etag: str, content: Callable[[], Any]) -> Response:
+    """
+    return a 304 response if the client has the current version, otherwise the json encoded content
+    """
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if _matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return Response(json.dumps(content(), separators=(",", ":")), media_type="application/json", headers=headers)
+
+@injectable()
+class MetadataEndpoint:
+    """
+    Registers endpoints that return cached encodings of the orm metadata instead of encoding the descriptors
+    on every call like `MetadataService.get_metadata`:
+
+    - `GET /api/metadata/json` returns the json encoding
+    - `GET /api/metadata/compact` streams the compact, column oriented encoding as newline delimited json
+
+    and paged endpoints, which let clients fetch only what they show:
+
+    - `GET /api/metadata/schemas` lists the schemas
+    - `GET /api/metadata/schemas/{schema}/tables` lists the tables of a schema, optionally filtered by a name prefix
+    - `GET /api/metadata/schemas/{schema}/tables/{table}` returns a single table with its relations
+
+    Paged responses carry an etag derived from the schema fingerprint and are answered with 304
+    if the client already has the current version.
+    """
+    # constructor
+
+    def __init__(self, server: FastAPIServer, cache: MetadataCache):
+        self.cache = cache
+
+        server.fast_api.add_api_route("/api/metadata/json", self.get_json, methods=["GET"], tags=["MetadataService"])
+        server.fast_api.add_api_route("/api/metadata/compact", self.get_compact, methods=["GET"], tags=["MetadataService"])
+        server.fast_api.add_api_route("/api/metadata/schemas", self.get_schemas, methods=["GET"], tags=["MetadataService"])
+        server.fast_api.add_api_route("/api/metadata/schemas/{schema}/tables", self.get_tables, methods=["GET"], tags=["MetadataService"])
+        server.fast_api.add_api_route("/api/metadata/schemas/{schema}/tables/{table}", self.get_table, methods=["GET"], tags=["MetadataService"])
+
+    # internal
+
+    def schema_index(self, schema: str, dialect: str) -> SchemaIndex:
+        index = self.cache.get_index(Base, dialect).get_schema(schema)
+        if index is None:
+            raise HTTPException(status_code=404, detail=f"unknown schema '{schema}'")
+
+        return index
+
+    # endpoint
+
+    def get_json(self, dialect: str = "postgres") -> Response:
+        return Response(self.cache.get_json(Base, dialect), media_type="application/json")
+
+    def get_compact(self, dialect: str = "postgres") -> StreamingResponse:
+        return StreamingResponse(self.cache.iter_compact(Base, dialect), media_type="application/x-ndjson")
+
+    def get_schemas(self, request: Request, dialect: str = "postgres") -> Response:
+        index = self.cache.get_index(Base, dialect)
+
+        schemas = list(index.schemas.values())
+        etag = '"' + hashlib.sha1(",".join(schema.fingerprint() for schema in schemas).encode()).hexdigest() + '"'
+
+        return _response(request, etag, lambda: {
+            "dialect": dialect,
+            "schemas": [{"name": schema.schema.name, "tables": len(schema.names)} for schema in schemas]
+        })
+
+    def get_tables(self, request: Request, schema: str, dialect: str = "postgres", prefix: str = "", offset: int = 0, limit: Optional[int] = 100) -> Response:
+        index = self.schema_index(schema, dialect)
+
+        def content():
+            total, tables = index.find_tables(prefix, max(offset, 0), limit)
+
+            return {
+                "total": total,
+                "offset": offset,
+                "tables": [{
+                    "id": table.id,
+                    "name": table.name,
+                    "columns": len(table.columns),
+                    "relations": len(table.relations)
+                } for table in tables]
+            }
+
+        return _response(request, f'"{index.fingerprint()}"', content)
+
+    def get_table(self, request: Request, schema: str, table: str, dialect: str = "postgres") -> Response:
+        index = self.schema_index(schema, dialect)
+        descriptor = index.get_table(table)
+        if descriptor is None:
+            raise HTTPException(status_code=404, detail=f"unknown table '{table}'")
+
+        return _response(request, f'"{index.fingerprint()}"', lambda: dataclasses.asdict(descriptor))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import hashlib
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from cube.interface import DatabaseDescriptor, SchemaDescriptor, TableDescriptor
+
+from .metadata_encoding import encode_compact
+
+class SchemaIndex:
+    """
+    Sorted index of the tables of a schema, used to page through tables by name prefix,
+    together with a fingerprint of the schema content.
+    """
+    __slots__ = [
+        "dialect",
+        "schema",
+        "names",
+        "tables",
+        "_fingerprint"
+    ]
+
+    # constructor
+
+    def __init__(self, dialect: str, schema: SchemaDescriptor):
+        self.dialect = dialect
+        self.schema = schema
+        self.tables: Dict[str, TableDescriptor] = {}
+
+        for table in schema.tables:
+            self.tables[table.name] = table
+            self.tables.setdefault(table.id, table)
+
+        self.names = sorted(table.name for table in schema.tables)
+        self._fingerprint: Optional[str] = None
+
+    # public
+
+    def fingerprint(self) -> str:
+        """
+        return a hash of the content of the schema - including the dialect - which is stable across processes
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1()
+            for line in encode_compact(DatabaseDescriptor(dialect=self.dialect, schemas=[self.schema])):
+                digest.update(line)
+
+            self._fingerprint = digest.hexdigest()
+
+        return self._fingerprint
+
+    def get_table(self, table: str) -> Optional[TableDescriptor]:
+        return self.tables.get(table)
+
+    def find_tables(self, prefix: str = "", offset: int = 0, limit: Optional[int] = None) -> Tuple[int, List[TableDescriptor]]:
+        """
+        return the total number of tables whose name starts with the prefix and the requested page of them, ordered by name
+        """
+        start = bisect_left(self.names, prefix)
+        end = bisect_left(self.names, prefix + "\U0010ffff", lo=start) if prefix else len(self.names)
+
+        first = start + offset
+        last = end if limit is None else min(end, first + limit)
+
+        return end - start, [self.tables[name] for name in self.names[first:last]]
+
+class MetadataIndex:
+    """
+    index of the schemas of a database descriptor
+    """
+    __slots__ = [
+        "database",
+        "schemas"
+    ]
+
+    # constructor
+
+    def __init__(self, database: DatabaseDescriptor):
+        self.database = database
+        self.schemas: Dict[str, SchemaIndex] = {schema.name: SchemaIndex(database.dialect, schema) for schema in database.schemas}
+
+    # public
+
+    def get_schema(self, schema: str) -> Optional[SchemaIndex]:
+        return self.schemas.get(schema)
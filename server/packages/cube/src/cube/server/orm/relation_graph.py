@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Tuple, Iterable
+
+from cube.interface import DatabaseDescriptor, TableDescriptor, RelationDescriptor, JoinDescriptor
+
+# -------------------------
+# Exceptions
+# -------------------------
+
+class RelationGraphException(Exception):
+    """
+    raised if no join path exists between tables
+    """
+
+class UnknownTableException(RelationGraphException):
+    """
+    raised if a table is neither known by id nor by name
+    """
+
+# -------------------------
+# Edges
+# -------------------------
+
+class Edge:
+    """
+    a relation traversed from one table to another
+    """
+    __slots__ = [
+        "source",
+        "target",
+        "relation",
+        "pairs",
+        "relationship"
+    ]
+
+    def __init__(self, source: str, target: str, relation: RelationDescriptor, pairs: List[Tuple[str, str]], relationship: str):
+        self.source = source
+        self.target = target
+        self.relation = relation
+        self.pairs = pairs # source column -> target column
+        self.relationship = relationship
+
+def mapping_id(relation: RelationDescriptor) -> str:
+    """
+    return a stable id of the mapping of a relation, which is shared by both sides
+    """
+    mapping = relation.mapping
+    left = ",".join(left for left, _ in mapping.column_pairs)
+    right = ",".join(right for _, right in mapping.column_pairs)
+
+    return f"{mapping.left_table}({left})->{mapping.right_table}({right})"
+
+def _covers_key(columns: Iterable[str], table: Optional[TableDescriptor]) -> bool:
+    return table is not None and len(table.primary_key) > 0 and set(table.primary_key) <= set(columns)
+
+# -------------------------
+# Relation graph
+# -------------------------
+
+class RelationGraph:
+    """
+    Adjacency index of the relations of a database, used to find join paths between tables.
+
+    Shortest paths are computed by a breadth first search per source table, whose parent tree is memoized,
+    so that subsequent paths from the same source only cost the length of the path.
+    """
+    # constructor
+
+    def __init__(self, database: DatabaseDescriptor, max_trees: int = 256):
+        self.tables: Dict[str, TableDescriptor] = {}
+        self.names: Dict[str, str] = {} # table name -> id
+        self.adjacency: Dict[str, List[Edge]] = {}
+
+        self.max_trees = max_trees
+        self.trees: OrderedDict[str, Dict[str, Edge]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        for schema in database.schemas:
+            for table in schema.tables:
+                self.tables[table.id] = table
+                self.names.setdefault(table.name, table.id)
+                self.adjacency[table.id] = []
+
+        for table in self.tables.values():
+            for relation in table.relations:
+                edge = self.create_edge(relation)
+                if edge is not None:
+                    self.adjacency[table.id].append(edge)
+
+    # internal
+
+    def create_edge(self, relation: RelationDescriptor) -> Optional[Edge]:
+        source = self.resolve(relation.table)
+        target = self.resolve(relation.other_table)
+        if source is None or target is None or source == target:
+            return None
+
+        pairs = list(relation.mapping.column_pairs)
+        if relation.direction == "right":
+            pairs = [(right, left) for left, right in pairs]
+
+        # derive the cardinality from the keys, the orm and the reflector do not agree on the cardinality fields
+
+        if _covers_key((target_column for _, target_column in pairs), self.tables[target]):
+            relationship = "hasOne" if _covers_key((source_column for source_column, _ in pairs), self.tables[source]) else "belongsTo"
+        else:
+            relationship = "hasMany"
+
+        return Edge(source, target, relation, pairs, relationship)
+
+    def tree(self, source: str) -> Dict[str, Edge]:
+        with self.lock:
+            tree = self.trees.get(source)
+            if tree is not None:
+                self.trees.move_to_end(source)
+                return tree
+
+        tree: Dict[str, Edge] = {}
+        queue = deque([source])
+
+        while queue:
+            table = queue.popleft()
+            for edge in self.adjacency[table]:
+                if edge.target != source and edge.target not in tree:
+                    tree[edge.target] = edge
+                    queue.append(edge.target)
+
+        with self.lock:
+            self.trees[source] = tree
+            if len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+
+        return tree
+
+    # public
+
+    def resolve(self, table: str) -> Optional[str]:
+        """
+        return the id of a table given by id or name
+        """
+        if table in self.tables:
+            return table
+
+        return self.names.get(table)
+
+    def require(self, table: str) -> str:
+        id = self.resolve(table)
+        if id is None:
+            raise UnknownTableException(f"unknown table '{table}'")
+
+        return id
+
+    def path(self, source: str, target: str) -> Optional[List[Edge]]:
+        """
+        return the shortest path of edges from the source to the target table, or `None` if there is none
+        """
+        source = self.require(source)
+        target = self.require(target)
+
+        tree = self.tree(source)
+
+        path = []
+        while target != source:
+            edge = tree.get(target)
+            if edge is None:
+                return None
+
+            path.append(edge)
+            target = edge.source
+
+        path.reverse()
+
+        return path
+
+    def join_plan(self, root: str, tables: Iterable[str]) -> List[Edge]:
+        """
+        return the edges - in join order - needed to reach all tables from the root table
+
+        Raises:
+            UnknownTableException: if a table is unknown
+            RelationGraphException: if a table is not reachable
+        """
+        root = self.require(root)
+
+        needed: Dict[str, Edge] = {}
+        depth: Dict[str, int] = {}
+
+        for table in tables:
+            table = self.require(table)
+
+            path = self.path(root, table)
+            if path is None:
+                raise RelationGraphException(f"no join path from table '{root}' to table '{table}'")
+
+            for i, edge in enumerate(path):
+                needed[edge.target] = edge
+                depth[edge.target] = i
+
+        return sorted(needed.values(), key=lambda edge: depth[edge.target])
+
+    def joins(self, root: str, tables: Iterable[str], names: Optional[Dict[str, str]] = None) -> List[JoinDescriptor]:
+        """
+        derive the joins of a cube on the root table that reach all given tables
+
+        Args:
+            root: the root table
+            tables: the tables to reach
+            names: optional cube name by table name, defaults to the table name
+
+        Returns:
+            the join descriptors, in join order
+        """
+        names = names or {}
+
+        def name(id: str) -> str:
+            table = self.tables[id].name
+
+            return names.get(table, table)
+
+        root = self.require(root)
+        joins = []
+
+        for edge in self.join_plan(root, tables):
+            source = "CUBE" if edge.source == root else name(edge.source)
+            target = name(edge.target)
+
+            joins.append(JoinDescriptor(
+                name=target,
+                relationship=edge.relationship,
+                on=" AND ".join(f"${{{source}}}.{source_column} = ${{{target}}}.{target_column}" for source_column, target_column in edge.pairs),
+                relation_mapping_id=mapping_id(edge.relation)
+            ))
+
+        return joins
@@ -134,8 +134,8 @@ def extract_all_entities(base: type[DeclarativeBase], dialect: str = "sqlite") -
     :param dialect: Optional, e.g. 'sqlite', 'postgresql'
     :return: DatabaseDescriptor with all tables and relations
     """
-    # Collect all mapped classes from Base registry
-    mapped_classes = [mapper.class_ for mapper in base.registry.mappers]
+    # Collect all mapped classes from Base registry, ordered by table to keep descriptors and join paths stable
+    mapped_classes = sorted((mapper.class_ for mapper in base.registry.mappers), key=lambda cls: cls.__tablename__)
 
     # Use the ORM extractor to build descriptors
     db_descriptor = extract_database_from_orm(mapped_classes, dialect=dialect)
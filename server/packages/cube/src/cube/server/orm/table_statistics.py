@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import dataclasses
+import logging
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+from weakref import WeakKeyDictionary
+
+from sqlalchemy import Engine, Connection, text
+
+from aspyx.di import injectable, on_destroy
+
+from cube.interface import DatabaseDescriptor, SchemaDescriptor, TableDescriptor, TableStatistics, ColumnStatistics
+
+# -------------------------
+# Estimators
+# -------------------------
+
+def estimate_distinct(values: Iterable[Any], row_count: int) -> float:
+    """
+    estimate the number of distinct non null values of a column from a uniform sample of its values of a table
+    with `row_count` rows, using the Haas-Stokes estimator as postgres does: `n * d / (n - f1 + f1 * n / N)`
+    with `n` sampled values, `d` distinct of them, `f1` seen only once and `N` values in the table.
+
+    If the sample covers all rows the result is exact.
+    """
+    values = list(values)
+    counts = Counter(value for value in values if value is not None)
+
+    n = sum(counts.values())
+    if n == 0:
+        return 0.0
+
+    distinct = len(counts)
+    if len(values) >= row_count:
+        return float(distinct)
+
+    total = row_count * n / len(values) # estimated non null values
+    once = sum(1 for count in counts.values() if count == 1)
+
+    return min(total, max(float(distinct), n * distinct / (n - once + once * n / total)))
+
+def _value(value: Any) -> Any:
+    """
+    make min and max values json friendly
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    return value
+
+def _stride(row_count: int, sample_size: int) -> int:
+    """
+    return the step of a keyed sample with at least `sample_size` rows: the largest prime not above
+    `row_count / sample_size`, which does not align with periodic values as often as round steps do
+    """
+    step = max(1, row_count // sample_size)
+    while step > 2 and any(step % divisor == 0 for divisor in range(2, math.isqrt(step) + 1)):
+        step -= 1
+
+    return step
+
+class _Entry:
+    __slots__ = [
+        "created",
+        "table",
+        "columns"
+    ]
+
+    def __init__(self, table: Optional[TableStatistics], columns: Dict[str, ColumnStatistics]):
+        self.created = time.monotonic()
+        self.table = table
+        self.columns = columns
+
+# -------------------------
+# Collector
+# -------------------------
+
+@injectable()
+class StatisticsCollector:
+    """
+    Computes table and column statistics - row counts, null fractions, min and max of numeric and time columns
+    and estimated distinct counts - to support the choice of dimensions, measures and pre-aggregations.
+
+    Per table, one aggregate query computes counts, nulls and min/max exactly, a second one reads a sample
+    for the distinct estimates. Tables are processed in parallel, bounded by a time budget: tables that are
+    not done in time are left without statistics, but continue in the background and are cached for later calls.
+    Failures are logged and cached as well, so the table is not retried before the ttl expires.
+    """
+    logger = logging.getLogger("cube.statistics")
+
+    # constructor
+
+    def __init__(self):
+        self.sample_size = 10_000
+        self.workers = 8
+        self.budget = 10.0  # seconds
+        self.ttl = 3600.0   # seconds
+
+        self.cache: WeakKeyDictionary[Engine, Dict[str, _Entry]] = WeakKeyDictionary() # by engine, since in-memory databases share the url
+        self.running: Dict[Tuple[int, str], Future] = {} # by engine id, the futures keep the engines alive
+        self.lock = threading.Lock()
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+    # lifecycle
+
+    @on_destroy()
+    def on_destroy(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # public
+
+    def invalidate(self):
+        with self.lock:
+            self.cache.clear()
+
+    def annotate(self, engine: Engine, database: DatabaseDescriptor, tables: Optional[Iterable[str]] = None, budget: Optional[float] = None) -> DatabaseDescriptor:
+        """
+        return a copy of the database descriptor with statistics attached to the tables and their columns
+
+        Args:
+            engine: the engine of the database
+            database: the descriptor, which is not modified
+            tables: optional names or ids of the tables to compute statistics for, default all
+            budget: optional time budget in seconds
+
+        Returns:
+            the annotated copy
+        """
+        selected = set(tables) if tables is not None else None
+
+        wanted = [
+            table for schema in database.schemas for table in schema.tables
+            if selected is None or table.name in selected or table.id in selected
+        ]
+
+        # schedule missing statistics
+
+        futures = [self.schedule(engine, table) for table in wanted]
+
+        wait([future for future in futures if future is not None], timeout=self.budget if budget is None else budget)
+
+        # attach what is available
+
+        entries = {}
+        with self.lock:
+            cached = self.cache.get(engine, {})
+            for table in wanted:
+                entry = cached.get(table.id)
+                if entry is not None:
+                    entries[table.id] = entry
+
+        return DatabaseDescriptor(dialect=database.dialect, schemas=[
+            SchemaDescriptor(name=schema.name, tables=[self.attach(table, entries.get(table.id)) for table in schema.tables])
+            for schema in database.schemas
+        ])
+
+    # internal
+
+    def attach(self, table: TableDescriptor, entry: Optional[_Entry]) -> TableDescriptor:
+        if entry is None or entry.table is None:
+            return table
+
+        return dataclasses.replace(
+            table,
+            statistics=entry.table,
+            columns=[dataclasses.replace(column, statistics=entry.columns.get(column.name)) for column in table.columns]
+        )
+
+    def schedule(self, engine: Engine, table: TableDescriptor) -> Optional[Future]:
+        key = (id(engine), table.id)
+
+        with self.lock:
+            entry = self.cache.get(engine, {}).get(table.id)
+            if entry is not None and time.monotonic() - entry.created < self.ttl:
+                return None
+
+            future = self.running.get(key)
+            if future is None:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="statistics")
+
+                future = self.running[key] = self.executor.submit(self.compute, engine, key, table)
+
+            return future
+
+    def compute(self, engine: Engine, key: Tuple[int, str], table: TableDescriptor):
+        try:
+            try:
+                with engine.connect() as connection:
+                    entry = self.collect(connection, table)
+            except Exception as e:
+                self.logger.warning("statistics of %s failed: %s", table.id, e)
+
+                entry = _Entry(None, {}) # negative
+
+            with self.lock:
+                self.cache.setdefault(engine, {})[table.id] = entry
+        finally:
+            with self.lock:
+                self.running.pop(key, None)
+
+    def source(self, connection: Connection, table: TableDescriptor) -> str:
+        quote = connection.dialect.identifier_preparer.quote
+
+        # orm tables have no schema
+
+        if table.schema and table.schema != connection.dialect.default_schema_name:
+            return f"{quote(table.schema)}.{quote(table.name)}"
+
+        return quote(table.name)
+
+    def collect(self, connection: Connection, table: TableDescriptor) -> _Entry:
+        quote = connection.dialect.identifier_preparer.quote
+        source = self.source(connection, table)
+
+        ranged = [column for column in table.columns if column.semantic_type in ("number", "time")]
+
+        # exact counts, nulls and ranges in one scan
+
+        expressions = ["count(*)"]
+        expressions.extend(f"count({quote(column.name)})" for column in table.columns)
+        for column in ranged:
+            expressions.append(f"min({quote(column.name)})")
+            expressions.append(f"max({quote(column.name)})")
+
+        row = connection.execute(text(f"select {', '.join(expressions)} from {source}")).one()
+
+        row_count = row[0]
+        non_null = dict(zip((column.name for column in table.columns), row[1:1 + len(table.columns)]))
+        ranges = {column.name: (row[1 + len(table.columns) + 2 * i], row[2 + len(table.columns) + 2 * i]) for i, column in enumerate(ranged)}
+
+        # distinct estimates from a sample
+
+        sample = self.sample(connection, table, source, [quote(column.name) for column in table.columns], row_count)
+
+        columns = {}
+        for i, column in enumerate(table.columns):
+            low, high = ranges.get(column.name, (None, None))
+
+            columns[column.name] = ColumnStatistics(
+                null_fraction=(row_count - non_null[column.name]) / row_count if row_count else None,
+                distinct_count=estimate_distinct((values[i] for values in sample), row_count),
+                min=_value(low),
+                max=_value(high)
+            )
+
+        return _Entry(TableStatistics(row_count=row_count, sample_size=len(sample)), columns)
+
+    def sample(self, connection: Connection, table: TableDescriptor, source: str, columns: List[str], row_count: int) -> List[tuple]:
+        if not columns:
+            return []
+
+        select = f"select {', '.join(columns)} from {source}"
+
+        if row_count <= self.sample_size:
+            return connection.execute(text(select)).all()
+
+        if connection.dialect.name == "postgresql":
+            percent = min(100.0, 100.0 * self.sample_size / row_count)
+
+            return connection.execute(text(f"{select} tablesample bernoulli ({percent}) limit {self.sample_size}")).all()
+
+        # spread the sample over the table by a stride over an integer key instead of sorting it
+
+        key = None
+        if len(table.primary_key) == 1 and any(column.name == table.primary_key[0] and column.semantic_type == "number" for column in table.columns):
+            key = connection.dialect.identifier_preparer.quote(table.primary_key[0])
+        elif connection.dialect.name == "sqlite":
+            key = "rowid"
+
+        if key is not None:
+            step = _stride(row_count, self.sample_size)
+
+            return connection.execute(text(f"{select} where {key} % {step} = 0 limit {self.sample_size}")).all()
+
+        # no key to stride over: the first rows
+
+        return connection.execute(text(f"{select} limit {self.sample_size}")).all()
@@ -1,8 +1,14 @@
+from typing import List, Optional
+
+from fastapi import HTTPException
+
+from aspyx_persistence import PersistentUnit
 from aspyx_service import implementation
 
 from ..interface import MetadataService
-from ..interface.orm_descriptors import DatabaseDescriptor
-from .orm.sqlalchemy_orm_extractor import extract_all_entities
+from ..interface.orm_descriptors import DatabaseDescriptor, RelationDescriptor
+from ..interface.cube_descriptors import JoinDescriptor
+from .orm import MetadataCache, DatabaseReflector, StatisticsCollector, RelationGraphException, UnknownTableException
 from .persistence.base import Base
 
 @implementation()
@@ -10,14 +16,48 @@ class MetadataServiceServiceImpl(MetadataService):
     # slots
 
     __slots__ = [
+        "cache",
+        "reflector",
+        "statistics"
     ]
 
     # constructor
 
-    def __init__(self):
-        pass #self.event_manager = event_manager
+    def __init__(self, cache: MetadataCache, reflector: DatabaseReflector, statistics: StatisticsCollector):
+        self.cache = cache
+        self.reflector = reflector
+        self.statistics = statistics
+
+    # internal
+
+    @staticmethod
+    def http_exception(e: RelationGraphException) -> HTTPException:
+        return HTTPException(status_code=404 if isinstance(e, UnknownTableException) else 400, detail=str(e))
 
     # implement MetadataService
 
     def get_metadata(self, dialect: str = "postgres") -> DatabaseDescriptor:
-        return extract_all_entities(Base, dialect = dialect)
\ No newline at end of file
+        return self.cache.get_metadata(Base, dialect)
+
+    def reflect_database(self, schema: Optional[str] = None) -> DatabaseDescriptor:
+        return self.reflector.reflect(PersistentUnit.get_persistent_unit(None).engine, [schema] if schema else None)
+
+    def get_join_path(self, source: str, target: str, dialect: str = "postgres") -> List[RelationDescriptor]:
+        try:
+            path = self.cache.get_graph(Base, dialect).path(source, target)
+        except RelationGraphException as e:
+            raise self.http_exception(e)
+
+        return [edge.relation for edge in path] if path is not None else []
+
+    def get_joins(self, root: str, tables: str, dialect: str = "postgres") -> List[JoinDescriptor]:
+        try:
+            return self.cache.get_graph(Base, dialect).joins(root, [table.strip() for table in tables.split(",") if table.strip()])
+        except RelationGraphException as e:
+            raise self.http_exception(e)
+
+    def get_statistics(self, schema: Optional[str] = None, tables: Optional[str] = None, budget: float = 10.0) -> DatabaseDescriptor:
+        engine = PersistentUnit.get_persistent_unit(None).engine
+        selected = [table.strip() for table in tables.split(",") if table.strip()] if tables else None
+
+        return self.statistics.annotate(engine, self.reflector.reflect(engine, [schema] if schema else None), selected, budget)
@@ -0,0 +1,42 @@
+from .query_compiler import CubeQueryCompiler, CompiledQuery, CompiledBatch, QueryException
+from .query_columnar import ColumnarResult, Column, to_columnar, encode_json, encode_arrow
+from .query_cache import CubeQueryCache, CacheStatistics, canonical_query
+from .query_memory import InMemoryCubeStore, InMemoryCube
+from .query_batch import plan_batch
+from .query_engine import CubeQueryEngine
+
+__all__ = [
+    # query_compiler
+
+    "CubeQueryCompiler",
+    "CompiledQuery",
+    "CompiledBatch",
+    "QueryException",
+
+    # query_columnar
+
+    "ColumnarResult",
+    "Column",
+    "to_columnar",
+    "encode_json",
+    "encode_arrow",
+
+    # query_cache
+
+    "CubeQueryCache",
+    "CacheStatistics",
+    "canonical_query",
+
+    # query_memory
+
+    "InMemoryCubeStore",
+    "InMemoryCube",
+
+    # query_batch
+
+    "plan_batch",
+
+    # query_engine
+
+    "CubeQueryEngine"
+]
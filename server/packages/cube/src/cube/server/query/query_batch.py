@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from cube.interface import CubeQuery
+
+from .query_cache import canonical_query
+from .query_compiler import CubeQueryCompiler, QueryException, date_range_bounds
+
+# -------------------------
+# Batch planning
+# -------------------------
+
+_TO_ONE = {"belongsTo", "hasOne"}
+
+def batch_key(query: CubeQuery, compiler: CubeQueryCompiler) -> Optional[tuple]:
+    """
+    return the key of queries that may share one statement - same root cube, filters, segments and date ranges -
+    or `None` if the query has to be executed on its own
+    """
+    if query.limit is not None or query.offset is not None:
+        return None
+
+    if any(filter.member in compiler.measures for filter in query.filters):
+        return None # having
+
+    if not query.measures and not compiler.group_keys(query):
+        return None
+
+    canonical = canonical_query(query)
+    date_ranges = tuple(sorted((td.dimension, date_range_bounds(td.date_range)) for td in query.time_dimensions if td.date_range is not None))
+
+    return compiler.root(query), canonical[3], canonical[4], date_ranges
+
+def plan_batch(queries: List[CubeQuery], compiler: CubeQueryCompiler) -> List[List[int]]:
+    """
+    partition queries into groups that are compiled into one statement each. Returns lists of query indices.
+
+    Queries are only merged if joining the cubes of all queries does not change the rows any single query sees,
+    i.e. if all joins are to-one or all queries reference the same cubes.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    plan: List[List[int]] = []
+
+    for i, query in enumerate(queries):
+        try:
+            key = batch_key(query, compiler)
+        except QueryException:
+            key = None # the error is reported when the query is executed on its own
+
+        if key is None:
+            plan.append([i])
+        else:
+            groups.setdefault(key, []).append(i)
+
+    for (root, *_), indices in groups.items():
+        referenced = [compiler.referenced_cubes(queries[i]) for i in indices]
+
+        try:
+            joins = compiler.join_plan(root, set().union(*referenced))
+        except QueryException:
+            plan.extend([i] for i in indices)
+            continue
+
+        if all(join.relationship in _TO_ONE for _, join in joins):
+            plan.append(indices)
+            continue
+
+        by_cubes: Dict[frozenset, List[int]] = {}
+        for i, cubes in zip(indices, referenced):
+            by_cubes.setdefault(frozenset(cubes), []).append(i)
+
+        plan.extend(by_cubes.values())
+
+    return sorted(plan, key=lambda group: group[0])
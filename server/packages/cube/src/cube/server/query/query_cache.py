@@ -0,0 +1,417 @@
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple, Any
+
+from aspyx.di import injectable
+
+from cube.interface import CubeQuery, CubeQueryResult, CubeDescriptor, PreAggregationDescriptor
+
+from .query_compiler import QueryException, date_range_bounds, split_member
+
+# -------------------------
+# Canonical queries
+# -------------------------
+
+# operators whose values are combined with or / and and thus may be sorted
+
+_SET_OPERATORS = {"equals", "notEquals", "contains", "notContains", "startsWith", "endsWith"}
+
+_DATE_RANGE_OPERATORS = {"inDateRange", "notInDateRange"}
+
+def _value_key(value: Any) -> Tuple[str, str]:
+    return type(value).__name__, str(value)
+
+def effective_order(query: CubeQuery) -> Tuple[Tuple[str, str], ...]:
+    """
+    return the explicit order of a query or the default order the compiler applies
+    """
+    if query.order:
+        return tuple(query.order.items())
+
+    time_dimension = next((td for td in query.time_dimensions if td.granularity is not None), None)
+    if time_dimension is not None:
+        return ((time_dimension.dimension, "asc"),)
+    if query.measures:
+        return ((query.measures[0], "desc"),)
+    if query.dimensions:
+        return ((query.dimensions[0], "asc"),)
+
+    return ()
+
+def canonical_query(query: CubeQuery) -> tuple:
+    """
+    return a hashable, normalized form of a query. Queries that only differ in the order of their members,
+    filters or filter values, or in the notation of date ranges map to the same key.
+    """
+    def filter_key(filter) -> tuple:
+        if filter.operator in _DATE_RANGE_OPERATORS:
+            values = date_range_bounds(filter.values)
+        elif filter.operator in _SET_OPERATORS:
+            values = tuple(sorted(_value_key(value) for value in filter.values))
+        else:
+            values = tuple(_value_key(value) for value in filter.values)
+
+        return filter.member, filter.operator, values
+
+    def time_dimension_key(time_dimension) -> tuple:
+        date_range = date_range_bounds(time_dimension.date_range) if time_dimension.date_range is not None else ()
+
+        return time_dimension.dimension, time_dimension.granularity or "", date_range
+
+    return (
+        tuple(sorted(query.measures)),
+        tuple(sorted(query.dimensions)),
+        tuple(sorted(time_dimension_key(td) for td in query.time_dimensions)),
+        tuple(sorted(filter_key(filter) for filter in query.filters)),
+        tuple(sorted(query.segments)),
+        effective_order(query),
+        query.limit,
+        query.offset
+    )
+
+def result_columns(query: CubeQuery) -> List[str]:
+    """
+    return the result columns of a query in select order
+    """
+    return [
+        *query.dimensions,
+        *[f"{td.dimension}.{td.granularity}" for td in query.time_dimensions if td.granularity is not None],
+        *query.measures
+    ]
+
+# dialects sorting nulls last in ascending order
+
+NULLS_LAST_DIALECTS = {"postgresql", "oracle"}
+
+def sort_rows(query: CubeQuery, data: List[Dict[str, Any]], nulls_first: bool = True) -> List[Dict[str, Any]]:
+    """
+    sort result rows in place by the effective order of a query.
+
+    Args:
+        query: the query
+        data: the rows
+        nulls_first: if `True` nulls sort first in ascending order as in sqlite, otherwise last as in postgres
+    """
+    time_keys = {td.dimension: f"{td.dimension}.{td.granularity}" for td in reversed(query.time_dimensions) if td.granularity is not None}
+
+    for member, direction in reversed(effective_order(query)):
+        key = member if member in query.measures or member in query.dimensions else time_keys.get(member, member)
+        if data and key not in data[0]:
+            raise QueryException(f"order member '{member}' is not part of the query")
+
+        # nulls compare as the smallest value if they sort first in ascending order
+
+        if nulls_first:
+            data.sort(key=lambda row: (row[key] is not None, row[key]), reverse=direction == "desc")
+        else:
+            data.sort(key=lambda row: (row[key] is None, row[key]), reverse=direction == "desc")
+
+    return data
+
+# -------------------------
+# Refresh keys
+# -------------------------
+
+_INTERVAL = re.compile(r"^(?:every\s+)?(\d+)\s*(second|minute|hour|day|week)s?$", re.IGNORECASE)
+
+_SECONDS = {
+    "second": 1,
+    "minute": 60,
+    "hour": 60 * 60,
+    "day": 24 * 60 * 60,
+    "week": 7 * 24 * 60 * 60,
+}
+
+def parse_interval(refresh_key: str) -> Optional[float]:
+    """
+    parse refresh keys like `every 1 hour` or `30 minutes`. Returns `None` for anything else, e.g. sql refresh keys
+    """
+    match = _INTERVAL.match(refresh_key.strip())
+    if match is None:
+        return None
+
+    return float(match.group(1)) * _SECONDS[match.group(2).lower()]
+
+def refresh_key_for(cube: CubeDescriptor, members: List[str]) -> Optional[str]:
+    """
+    return the refresh key of the pre-aggregation covering the given members of a cube,
+    otherwise the first refresh key declared on the cube
+    """
+    def local(names: List[str]) -> set:
+        return {name.split(".")[-1] for name in names}
+
+    def covers(pre_aggregation: PreAggregationDescriptor) -> bool:
+        return local(members) <= local(pre_aggregation.measures) | local(pre_aggregation.dimensions) | local([pre_aggregation.time_dimension or ""])
+
+    candidates = [pre_aggregation for pre_aggregation in cube.pre_aggregations if pre_aggregation.refresh_key]
+
+    matching = next((pre_aggregation for pre_aggregation in candidates if covers(pre_aggregation)), None)
+    if matching is not None:
+        return matching.refresh_key
+
+    return candidates[0].refresh_key if candidates else None
+
+def query_members(query: CubeQuery) -> Dict[str, List[str]]:
+    """
+    return the members of a query grouped by cube
+    """
+    result: Dict[str, List[str]] = {}
+    for member in [*query.measures, *query.dimensions, *[td.dimension for td in query.time_dimensions], *[f.member for f in query.filters], *query.segments]:
+        cube, name = split_member(member)
+        result.setdefault(cube, []).append(name)
+
+    return result
+
+# -------------------------
+# Statistics
+# -------------------------
+
+class LatencyRecorder:
+    """
+    accumulates count, total and maximum of latencies in seconds
+    """
+    __slots__ = [
+        "count",
+        "total",
+        "max"
+    ]
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+@dataclass
+class CacheStatistics:
+    hits: int
+    misses: int
+    collapsed: int          # requests that waited for an identical query in flight
+    evictions: int
+    expirations: int
+    entries: int
+    rows: int
+
+    hit_latency_ms: float   # average
+    miss_latency_ms: float  # average
+    max_miss_latency_ms: float
+
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses + self.collapsed
+        return (self.hits + self.collapsed) / total if total else 0.0
+
+# -------------------------
+# Cache
+# -------------------------
+
+class _Entry:
+    __slots__ = [
+        "result",
+        "expires",
+        "rows"
+    ]
+
+    def __init__(self, result: CubeQueryResult, expires: float):
+        self.result = result
+        self.expires = expires
+        self.rows = len(result.data)
+
+@injectable()
+class CubeQueryCache:
+    """
+    A size bounded LRU cache for query results.
+
+    - entries expire after a ttl that is passed per lookup
+    - the cache is bounded both by the number of entries and the total number of cached rows
+    - concurrent lookups of the same key are collapsed into a single computation
+    """
+    # constructor
+
+    def __init__(self):
+        self.max_entries = 1000
+        self.max_rows = 1_000_000
+        self.default_ttl = 60.0 # seconds
+        self.cube_ttls: Dict[str, float] = {}
+
+        self.entries: OrderedDict[Any, _Entry] = OrderedDict()
+        self.in_flight: Dict[Any, Future] = {}
+        self.rows = 0
+        self.generation = 0 # incremented by clear
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.collapsed = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.hit_latency = LatencyRecorder()
+        self.miss_latency = LatencyRecorder()
+
+    # public
+
+    def set_cube_ttl(self, cube: str, ttl: float):
+        """
+        set the default ttl for queries on the given cube that is used if no refresh key applies
+        """
+        self.cube_ttls[cube] = ttl
+
+    def get_cube_ttl(self, cube: str) -> float:
+        return self.cube_ttls.get(cube, self.default_ttl)
+
+    def clear(self):
+        """
+        drop all entries. Computations that are in flight are not cached and not shared with later lookups
+        """
+        with self.lock:
+            self.entries.clear()
+            self.in_flight.clear()
+            self.rows = 0
+            self.generation += 1
+
+    def get_statistics(self) -> CacheStatistics:
+        with self.lock:
+            return CacheStatistics(
+                hits=self.hits,
+                misses=self.misses,
+                collapsed=self.collapsed,
+                evictions=self.evictions,
+                expirations=self.expirations,
+                entries=len(self.entries),
+                rows=self.rows,
+                hit_latency_ms=self.hit_latency.average() * 1000,
+                miss_latency_ms=self.miss_latency.average() * 1000,
+                max_miss_latency_ms=self.miss_latency.max * 1000
+            )
+
+    def lookup(self, key: Any) -> Optional[CubeQueryResult]:
+        """
+        return the cached result for the key or `None`. Only hits are counted
+        """
+        start = time.perf_counter()
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            if entry.expires <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+
+                return None
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.hit_latency.record(time.perf_counter() - start)
+
+            return entry.result
+
+    def put(self, key: Any, ttl: float, result: CubeQueryResult):
+        """
+        store a result that was computed outside of `get`. Counts as a miss
+        """
+        with self.lock:
+            self.misses += 1
+            if ttl > 0:
+                self._put(key, _Entry(result, time.monotonic() + ttl))
+
+    def get(self, key: Any, ttl: float, compute: Callable[[], CubeQueryResult]) -> CubeQueryResult:
+        """
+        return the cached result for the key or compute, cache and return it.
+
+        Args:
+            key: the cache key
+            ttl: time to live in seconds of a computed result. `0` disables caching of this result
+            compute: function computing the result
+
+        Returns:
+            the result
+        """
+        start = time.perf_counter()
+
+        with self.lock:
+            generation = self.generation
+
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.expires > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    self.hit_latency.record(time.perf_counter() - start)
+
+                    return entry.result
+
+                self._remove(key)
+                self.expirations += 1
+
+            future = self.in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self.in_flight[key] = future
+                self.misses += 1
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self.lock:
+                if self.in_flight.get(key) is future:
+                    del self.in_flight[key]
+
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            if self.in_flight.get(key) is future:
+                del self.in_flight[key]
+
+            # the result may predate a clear during the computation
+
+            if ttl > 0 and generation == self.generation:
+                self._put(key, _Entry(result, time.monotonic() + ttl))
+
+            self.miss_latency.record(time.perf_counter() - start)
+
+        future.set_result(result)
+
+        return result
+
+    # internal
+
+    def _remove(self, key: Any):
+        entry = self.entries.pop(key)
+        self.rows -= entry.rows
+
+    def _put(self, key: Any, entry: _Entry):
+        if entry.rows > self.max_rows:
+            return
+
+        if key in self.entries:
+            self._remove(key)
+
+        self.entries[key] = entry
+        self.rows += entry.rows
+
+        while len(self.entries) > self.max_entries or self.rows > self.max_rows:
+            oldest = next(iter(self.entries))
+            self._remove(oldest)
+            self.evictions += 1
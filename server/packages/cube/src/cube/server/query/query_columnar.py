@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from operator import itemgetter
+from typing import List, Optional, Sequence, Any
+
+import numpy as np
+
+try:
+    import pyarrow
+except ImportError: # pragma: no cover - optional dependency
+    pyarrow = None
+
+# -------------------------
+# Columnar result
+# -------------------------
+
+# numpy type of the column buffer by column type. Dictionary encoded columns store int32 codes
+
+_DTYPES = {
+    "integer": np.dtype("<i8"),
+    "number": np.dtype("<f8"),
+    "boolean": np.dtype("u1"),
+    "string": np.dtype("<i4"),
+    "time": np.dtype("<i4"),
+}
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+@dataclass
+class Column:
+    name: str
+    type: str                               # integer, number, string, time or boolean
+    values: np.ndarray                      # the values or - for dictionary encoded columns - the codes
+    validity: Optional[np.ndarray] = None   # bool mask of non null entries, None if there are no nulls
+    dictionary: Optional[List[Any]] = None  # distinct values of string and time columns
+
+@dataclass
+class ColumnarResult:
+    row_count: int
+    columns: List[Column]
+
+    def to_rows(self) -> List[dict]:
+        """
+        return the rows as dicts, mainly for tests and debugging
+        """
+        def values(column: Column) -> List[Any]:
+            result = column.values.tolist()
+            if column.dictionary is not None:
+                result = [column.dictionary[code] if code >= 0 else None for code in result]
+            elif column.type == "boolean":
+                result = [bool(value) for value in result]
+
+            if column.validity is not None:
+                result = [value if valid else None for value, valid in zip(result, column.validity.tolist())]
+
+            return result
+
+        names = [column.name for column in self.columns]
+
+        return [dict(zip(names, row)) for row in zip(*[values(column) for column in self.columns])]
+
+# -------------------------
+# Materialization
+# -------------------------
+
+def _dictionary_value(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+
+    return value
+
+def _encode_dictionary(values: Sequence[Any]) -> tuple:
+    index = {None: -1}
+
+    codes = np.fromiter((index.setdefault(value, len(index) - 1) for value in values), dtype=np.int32, count=len(values))
+
+    del index[None]
+
+    return codes, [_dictionary_value(value) for value in index]
+
+def _encode_numbers(values: Sequence[Any], dtype: np.dtype) -> tuple:
+    try:
+        # fast path: no nulls, decimals are converted by numpy
+
+        return np.array(values, dtype=dtype), None
+    except (TypeError, ValueError):
+        array = np.array(values, dtype=object)
+        validity = np.not_equal(array, None)
+
+        result = np.zeros(len(values), dtype=dtype)
+        result[validity] = array[validity].astype(dtype)
+
+        return result, validity
+
+def to_columnar(names: List[str], types: List[str], rows: Sequence[Sequence[Any]]) -> ColumnarResult:
+    """
+    transpose result rows into typed column buffers.
+
+    Numeric columns become numpy arrays, string and time columns are dictionary encoded.
+    """
+    columns = []
+
+    for i, (name, type) in enumerate(zip(names, types)):
+        values = list(map(itemgetter(i), rows))
+
+        if type in ("string", "time"):
+            codes, dictionary = _encode_dictionary(values)
+            validity = codes >= 0
+
+            columns.append(Column(name, type, codes, None if validity.all() else validity, dictionary))
+        else:
+            array, validity = _encode_numbers(values, _DTYPES.get(type, _DTYPES["number"]))
+
+            if type == "number" and validity is None:
+                nan = np.isnan(array)
+                if nan.any():
+                    validity = ~nan
+
+            columns.append(Column(name, type, array, validity))
+
+    return ColumnarResult(row_count=len(rows), columns=columns)
+
+# -------------------------
+# Encoding
+# -------------------------
+
+def _base64(array: np.ndarray) -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+def encode_json(result: ColumnarResult) -> bytes:
+    """
+    encode a result as column major json. Buffers are base64 encoded little endian arrays that can be wrapped by
+    javascript typed arrays, validity masks are bitmaps with the least significant bit first.
+    """
+    def column(column: Column) -> dict:
+        dtype = _DTYPES.get(column.type, _DTYPES["number"])
+
+        json_column = {
+            "name": column.name,
+            "type": column.type,
+            "dtype": dtype.name,
+            "data": _base64(column.values.astype(dtype, copy=False))
+        }
+
+        if column.dictionary is not None:
+            json_column["dictionary"] = column.dictionary
+        if column.validity is not None:
+            json_column["validity"] = _base64(np.packbits(column.validity, bitorder="little"))
+
+        return json_column
+
+    return json.dumps({
+        "format": "columnar",
+        "rowCount": result.row_count,
+        "columns": [column(c) for c in result.columns]
+    }, default=str).encode()
+
+def arrow_available() -> bool:
+    return pyarrow is not None
+
+def encode_arrow(result: ColumnarResult) -> bytes:
+    """
+    encode a result as an arrow ipc stream. Requires `pyarrow`.
+    """
+    if pyarrow is None:
+        raise RuntimeError("arrow encoding requires pyarrow")
+
+    def array(column: Column):
+        mask = ~column.validity if column.validity is not None else None
+
+        if column.dictionary is not None:
+            return pyarrow.DictionaryArray.from_arrays(
+                pyarrow.array(column.values, mask=mask),
+                pyarrow.array([str(value) for value in column.dictionary], type=pyarrow.string())
+            )
+
+        if column.type == "boolean":
+            return pyarrow.array(column.values.astype(bool), mask=mask)
+
+        return pyarrow.array(column.values, mask=mask)
+
+    table = pyarrow.table({column.name: array(column) for column in result.columns})
+
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,633 @@
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Any, Iterable
+
+from sqlalchemy import Select, select, table, text, literal, literal_column, bindparam, func, case, cast, distinct, and_, or_, null, tuple_, union_all, Integer
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql import ColumnElement, FromClause
+
+from cube.interface import CubeDescriptor, MeasureDescriptor, DimensionDescriptor, JoinDescriptor, CubeQuery, QueryFilter
+
+# -------------------------
+# Exceptions
+# -------------------------
+
+class QueryException(Exception):
+    """
+    raised if a query can not be compiled against the known cubes
+    """
+
+# -------------------------
+# Compiled query
+# -------------------------
+
+@dataclass
+class CompiledQuery:
+    statement: Select
+    columns: List[str]              # result keys in select order
+    parameters: Dict[str, Any]      # bind parameter values of this query
+    types: List[str] = field(default_factory=list) # column types: integer, number, string, time or boolean
+
+@dataclass
+class CompiledBatch:
+    statement: Any                  # a select or a union of selects
+    keys: List[str]                 # group keys - dimensions and time dimension buckets - in select order, after the set column `g`
+    measures: List[str]             # measures in select order, after the keys
+    sets: List[Tuple[str, ...]]     # the grouping sets
+    set_ids: Dict[int, int]         # value of column `g` -> index of the grouping set
+    parameters: Dict[str, Any]
+
+# -------------------------
+# Helpers
+# -------------------------
+
+_IDENTIFIER = re.compile(r"^\w+$")
+_PLACEHOLDER = re.compile(r"\$\{(\w+)}")
+
+_SQLITE_FORMATS = {
+    "second": "%Y-%m-%d %H:%M:%S",
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d",
+    "month": "%Y-%m-01",
+    "year": "%Y-01-01",
+}
+
+# operators whose values are bound as a single expanding IN parameter
+
+_LIST_OPERATORS = {"equals", "notEquals"}
+
+# operators that do not take any value
+
+_UNARY_OPERATORS = {"set", "notSet"}
+
+def _end_exclusive(value: str) -> str:
+    """
+    turn an inclusive upper date bound into an exclusive one. A plain date covers the whole day.
+    """
+    if len(value) == 10:
+        return (date.fromisoformat(value) + timedelta(days=1)).isoformat()
+
+    return (datetime.fromisoformat(value) + timedelta(microseconds=1)).isoformat(sep=" ")
+
+def date_range_bounds(values: List[Any]) -> Tuple[str, str]:
+    """
+    return the inclusive lower and exclusive upper bound of a date range
+    """
+    if len(values) != 2:
+        raise QueryException(f"a date range requires two values, got {values}")
+
+    return str(values[0]), _end_exclusive(str(values[1]))
+
+def split_member(member: str) -> Tuple[str, str]:
+    """
+    split `<cube>.<member>[.<granularity>]` into cube and member name
+    """
+    parts = member.split(".")
+    if len(parts) < 2:
+        raise QueryException(f"member '{member}' must be of the form <cube>.<member>")
+
+    return parts[0], parts[1]
+
+# -------------------------
+# Compiler
+# -------------------------
+
+class CubeQueryCompiler:
+    """
+    Compiles cube queries against a set of cube descriptors into a single sqlalchemy `Select`.
+    Cubes referenced by the query are joined to the root cube - the cube of the first measure or dimension -
+    by following the declared joins.
+
+    Compiled statements are cached by the shape of the query. Filter values and date ranges are bound
+    as parameters, so queries that only differ in their values share one statement.
+    """
+
+    # constructor
+
+    def __init__(self, cubes: Iterable[CubeDescriptor], dialect: Dialect, cache_size: int = 256):
+        self.cubes: Dict[str, CubeDescriptor] = {cube.name: cube for cube in cubes}
+        self.dialect = dialect
+        self.preparer = dialect.identifier_preparer
+
+        self.cache_size = cache_size
+        self.cache: OrderedDict[tuple, Tuple[Select, List[str], List[str]]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.measures: Dict[str, Tuple[CubeDescriptor, MeasureDescriptor]] = {}
+        self.dimensions: Dict[str, Tuple[CubeDescriptor, DimensionDescriptor]] = {}
+
+        for cube in self.cubes.values():
+            for measure in cube.measures:
+                self.measures[f"{cube.name}.{measure.name}"] = (cube, measure)
+            for dimension in cube.dimensions:
+                self.dimensions[f"{cube.name}.{dimension.name}"] = (cube, dimension)
+
+    # public
+
+    def compile(self, query: CubeQuery) -> CompiledQuery:
+        key = self.shape(query)
+
+        with self.lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+
+        if entry is None:
+            entry = self.build(query)
+
+            with self.lock:
+                self.cache[key] = entry
+                if len(self.cache) > self.cache_size:
+                    self.cache.popitem(last=False)
+
+        statement, columns, types = entry
+
+        return CompiledQuery(statement=statement, columns=columns, parameters=self.parameters(query), types=types)
+
+    def shape(self, query: CubeQuery) -> tuple:
+        """
+        return a hashable key that identifies all queries sharing the same statement
+        """
+        return (
+            tuple(query.measures),
+            tuple(query.dimensions),
+            tuple((td.dimension, td.granularity, td.date_range is not None) for td in query.time_dimensions),
+            tuple((f.member, f.operator, 0 if f.operator in _LIST_OPERATORS else len(f.values)) for f in query.filters),
+            tuple(query.segments),
+            tuple(query.order.items()),
+            query.limit,
+            query.offset
+        )
+
+    def parameters(self, query: CubeQuery) -> Dict[str, Any]:
+        """
+        return the bind parameter values of a query. Names match the ones created by `build`
+        """
+        parameters = {}
+
+        for i, time_dimension in enumerate(query.time_dimensions):
+            if time_dimension.date_range is not None:
+                parameters[f"t{i}_from"], parameters[f"t{i}_to"] = date_range_bounds(time_dimension.date_range)
+
+        for i, filter in enumerate(query.filters):
+            name = f"f{i}"
+            operator = filter.operator
+
+            if operator in _LIST_OPERATORS:
+                parameters[name] = list(filter.values)
+            elif operator in ("inDateRange", "notInDateRange"):
+                parameters[f"{name}_from"], parameters[f"{name}_to"] = date_range_bounds(filter.values)
+            elif operator in ("contains", "notContains"):
+                for j, value in enumerate(filter.values):
+                    parameters[f"{name}_{j}"] = f"%{value}%"
+            elif operator == "startsWith":
+                for j, value in enumerate(filter.values):
+                    parameters[f"{name}_{j}"] = f"{value}%"
+            elif operator == "endsWith":
+                for j, value in enumerate(filter.values):
+                    parameters[f"{name}_{j}"] = f"%{value}"
+            elif operator not in _UNARY_OPERATORS:
+                for j, value in enumerate(filter.values):
+                    parameters[f"{name}_{j}"] = value
+
+        return parameters
+
+    # internal
+
+    def quote(self, name: str) -> str:
+        return self.preparer.quote(name)
+
+    def get_cube(self, name: str) -> CubeDescriptor:
+        cube = self.cubes.get(name)
+        if cube is None:
+            raise QueryException(f"unknown cube '{name}'")
+
+        return cube
+
+    def substitute(self, cube: CubeDescriptor, sql: str) -> str:
+        """
+        replace `${CUBE}` and `${<cube>}` references with the quoted cube aliases
+        """
+        def replace(match: re.Match) -> str:
+            name = match.group(1)
+            return self.quote(cube.name if name == "CUBE" else self.get_cube(name).name)
+
+        return _PLACEHOLDER.sub(replace, sql)
+
+    def sql(self, cube: CubeDescriptor, sql: str) -> ColumnElement:
+        if _IDENTIFIER.match(sql):
+            return literal_column(f"{self.quote(cube.name)}.{self.quote(sql)}")
+
+        return literal_column(f"({self.substitute(cube, sql)})")
+
+    def references(self, member: str) -> set:
+        """
+        return the cubes a member depends on: its own cube plus all cubes referenced in its sql
+        """
+        cube_name, name = split_member(member)
+        cube = self.get_cube(cube_name)
+
+        sql = ""
+        if member in self.measures:
+            measure = self.measures[member][1]
+            sql = measure.expression or measure.column or ""
+        elif member in self.dimensions:
+            sql = self.dimensions[member][1].column
+        else:
+            segment = next((segment for segment in cube.segments if segment.name == name), None)
+            if segment is not None:
+                sql = segment.expression
+
+        return {cube_name, *[reference for reference in _PLACEHOLDER.findall(sql) if reference != "CUBE"]}
+
+    def source(self, cube: CubeDescriptor) -> FromClause:
+        if cube.sql:
+            return text(cube.sql).columns().subquery(cube.name)
+
+        if not cube.table:
+            raise QueryException(f"cube '{cube.name}' has neither a table nor sql")
+
+        schema, _, name = cube.table.rpartition(".")
+
+        return table(name, schema=schema or None).alias(cube.name)
+
+    def measure_input(self, member: str) -> Tuple[MeasureDescriptor, Optional[ColumnElement]]:
+        """
+        return the measure and the row level expression it aggregates, `None` for a plain `count(*)`
+        """
+        entry = self.measures.get(member)
+        if entry is None:
+            raise QueryException(f"unknown measure '{member}'")
+
+        cube, measure = entry
+
+        sql = measure.expression or measure.column
+        expression = self.sql(cube, sql) if sql else None
+
+        if measure.filters:
+            condition = and_(*[self.sql(cube, column) == literal(value) for column, value in measure.filters.items()])
+            expression = case((condition, expression if expression is not None else literal(1)))
+
+        return measure, expression
+
+    def measure(self, member: str) -> ColumnElement:
+        measure, expression = self.measure_input(member)
+
+        if measure.type == "count":
+            return func.count(expression) if expression is not None else func.count()
+
+        if expression is None:
+            raise QueryException(f"measure '{member}' of type {measure.type} requires a column or expression")
+
+        if measure.type == "countDistinct":
+            return func.count(distinct(expression))
+
+        return getattr(func, measure.type)(expression)
+
+    def dimension(self, member: str) -> ColumnElement:
+        entry = self.dimensions.get(member)
+        if entry is None:
+            raise QueryException(f"unknown dimension '{member}'")
+
+        cube, dimension = entry
+
+        return self.sql(cube, dimension.column)
+
+    def truncate(self, expression: ColumnElement, granularity: str) -> ColumnElement:
+        if self.dialect.name == "sqlite":
+            if granularity == "week":
+                return func.date(expression, "-6 days", "weekday 1")
+
+            if granularity == "quarter":
+                month = cast(func.strftime("%m", expression), Integer)
+                return func.strftime("%Y-", expression).concat(func.printf("%02d", ((month - 1) // 3) * 3 + 1)).concat("-01")
+
+            return func.strftime(_SQLITE_FORMATS[granularity], expression)
+
+        # rendered inline, so that select and group by share an identical expression
+
+        return func.date_trunc(literal_column(f"'{granularity}'"), expression)
+
+    def filter(self, expression: ColumnElement, filter: QueryFilter, name: str) -> ColumnElement:
+        operator = filter.operator
+        values = [bindparam(f"{name}_{j}") for j in range(len(filter.values))]
+
+        if operator == "equals":
+            return expression.in_(bindparam(name, expanding=True))
+        if operator == "notEquals":
+            return or_(expression.not_in(bindparam(name, expanding=True)), expression.is_(None))
+        if operator in ("contains", "startsWith", "endsWith"):
+            return or_(*[expression.ilike(value) for value in values])
+        if operator == "notContains":
+            return or_(and_(*[~expression.ilike(value) for value in values]), expression.is_(None))
+        if operator == "set":
+            return expression.is_not(None)
+        if operator == "notSet":
+            return expression.is_(None)
+        if operator == "inDateRange":
+            return and_(expression >= bindparam(f"{name}_from"), expression < bindparam(f"{name}_to"))
+        if operator == "notInDateRange":
+            return or_(expression < bindparam(f"{name}_from"), expression >= bindparam(f"{name}_to"))
+
+        if not values:
+            raise QueryException(f"operator {operator} on '{filter.member}' requires a value")
+
+        if operator in ("gt", "afterDate"):
+            return expression > values[0]
+        if operator == "gte":
+            return expression >= values[0]
+        if operator in ("lt", "beforeDate"):
+            return expression < values[0]
+        if operator == "lte":
+            return expression <= values[0]
+
+        raise QueryException(f"unsupported operator {operator}")
+
+    def join_plan(self, root: str, required: Iterable[str]) -> List[Tuple[CubeDescriptor, JoinDescriptor]]:
+        """
+        return the joins - in join order - needed to reach all required cubes from the root cube
+        """
+        parents: Dict[str, Tuple[str, JoinDescriptor]] = {}
+        order = [root]
+        queue = deque([root])
+
+        while queue:
+            name = queue.popleft()
+            for join in self.get_cube(name).joins:
+                if join.name in self.cubes and join.name != root and join.name not in parents:
+                    parents[join.name] = (name, join)
+                    order.append(join.name)
+                    queue.append(join.name)
+
+        needed = set()
+        for name in required:
+            while name != root:
+                if name not in parents:
+                    raise QueryException(f"no join path from cube '{root}' to cube '{name}'")
+
+                needed.add(name)
+                name = parents[name][0]
+
+        return [(self.cubes[parents[name][0]], parents[name][1]) for name in order if name in needed]
+
+    def joined_source(self, root: str, plan: List[Tuple[CubeDescriptor, JoinDescriptor]]) -> FromClause:
+        """
+        return the root cube outer joined with the cubes of a join plan
+        """
+        source = self.source(self.get_cube(root))
+        for cube, join in plan:
+            source = source.join(self.source(self.cubes[join.name]), text(self.substitute(cube, join.on)), isouter=True)
+
+        return source
+
+    def root(self, query: CubeQuery) -> str:
+        """
+        return the cube a query starts from, which is the cube of its first member
+        """
+        members = [*query.measures, *query.dimensions, *[td.dimension for td in query.time_dimensions]]
+        if not members:
+            raise QueryException("a query requires at least one measure or dimension")
+
+        return split_member(members[0])[0]
+
+    def referenced_cubes(self, query: CubeQuery) -> set:
+        members = [*query.measures, *query.dimensions, *[td.dimension for td in query.time_dimensions], *[f.member for f in query.filters], *query.segments]
+
+        referenced = set()
+        for member in members:
+            referenced.update(self.references(member))
+
+        return referenced
+
+    def conditions(self, query: CubeQuery) -> Tuple[List[ColumnElement], List[ColumnElement]]:
+        """
+        return the where and having conditions of a query
+        """
+        where = []
+        having = []
+
+        for i, time_dimension in enumerate(query.time_dimensions):
+            if time_dimension.date_range is not None:
+                expression = self.dimension(time_dimension.dimension)
+                where.append(and_(expression >= bindparam(f"t{i}_from"), expression < bindparam(f"t{i}_to")))
+
+        for i, filter in enumerate(query.filters):
+            if filter.member in self.measures:
+                having.append(self.filter(self.measure(filter.member), filter, f"f{i}"))
+            else:
+                where.append(self.filter(self.dimension(filter.member), filter, f"f{i}"))
+
+        for member in query.segments:
+            cube_name, segment_name = split_member(member)
+            cube = self.get_cube(cube_name)
+            segment = next((segment for segment in cube.segments if segment.name == segment_name), None)
+            if segment is None:
+                raise QueryException(f"unknown segment '{member}'")
+
+            where.append(self.sql(cube, segment.expression))
+
+        return where, having
+
+    def build(self, query: CubeQuery) -> Tuple[Select, List[str], List[str]]:
+        root = self.root(query)
+        referenced = self.referenced_cubes(query)
+
+        # from
+
+        source = self.joined_source(root, self.join_plan(root, referenced))
+
+        # columns
+
+        columns: List[str] = []
+        types: List[str] = []
+        labels: Dict[str, ColumnElement] = {}
+        selected = []
+        group_by = []
+
+        for i, member in enumerate(query.dimensions):
+            expression = self.dimension(member)
+            label = expression.label(f"d{i}")
+
+            selected.append(label)
+            group_by.append(expression)
+            columns.append(member)
+            types.append(self.dimensions[member][1].type)
+            labels[member] = label
+
+        for i, time_dimension in enumerate(query.time_dimensions):
+            if time_dimension.granularity is None:
+                continue
+
+            expression = self.truncate(self.dimension(time_dimension.dimension), time_dimension.granularity)
+            label = expression.label(f"t{i}")
+            key = f"{time_dimension.dimension}.{time_dimension.granularity}"
+
+            selected.append(label)
+            group_by.append(expression)
+            columns.append(key)
+            types.append("time")
+            labels[key] = label
+            labels.setdefault(time_dimension.dimension, label)
+
+        for i, member in enumerate(query.measures):
+            label = self.measure(member).label(f"m{i}")
+
+            selected.append(label)
+            columns.append(member)
+            types.append("integer" if self.measures[member][1].type in ("count", "countDistinct") else "number")
+            labels[member] = label
+
+        statement = select(*selected).select_from(source)
+
+        # where & having
+
+        where, having = self.conditions(query)
+
+        if where:
+            statement = statement.where(*where)
+        if group_by and query.measures:
+            statement = statement.group_by(*group_by)
+        elif group_by:
+            statement = statement.distinct()
+        if having:
+            statement = statement.having(*having)
+
+        # order
+
+        order_by = []
+        for member, direction in query.order.items():
+            label = labels.get(member)
+            if label is None:
+                raise QueryException(f"order member '{member}' is not part of the query")
+
+            order_by.append(label.desc() if direction == "desc" else label.asc())
+
+        if not order_by:
+            order_by = self.default_order(query, labels)
+
+        statement = statement.order_by(*order_by)
+
+        # limit
+
+        if query.limit is not None:
+            statement = statement.limit(query.limit)
+        if query.offset is not None:
+            statement = statement.offset(query.offset)
+
+        return statement, columns, types
+
+    def group_keys(self, query: CubeQuery) -> List[Tuple[str, ColumnElement]]:
+        """
+        return the result keys and expressions a query groups by
+        """
+        keys = [(member, self.dimension(member)) for member in query.dimensions]
+
+        for time_dimension in query.time_dimensions:
+            if time_dimension.granularity is not None:
+                keys.append((f"{time_dimension.dimension}.{time_dimension.granularity}", self.truncate(self.dimension(time_dimension.dimension), time_dimension.granularity)))
+
+        return keys
+
+    def build_batch(self, queries: List[CubeQuery], grouping_sets: bool) -> CompiledBatch:
+        """
+        compile queries that share the root cube, filters, segments and date ranges into a single statement,
+        either using `GROUPING SETS` or - if the dialect lacks them - a `UNION ALL` of one group by per set.
+        The where clause and the parameters are taken from the first query.
+        """
+        first = queries[0]
+        root = self.root(first)
+
+        referenced = set()
+        for query in queries:
+            referenced.update(self.referenced_cubes(query))
+
+        source = self.joined_source(root, self.join_plan(root, referenced))
+        where, having = self.conditions(first)
+        if having:
+            raise QueryException("queries with measure filters can not be batched")
+
+        # collect keys, measures and sets
+
+        expressions: Dict[str, ColumnElement] = {}
+        sets: List[Tuple[str, ...]] = []
+        set_measures: List[set] = []
+
+        for query in queries:
+            keys = self.group_keys(query)
+            for key, expression in keys:
+                expressions.setdefault(key, expression)
+
+            key_set = tuple(sorted(key for key, _ in keys))
+            if key_set not in sets:
+                sets.append(key_set)
+                set_measures.append(set())
+
+            set_measures[sets.index(key_set)].update(query.measures)
+
+        keys = list(expressions.keys())
+        measures = list(dict.fromkeys(measure for query in queries for measure in query.measures))
+
+        def labeled_measures(needed: Optional[set] = None) -> List[ColumnElement]:
+            return [(self.measure(measure) if needed is None or measure in needed else null()).label(f"m{i}") for i, measure in enumerate(measures)]
+
+        if grouping_sets:
+            # grouping(k0, ..., kn) has bit n-i set if key i is not part of the set of a row
+
+            selected = [func.grouping(*expressions.values()).label("g") if keys else literal(0).label("g")]
+            selected += [expression.label(f"k{i}") for i, expression in enumerate(expressions.values())]
+            selected += labeled_measures()
+
+            statement = select(*selected).select_from(source)
+            if where:
+                statement = statement.where(*where)
+
+            if keys:
+                statement = statement.group_by(func.grouping_sets(*[tuple_(*[expressions[key] for key in key_set]) for key_set in sets]))
+
+            set_ids = {
+                sum(1 << (len(keys) - 1 - i) for i, key in enumerate(keys) if key not in key_set): index
+                for index, key_set in enumerate(sets)
+            }
+        else:
+            selects = []
+            for index, key_set in enumerate(sets):
+                selected = [literal(index).label("g")]
+                selected += [(expression if key in key_set else null()).label(f"k{i}") for i, (key, expression) in enumerate(expressions.items())]
+                selected += labeled_measures(set_measures[index])
+
+                branch = select(*selected).select_from(source)
+                if where:
+                    branch = branch.where(*where)
+
+                group_by = [expressions[key] for key in key_set]
+                if group_by and set_measures[index]:
+                    branch = branch.group_by(*group_by)
+                elif group_by:
+                    branch = branch.distinct()
+
+                selects.append(branch)
+
+            statement = union_all(*selects) if len(selects) > 1 else selects[0]
+            set_ids = {index: index for index in range(len(sets))}
+
+        return CompiledBatch(statement=statement, keys=keys, measures=measures, sets=sets, set_ids=set_ids, parameters=self.parameters(first))
+
+    def default_order(self, query: CubeQuery, labels: Dict[str, ColumnElement]) -> List[ColumnElement]:
+        """
+        order by the first time dimension, otherwise by the first measure descending, otherwise by the first dimension
+        """
+        time_dimension = next((td for td in query.time_dimensions if td.granularity is not None), None)
+        if time_dimension is not None:
+            return [labels[time_dimension.dimension].asc()]
+        if query.measures:
+            return [labels[query.measures[0]].desc()]
+        if query.dimensions:
+            return [labels[query.dimensions[0]].asc()]
+
+        return []
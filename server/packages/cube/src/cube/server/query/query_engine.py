@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Iterator, Sequence, Tuple, Any
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from aspyx.di import injectable
+from aspyx_persistence import get_current_session
+
+from cube.interface import CubeDescriptor, CubeQuery, CubeQueryResult
+
+from ..persistence import CubeRepository
+from .query_columnar import ColumnarResult, to_columnar
+from .query_cache import CubeQueryCache, NULLS_LAST_DIALECTS, canonical_query, result_columns, sort_rows, query_members, refresh_key_for, parse_interval
+from .query_batch import plan_batch
+from .query_compiler import CubeQueryCompiler, CompiledQuery
+from .query_memory import InMemoryCubeStore
+
+def _json_default(value: Any):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+
+    raise TypeError(f"{type(value).__name__} is not json serializable")
+
+@injectable()
+class CubeQueryEngine:
+    """
+    Executes cube queries against the stored cube descriptors.
+    The cube catalog is loaded lazily from the repository and dropped whenever a cube changes.
+
+    Results of `execute` are cached. Interval refresh keys ( e.g. `every 10 minutes` ) of the pre-aggregations
+    determine the ttl, sql refresh keys are evaluated and become part of the cache key.
+    Queries on cubes registered in the `InMemoryCubeStore` are answered from memory where possible.
+    """
+    # constructor
+
+    def __init__(self, repository: CubeRepository, cache: CubeQueryCache, memory: InMemoryCubeStore):
+        self.repository = repository
+        self.cache = cache
+        self.memory = memory
+        self.cubes: Optional[List[CubeDescriptor]] = None
+        self.compilers: Dict[str, CubeQueryCompiler] = {}
+        self.chunk_size = 1000
+        self.refresh_key_ttl = 10.0 # seconds a sql refresh key value is reused
+        self.grouping_sets_dialects = {"postgresql"} # other dialects merge batches with union all
+        self.refresh_key_values: Dict[str, Tuple[float, Any]] = {}
+        self.lock = threading.RLock()
+
+    # catalog
+
+    def set_cubes(self, cubes: List[CubeDescriptor]):
+        with self.lock:
+            self.cubes = cubes
+            self.compilers = {}
+
+    def invalidate(self):
+        with self.lock:
+            self.cubes = None
+            self.compilers = {}
+            self.refresh_key_values = {}
+
+        self.cache.clear()
+        self.memory.invalidate()
+
+    def get_cubes(self) -> List[CubeDescriptor]:
+        with self.lock:
+            if self.cubes is None:
+                self.cubes = [CubeDescriptor(**json.loads(entity.configuration)) for entity in self.repository.find_all()]
+
+            return self.cubes
+
+    def get_compiler(self, session: Session) -> CubeQueryCompiler:
+        dialect = session.get_bind().dialect
+
+        with self.lock:
+            compiler = self.compilers.get(dialect.name)
+            if compiler is None:
+                compiler = CubeQueryCompiler(self.get_cubes(), dialect)
+                self.compilers[dialect.name] = compiler
+
+            return compiler
+
+    # refresh keys
+
+    def evaluate_refresh_key(self, sql: str, session: Session) -> Any:
+        now = time.monotonic()
+
+        with self.lock:
+            cached = self.refresh_key_values.get(sql)
+            if cached is not None and cached[0] > now:
+                return cached[1]
+
+        value = session.execute(text(sql)).scalar()
+
+        with self.lock:
+            self.refresh_key_values[sql] = (now + self.refresh_key_ttl, value)
+
+        return value
+
+    def cache_policy(self, query: CubeQuery, session: Session) -> Tuple[float, tuple]:
+        """
+        return the ttl and the values of sql refresh keys for the cubes referenced by a query
+        """
+        cubes = {cube.name: cube for cube in self.get_cubes()}
+
+        ttl = None
+        values = []
+        for name, members in sorted(query_members(query).items()):
+            cube = cubes.get(name)
+            cube_ttl = self.cache.get_cube_ttl(name)
+
+            refresh_key = refresh_key_for(cube, members) if cube is not None else None
+            if refresh_key is not None:
+                interval = parse_interval(refresh_key)
+                if interval is not None:
+                    cube_ttl = interval
+                else:
+                    values.append((name, str(self.evaluate_refresh_key(refresh_key, session))))
+
+            ttl = cube_ttl if ttl is None else min(ttl, cube_ttl)
+
+        return (ttl if ttl is not None else self.cache.default_ttl), tuple(values)
+
+    # public
+
+    def compile(self, query: CubeQuery, session: Optional[Session] = None) -> CompiledQuery:
+        return self.get_compiler(session or get_current_session()).compile(query)
+
+    def partitions(self, query: CubeQuery, session: Optional[Session] = None, compiled: Optional[CompiledQuery] = None) -> Iterator[Sequence[Sequence[Any]]]:
+        """
+        execute a query and yield the raw result rows in chunks, fetched from a server side cursor where the driver supports it.
+        """
+        session = session or get_current_session()
+        compiled = compiled or self.compile(query, session)
+
+        result = session.execute(compiled.statement, compiled.parameters, execution_options={"yield_per": self.chunk_size})
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def stream(self, query: CubeQuery, session: Optional[Session] = None, compiled: Optional[CompiledQuery] = None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        execute a query and yield the result rows as dicts in chunks
+        """
+        session = session or get_current_session()
+        compiled = compiled or self.compile(query, session)
+        columns = compiled.columns
+
+        for partition in self.partitions(query, session, compiled):
+            yield [dict(zip(columns, row)) for row in partition]
+
+    def stream_json(self, query: CubeQuery, session: Session, compiled: Optional[CompiledQuery] = None) -> Iterator[bytes]:
+        """
+        yield the result as newline delimited json, one line per row
+        """
+        for chunk in self.stream(query, session, compiled):
+            yield "".join(json.dumps(row, default=_json_default) + "\n" for row in chunk).encode()
+
+    def cache_key(self, query: CubeQuery, session: Session) -> Tuple[tuple, float]:
+        """
+        return the cache key and the ttl of a query
+        """
+        ttl, refresh_values = self.cache_policy(query, session)
+
+        return (session.get_bind().dialect.name, canonical_query(query), refresh_values), ttl
+
+    def execute(self, query: CubeQuery, session: Optional[Session] = None) -> CubeQueryResult:
+        session = session or get_current_session()
+        key, ttl = self.cache_key(query, session)
+
+        def compute() -> CubeQueryResult:
+            result = self.memory.execute(query, self.get_compiler(session), session)
+            if result is not None:
+                return result
+
+            compiled = self.compile(query, session)
+
+            data = []
+            for chunk in self.stream(query, session, compiled):
+                data.extend(chunk)
+
+            return CubeQueryResult(columns=compiled.columns, data=data)
+
+        result = self.cache.get(key, ttl, compute)
+
+        # equivalent queries may list their members in a different order
+
+        return CubeQueryResult.model_construct(columns=result_columns(query), data=result.data)
+
+    def execute_columnar(self, query: CubeQuery, session: Optional[Session] = None, compiled: Optional[CompiledQuery] = None) -> ColumnarResult:
+        """
+        execute a query and return the result as typed column buffers instead of row dicts
+        """
+        session = session or get_current_session()
+        compiled = compiled or self.compile(query, session)
+
+        rows = []
+        for partition in self.partitions(query, session, compiled):
+            rows.extend(partition)
+
+        return to_columnar(compiled.columns, compiled.types, rows)
+
+    def execute_batch(self, queries: List[CubeQuery], session: Optional[Session] = None) -> List[CubeQueryResult]:
+        """
+        execute the queries of a dashboard. Identical queries are executed once, compatible queries on the same cube
+        share one statement.
+        """
+        session = session or get_current_session()
+        compiler = self.get_compiler(session)
+
+        # deduplicate
+
+        indices: Dict[tuple, int] = {}
+        unique: List[CubeQuery] = []
+        positions = []
+        for query in queries:
+            position = indices.setdefault(canonical_query(query), len(unique))
+            if position == len(unique):
+                unique.append(query)
+
+            positions.append(position)
+
+        # cache & memory
+
+        results: List[Optional[CubeQueryResult]] = [None] * len(unique)
+        keys = [self.cache_key(query, session) for query in unique]
+        pending = []
+
+        for i, (query, (key, ttl)) in enumerate(zip(unique, keys)):
+            results[i] = self.cache.lookup(key)
+            if results[i] is None:
+                results[i] = self.memory.execute(query, compiler, session)
+                if results[i] is not None:
+                    self.cache.put(key, ttl, results[i])
+                else:
+                    pending.append(i)
+
+        # merge the rest
+
+        for group in plan_batch([unique[i] for i in pending], compiler):
+            group = [pending[i] for i in group]
+
+            if len(group) == 1:
+                results[group[0]] = self.execute(unique[group[0]], session)
+                continue
+
+            for i, result in zip(group, self.execute_merged([unique[i] for i in group], session)):
+                key, ttl = keys[i]
+                self.cache.put(key, ttl, result)
+                results[i] = result
+
+        return [CubeQueryResult.model_construct(columns=result_columns(query), data=results[position].data) for query, position in zip(queries, positions)]
+
+    def execute_merged(self, queries: List[CubeQuery], session: Session) -> List[CubeQueryResult]:
+        """
+        execute compatible queries as one statement and split the rows per query
+        """
+        dialect = session.get_bind().dialect.name
+        batch = self.get_compiler(session).build_batch(queries, grouping_sets=dialect in self.grouping_sets_dialects)
+
+        rows_per_set = [[] for _ in batch.sets]
+        for partition in session.execute(batch.statement, batch.parameters).partitions():
+            for row in partition:
+                rows_per_set[batch.set_ids[row[0]]].append(row)
+
+        names = ["g", *batch.keys, *batch.measures]
+        results = []
+
+        for query in queries:
+            columns = result_columns(query)
+            positions = [names.index(column) for column in columns]
+            rows = rows_per_set[batch.sets.index(tuple(sorted(column for column in columns if column not in query.measures)))]
+
+            data = [dict(zip(columns, [row[position] for position in positions])) for row in rows]
+
+            results.append(CubeQueryResult(columns=columns, data=sort_rows(query, data, nulls_first=dialect not in NULLS_LAST_DIALECTS)))
+
+        return results
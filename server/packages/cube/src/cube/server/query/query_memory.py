@@ -0,0 +1,751 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Callable, Tuple, Any
+
+import numpy as np
+from sqlalchemy import Select, select, bindparam, case
+from sqlalchemy.orm import Session
+
+from aspyx.di import injectable
+
+from cube.interface import CubeQuery, CubeQueryResult, MeasureDescriptor, JoinDescriptor, QueryFilter
+
+from .query_cache import NULLS_LAST_DIALECTS, result_columns, sort_rows
+from .query_compiler import CubeQueryCompiler, QueryException, date_range_bounds, split_member
+
+# -------------------------
+# Exceptions
+# -------------------------
+
+class Unsupported(Exception):
+    """
+    raised if a query can not be answered from memory. The caller falls back to sql
+    """
+
+# -------------------------
+# Columns
+# -------------------------
+
+class DictionaryColumn:
+    """
+    dictionary encoded values. The code `-1` stands for null
+    """
+    # constructor
+
+    def __init__(self):
+        self.codes = np.empty(0, dtype=np.int32)
+        self.values: List[Any] = []
+        self.index: Dict[Any, int] = {}
+
+    # public
+
+    def append(self, values: List[Any]):
+        index = self.index
+        dictionary = self.values
+
+        def code(value: Any) -> int:
+            if value is None:
+                return -1
+
+            result = index.get(value)
+            if result is None:
+                result = index[value] = len(dictionary)
+                dictionary.append(value)
+
+            return result
+
+        self.codes = np.concatenate([self.codes, np.fromiter(map(code, values), dtype=np.int32, count=len(values))])
+
+    def take(self, rows: np.ndarray):
+        self.codes = self.codes[rows]
+
+    def matches(self, predicate: Callable[[Any], bool], rows: np.ndarray) -> np.ndarray:
+        """
+        evaluate a predicate once per distinct value and return the row mask
+        """
+        # the null entry is appended last, so that code -1 picks it
+
+        lookup = np.array([bool(predicate(value)) for value in self.values] + [bool(predicate(None))], dtype=bool)
+
+        return lookup[self.codes[rows]]
+
+class NumberColumn:
+    """
+    float values, null is stored as NaN
+    """
+    # constructor
+
+    def __init__(self):
+        self.values = np.empty(0, dtype=np.float64)
+        self.integral = True # all values are ints, so aggregates can be returned as ints
+
+    # public
+
+    def append(self, values: List[Any]):
+        self.integral = self.integral and all(type(value) is int or value is None for value in values)
+        self.values = np.concatenate([self.values, np.array(values, dtype=np.float64)])
+
+    def take(self, rows: np.ndarray):
+        self.values = self.values[rows]
+
+class TimeColumn:
+    """
+    timestamps with second precision, null is stored as NaT
+    """
+    # constructor
+
+    def __init__(self):
+        self.values = np.empty(0, dtype="datetime64[s]")
+
+    # public
+
+    def append(self, values: List[Any]):
+        self.values = np.concatenate([self.values, np.array(values, dtype="datetime64[s]")])
+
+    def take(self, rows: np.ndarray):
+        self.values = self.values[rows]
+
+class FlagColumn:
+    """
+    boolean values, used for segments
+    """
+    # constructor
+
+    def __init__(self):
+        self.values = np.empty(0, dtype=bool)
+
+    # public
+
+    def append(self, values: List[Any]):
+        self.values = np.concatenate([self.values, np.array([bool(value) for value in values], dtype=bool)])
+
+    def take(self, rows: np.ndarray):
+        self.values = self.values[rows]
+
+# -------------------------
+# Helpers
+# -------------------------
+
+_TO_ONE = {"belongsTo", "hasOne"}
+
+_UNITS = {
+    "second": "s",
+    "minute": "m",
+    "hour": "h",
+    "day": "D",
+    "month": "M",
+    "year": "Y",
+}
+
+_DATE_GRANULARITIES = {"day", "week", "month", "quarter", "year"}
+
+def truncate(values: np.ndarray, granularity: str) -> np.ndarray:
+    """
+    truncate `datetime64[s]` values to the start of their granularity bucket
+    """
+    if granularity == "week":
+        days = values.astype("datetime64[D]")
+        weekday = (days.astype(np.int64) - 4) % 7 # 1970-01-01 was a thursday
+
+        return (days - weekday.astype("timedelta64[D]")).astype("datetime64[s]")
+
+    if granularity == "quarter":
+        months = values.astype("datetime64[M]")
+
+        return (months - (months.astype(np.int64) % 3).astype("timedelta64[M]")).astype("datetime64[s]")
+
+    return values.astype(f"datetime64[{_UNITS[granularity]}]").astype("datetime64[s]")
+
+def format_bucket(value: np.datetime64, granularity: str, dialect: str = "sqlite") -> Any:
+    """
+    format a bucket the way the sql compiler does on the dialect: strings on sqlite, timestamps of `date_trunc` otherwise
+    """
+    if np.isnat(value):
+        return None
+
+    if dialect != "sqlite":
+        return value.astype("datetime64[us]").item()
+
+    if granularity in _DATE_GRANULARITIES:
+        return str(value.astype("datetime64[D]"))
+
+    return np.datetime_as_string(value, unit="s").replace("T", " ")
+
+_TRUE = ("true", "1")
+_FALSE = ("false", "0")
+
+def coerce(value: Any, type: str, member: str) -> Any:
+    """
+    convert a filter value - usually a string - to the type of the member, the way the database compares it
+    """
+    if type == "number":
+        if isinstance(value, bool):
+            raise Unsupported(f"boolean value {value!r} on number '{member}'")
+
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise Unsupported(f"value {value!r} is not a number on '{member}'")
+
+    if type == "boolean":
+        if isinstance(value, bool):
+            return value
+
+        text = str(value).lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+
+        raise Unsupported(f"value {value!r} is not a boolean on '{member}'")
+
+    if type == "string":
+        return value if isinstance(value, str) else str(value)
+
+    raise Unsupported(f"values of type {type} are not supported on '{member}'")
+
+def predicate(filter: QueryFilter, type: str = "string") -> Callable[[Any], bool]:
+    """
+    return a python predicate implementing a filter with the same null semantics as the sql compiler.
+    Values are converted to the `type` of the member first.
+    """
+    operator = filter.operator
+    values = filter.values
+
+    if operator in ("equals", "notEquals", "gt", "gte", "lt", "lte"):
+        values = [coerce(value, type, filter.member) for value in values]
+
+    def like(matcher: Callable[[str, str], bool]) -> Callable[[Any], bool]:
+        patterns = [str(value).lower() for value in values]
+
+        return lambda value: value is not None and any(matcher(str(value).lower(), pattern) for pattern in patterns)
+
+    def compare(comparison: Callable[[Any, Any], bool]) -> Callable[[Any], bool]:
+        if not values:
+            raise QueryException(f"operator {operator} on '{filter.member}' requires a value")
+
+        bound = values[0]
+
+        def evaluate(value: Any) -> bool:
+            if value is None:
+                return False
+
+            try:
+                return comparison(value, bound)
+            except TypeError:
+                raise Unsupported(f"can not compare {value!r} with {bound!r}")
+
+        return evaluate
+
+    if operator == "equals":
+        return lambda value: value is not None and value in values
+    if operator == "notEquals":
+        return lambda value: value is None or value not in values
+    if operator == "contains":
+        return like(lambda value, pattern: pattern in value)
+    if operator == "notContains":
+        contains = like(lambda value, pattern: pattern in value)
+        return lambda value: value is None or not contains(value)
+    if operator == "startsWith":
+        return like(str.startswith)
+    if operator == "endsWith":
+        return like(str.endswith)
+    if operator == "set":
+        return lambda value: value is not None
+    if operator == "notSet":
+        return lambda value: value is None
+    if operator == "gt":
+        return compare(lambda value, bound: value > bound)
+    if operator == "gte":
+        return compare(lambda value, bound: value >= bound)
+    if operator == "lt":
+        return compare(lambda value, bound: value < bound)
+    if operator == "lte":
+        return compare(lambda value, bound: value <= bound)
+
+    raise Unsupported(f"operator {operator} is not supported on '{filter.member}'")
+
+def time_filter(values: np.ndarray, filter: QueryFilter) -> np.ndarray:
+    operator = filter.operator
+
+    if operator in ("inDateRange", "notInDateRange"):
+        lower, upper = (np.datetime64(bound, "s") for bound in date_range_bounds(filter.values))
+        inside = (values >= lower) & (values < upper)
+
+        return inside if operator == "inDateRange" else ~inside & ~np.isnat(values)
+    if operator in ("set", "notSet"):
+        return ~np.isnat(values) if operator == "set" else np.isnat(values)
+
+    if not filter.values:
+        raise QueryException(f"operator {operator} on '{filter.member}' requires a value")
+
+    bound = np.datetime64(str(filter.values[0]), "s")
+
+    if operator in ("gt", "afterDate"):
+        return values > bound
+    if operator == "gte":
+        return values >= bound
+    if operator in ("lt", "beforeDate"):
+        return values < bound
+    if operator == "lte":
+        return values <= bound
+
+    raise Unsupported(f"operator {operator} is not supported on time dimension '{filter.member}'")
+
+# -------------------------
+# In-memory cube
+# -------------------------
+
+class InMemoryCube:
+    """
+    The fact data of a root cube - joined with all cubes reachable via `belongsTo` or `hasOne` joins - held in numpy columns.
+
+    Dimensions are dictionary encoded, time dimensions are stored as `datetime64`, measures keep their row level input.
+    Since to-one joins do not multiply rows, group-bys over these columns yield the same results as the sql compiler
+    for queries rooted at the same cube.
+
+    Data is refreshed incrementally either by a monotonically increasing primary key of the root cube (append only)
+    or by a time dimension watermark, in which case all rows at or after the last watermark are reloaded.
+    """
+    # constructor
+
+    def __init__(self, compiler: CubeQueryCompiler, root: str, primary_key: Optional[str] = None, watermark: Optional[str] = None):
+        self.compiler = compiler
+        self.root = root
+        self.primary_key = primary_key
+        self.watermark = watermark
+
+        self.plan = self.to_one_plan()
+        self.joins = {(cube.name, join.name) for cube, join in self.plan}
+        self.cubes = {root, *[join.name for _, join in self.plan]}
+
+        self.dimensions: Dict[str, Any] = {}
+        self.types: Dict[str, str] = {}
+        self.measures: Dict[str, Tuple[MeasureDescriptor, Optional[Any]]] = {}
+        self.segments: Dict[str, FlagColumn] = {}
+        self.expressions = []
+
+        self.row_count = 0
+        self.last_key: Any = None
+        self.loaded_at: Optional[float] = None
+        self.lock = threading.RLock()
+
+        self.define_columns()
+
+        if primary_key is not None and primary_key not in self.dimensions:
+            raise QueryException(f"unknown primary key '{primary_key}'")
+        if watermark is not None and not isinstance(self.dimensions.get(watermark), TimeColumn):
+            raise QueryException(f"watermark '{watermark}' must be a time dimension")
+
+    # internal
+
+    def to_one_plan(self) -> List[Tuple[Any, JoinDescriptor]]:
+        cubes = self.compiler.cubes
+        plan = []
+        visited = {self.root}
+        queue = deque([self.root])
+
+        while queue:
+            cube = self.compiler.get_cube(queue.popleft())
+            for join in cube.joins:
+                if join.relationship in _TO_ONE and join.name in cubes and join.name not in visited:
+                    visited.add(join.name)
+                    plan.append((cube, join))
+                    queue.append(join.name)
+
+        return plan
+
+    def define_columns(self):
+        compiler = self.compiler
+
+        for name in sorted(self.cubes):
+            cube = compiler.get_cube(name)
+
+            for dimension in cube.dimensions:
+                member = f"{name}.{dimension.name}"
+                column = TimeColumn() if dimension.type == "time" else DictionaryColumn()
+
+                self.dimensions[member] = column
+                self.types[member] = dimension.type
+                self.expressions.append((compiler.dimension(member), column))
+
+            for measure in cube.measures:
+                member = f"{name}.{measure.name}"
+                measure, expression = compiler.measure_input(member)
+
+                column = None
+                if expression is not None:
+                    column = DictionaryColumn() if measure.type in ("count", "countDistinct") else NumberColumn()
+                    self.expressions.append((expression, column))
+
+                self.measures[member] = (measure, column)
+
+            for segment in cube.segments:
+                column = FlagColumn()
+
+                self.segments[f"{name}.{segment.name}"] = column
+                self.expressions.append((case((compiler.sql(cube, segment.expression), 1), else_=0), column))
+
+    def statement(self) -> Tuple[Select, Dict[str, Any]]:
+        statement = select(*[expression.label(f"c{i}") for i, (expression, _) in enumerate(self.expressions)]) \
+            .select_from(self.compiler.joined_source(self.root, self.plan))
+
+        parameters = {}
+        if self.row_count > 0 and self.last_key is not None:
+            if self.primary_key is not None:
+                statement = statement.where(self.compiler.dimension(self.primary_key) > bindparam("last_key"))
+                parameters["last_key"] = self.last_key
+            elif self.watermark is not None:
+                statement = statement.where(self.compiler.dimension(self.watermark) >= bindparam("last_key"))
+                parameters["last_key"] = self.last_key
+
+        return statement, parameters
+
+    def clear(self):
+        for _, column in self.expressions:
+            column.take(np.empty(0, dtype=np.int64))
+
+        self.row_count = 0
+        self.last_key = None
+
+    def update_last_key(self, rows: List[Any]):
+        if self.primary_key is not None:
+            index = next(i for i, (_, column) in enumerate(self.expressions) if column is self.dimensions[self.primary_key])
+            keys = [row[index] for row in rows if row[index] is not None]
+            if keys:
+                self.last_key = max(keys) if self.last_key is None else max(self.last_key, *keys)
+
+        elif self.watermark is not None:
+            values = self.dimensions[self.watermark].values
+            if len(values) > 0 and not np.isnat(values.max()):
+                last = values.max()
+
+                # bound as string, which compares correctly with iso dates stored as text
+
+                self.last_key = str(last.astype("datetime64[D]")) if last == last.astype("datetime64[D]") else np.datetime_as_string(last, unit="s").replace("T", " ")
+
+    # public
+
+    def refresh(self, session: Session, full: bool = False):
+        """
+        load new rows. A full refresh or a cube without primary key or watermark reloads everything
+        """
+        with self.lock:
+            if full or (self.primary_key is None and self.watermark is None):
+                self.clear()
+
+            statement, parameters = self.statement()
+
+            if self.primary_key is None and "last_key" in parameters:
+                # rows at or after the watermark are replaced
+
+                keep = ~(self.dimensions[self.watermark].values >= np.datetime64(self.last_key, "s"))
+                for _, column in self.expressions:
+                    column.take(keep)
+
+                self.row_count = int(keep.sum())
+
+            rows = list(session.execute(statement, parameters).all())
+
+            for i, (_, column) in enumerate(self.expressions):
+                column.append([row[i] for row in rows])
+
+            self.row_count += len(rows)
+            self.update_last_key(rows)
+            self.loaded_at = time.monotonic()
+
+    def covers(self, query: CubeQuery) -> bool:
+        """
+        return `True` if the query can be answered from memory with the same semantics as in sql
+        """
+        members = [*query.measures, *query.dimensions, *[td.dimension for td in query.time_dimensions]]
+        if not members or split_member(members[0])[0] != self.root:
+            return False
+
+        if any(member not in self.measures for member in query.measures):
+            return False
+        if any(member not in self.dimensions for member in query.dimensions):
+            return False
+        if any(not isinstance(self.dimensions.get(td.dimension), TimeColumn) for td in query.time_dimensions):
+            return False
+        if any(filter.member not in self.dimensions and filter.member not in self.measures for filter in query.filters):
+            return False
+        if any(segment not in self.segments for segment in query.segments):
+            return False
+
+        # the compiler has to choose the same joins
+
+        referenced = set()
+        for member in [*members, *[filter.member for filter in query.filters], *query.segments]:
+            referenced.update(self.compiler.references(member))
+
+        try:
+            plan = self.compiler.join_plan(self.root, referenced)
+        except QueryException:
+            return False
+
+        return all((cube.name, join.name) in self.joins for cube, join in plan)
+
+    def execute(self, query: CubeQuery, dialect: str = "sqlite") -> CubeQueryResult:
+        """
+        answer the query with the results the sql compiler produces on the given dialect
+        """
+        with self.lock:
+            return self.aggregate(query, dialect)
+
+    # internal
+
+    def aggregate(self, query: CubeQuery, dialect: str) -> CubeQueryResult:
+        rows = np.arange(self.row_count)
+
+        # where
+
+        mask = np.ones(self.row_count, dtype=bool)
+
+        for segment in query.segments:
+            mask &= self.segments[segment].values
+
+        for time_dimension in query.time_dimensions:
+            if time_dimension.date_range is not None:
+                mask &= time_filter(self.dimensions[time_dimension.dimension].values, QueryFilter(member=time_dimension.dimension, operator="inDateRange", values=time_dimension.date_range))
+
+        having = []
+        for filter in query.filters:
+            if filter.member in self.measures:
+                having.append((filter.member, predicate(filter, "number")))
+                continue
+
+            column = self.dimensions[filter.member]
+            if isinstance(column, TimeColumn):
+                mask &= time_filter(column.values, filter)
+            elif filter.operator in ("inDateRange", "notInDateRange", "beforeDate", "afterDate"):
+                raise Unsupported(f"date operator on non time dimension '{filter.member}'")
+            else:
+                mask &= column.matches(predicate(filter, self.types[filter.member]), rows)
+
+        rows = rows[mask]
+
+        # group by
+
+        keys: List[Tuple[str, np.ndarray, List[Any]]] = [] # result key, codes starting at 0, decoded values
+
+        for member in query.dimensions:
+            column = self.dimensions[member]
+            keys.append((member, column.codes[rows].astype(np.int64) + 1, [None, *column.values]))
+
+        for time_dimension in query.time_dimensions:
+            if time_dimension.granularity is not None:
+                granularity = time_dimension.granularity
+                buckets, codes = np.unique(truncate(self.dimensions[time_dimension.dimension].values[rows], granularity), return_inverse=True)
+
+                keys.append((f"{time_dimension.dimension}.{granularity}", codes.astype(np.int64), [format_bucket(bucket, granularity, dialect) for bucket in buckets]))
+
+        if keys:
+            cardinality = 1
+            for _, _, values in keys:
+                cardinality *= len(values)
+
+            if cardinality < 2 ** 62:
+                combined = np.zeros(len(rows), dtype=np.int64)
+                for _, codes, values in keys:
+                    combined = combined * len(values) + codes
+
+                _, first, inverse = np.unique(combined, return_index=True, return_inverse=True)
+            else:
+                _, first, inverse = np.unique(np.stack([codes for _, codes, _ in keys], axis=1), axis=0, return_index=True, return_inverse=True)
+
+            inverse = inverse.reshape(-1)
+            groups = len(first)
+        else:
+            first = np.zeros(1, dtype=np.int64)
+            inverse = np.zeros(len(rows), dtype=np.int64)
+            groups = 1
+
+        result: Dict[str, List[Any]] = {}
+        for key, codes, values in keys:
+            result[key] = [values[code] for code in codes[first].tolist()]
+
+        # measures
+
+        for member in {*query.measures, *[member for member, _ in having]}:
+            result[member] = self.measure(member, rows, inverse, groups)
+
+        # having
+
+        data = [dict(zip(result.keys(), row)) for row in zip(*result.values())] if result else []
+
+        for member, test in having:
+            data = [row for row in data if test(row[member])]
+
+        # order & limit
+
+        data = sort_rows(query, data, nulls_first=dialect not in NULLS_LAST_DIALECTS)
+
+        if query.offset is not None:
+            data = data[query.offset:]
+        if query.limit is not None:
+            data = data[:query.limit]
+
+        columns = result_columns(query)
+
+        return CubeQueryResult.model_construct(columns=columns, data=[{column: row[column] for column in columns} for row in data])
+
+    def measure(self, member: str, rows: np.ndarray, inverse: np.ndarray, groups: int) -> List[Any]:
+        measure, column = self.measures[member]
+        type = measure.type
+
+        if column is None:
+            return np.bincount(inverse, minlength=groups).tolist()
+
+        if isinstance(column, DictionaryColumn):
+            codes = column.codes[rows]
+            valid = codes >= 0
+
+            if type == "count":
+                return np.bincount(inverse[valid], minlength=groups).tolist()
+
+            # count distinct: count unique (group, value) pairs
+
+            pairs = np.unique(inverse[valid].astype(np.int64) * (len(column.values) + 1) + codes[valid])
+
+            return np.bincount(pairs // (len(column.values) + 1), minlength=groups).tolist()
+
+        values = column.values[rows]
+        valid = ~np.isnan(values)
+        groups_of_valid = inverse[valid]
+        counts = np.bincount(groups_of_valid, minlength=groups)
+
+        if type in ("sum", "avg"):
+            aggregated = np.bincount(groups_of_valid, weights=values[valid], minlength=groups)
+            if type == "avg":
+                aggregated = aggregated / np.maximum(counts, 1)
+        elif type == "min":
+            aggregated = np.full(groups, np.inf)
+            np.minimum.at(aggregated, groups_of_valid, values[valid])
+        elif type == "max":
+            aggregated = np.full(groups, -np.inf)
+            np.maximum.at(aggregated, groups_of_valid, values[valid])
+        else:
+            raise Unsupported(f"measure type {type}")
+
+        integral = column.integral and type != "avg"
+
+        return [(int(value) if integral else float(value)) if count > 0 else None for value, count in zip(aggregated.tolist(), counts.tolist())]
+
+# -------------------------
+# Store
+# -------------------------
+
+@injectable()
+class InMemoryCubeStore:
+    """
+    Optional in-memory engine for cubes whose fact data fits in ram.
+
+    Cubes have to be registered explicitly. Queries rooted at a registered cube are answered from numpy columns
+    as long as all members are reachable via to-one joins, everything else falls back to sql.
+    """
+    # constructor
+
+    def __init__(self):
+        self.refresh_interval = 60.0 # seconds between incremental refreshes
+        self.registrations: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self.cubes: Dict[str, InMemoryCube] = {}
+        self.lock = threading.RLock()
+
+        self.answered = 0
+        self.fallbacks = 0
+
+    # public
+
+    def register(self, cube: str, primary_key: Optional[str] = None, watermark: Optional[str] = None):
+        """
+        hold the given cube in memory.
+
+        Args:
+            cube: the cube name
+            primary_key: optional increasing primary key dimension used for incremental refreshes, e.g. `OrderItems.orderItemId`
+            watermark: optional time dimension used for incremental refreshes, e.g. `Orders.orderDate`
+        """
+        with self.lock:
+            self.registrations[cube] = (primary_key, watermark)
+            self.cubes.pop(cube, None)
+
+    def unregister(self, cube: str):
+        with self.lock:
+            self.registrations.pop(cube, None)
+            self.cubes.pop(cube, None)
+
+    def invalidate(self):
+        """
+        drop all loaded data, e.g. after cube definitions changed
+        """
+        with self.lock:
+            self.cubes = {}
+
+    def load(self, name: str, compiler: CubeQueryCompiler, session: Session) -> Tuple[InMemoryCube, bool]:
+        """
+        return the cube and whether this call loaded it. The database is read under the lock of the cube only,
+        so loading one cube does not block queries on the others.
+        """
+        with self.lock:
+            cube = self.cubes.get(name)
+            if cube is None or cube.compiler is not compiler:
+                primary_key, watermark = self.registrations[name]
+
+                cube = self.cubes[name] = InMemoryCube(compiler, name, primary_key=primary_key, watermark=watermark)
+
+        with cube.lock:
+            if cube.loaded_at is None:
+                cube.refresh(session)
+
+                return cube, True
+
+        return cube, False
+
+    def get_cube(self, name: str, compiler: CubeQueryCompiler, session: Session) -> InMemoryCube:
+        cube, loaded = self.load(name, compiler, session)
+
+        if not loaded:
+            with cube.lock:
+                if time.monotonic() - cube.loaded_at > self.refresh_interval:
+                    cube.refresh(session)
+
+        return cube
+
+    def refresh(self, compiler: CubeQueryCompiler, session: Session, full: bool = False):
+        """
+        refresh all registered cubes, cubes loaded by this call are not refreshed again
+        """
+        with self.lock:
+            names = list(self.registrations)
+
+        for name in names:
+            cube, loaded = self.load(name, compiler, session)
+            if not loaded:
+                cube.refresh(session, full=full)
+
+    def execute(self, query: CubeQuery, compiler: CubeQueryCompiler, session: Session) -> Optional[CubeQueryResult]:
+        """
+        answer a query from memory, returns `None` if the query needs to be executed in sql
+        """
+        members = [*query.measures, *query.dimensions, *[td.dimension for td in query.time_dimensions]]
+        if not members or split_member(members[0])[0] not in self.registrations:
+            return None
+
+        cube = self.get_cube(split_member(members[0])[0], compiler, session)
+
+        try:
+            if cube.covers(query):
+                result = cube.execute(query, compiler.dialect.name)
+                self.answered += 1
+
+                return result
+        except Unsupported:
+            pass
+
+        self.fallbacks += 1
+
+        return None
@@ -0,0 +1,68 @@
+from typing import Literal
+
+from fastapi import HTTPException
+from fastapi.responses import Response, StreamingResponse
+
+from aspyx.di import injectable
+from aspyx_persistence import PersistentUnit, transaction
+from aspyx_service import FastAPIServer
+
+from cube.interface import CubeQuery
+
+from .query_columnar import ARROW_MEDIA_TYPE, arrow_available, encode_arrow, encode_json
+from .query_compiler import QueryException
+from .query_engine import CubeQueryEngine
+
+@injectable()
+class CubeQueryStreamEndpoint:
+    """
+    Registers endpoints for large results that bypass the row based `CubeService.query`:
+
+    - `POST /api/cube/query/stream` streams query results as newline delimited json
+    - `POST /api/cube/query/columnar` returns column major typed buffers, either as json or as an arrow ipc stream
+    """
+    # constructor
+
+    def __init__(self, server: FastAPIServer, engine: CubeQueryEngine):
+        self.engine = engine
+
+        server.fast_api.add_api_route("/api/cube/query/stream", self.stream, methods=["POST"], tags=["CubeService"])
+        server.fast_api.add_api_route("/api/cube/query/columnar", self.columnar, methods=["POST"], tags=["CubeService"])
+
+    # endpoint
+
+    def stream(self, query: CubeQuery) -> StreamingResponse:
+        # compile upfront, so that errors are reported before the response starts
+
+        try:
+            with transaction():
+                compiled = self.engine.compile(query)
+        except QueryException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # the session outlives this call and is closed once the stream is exhausted or aborted
+
+        session = PersistentUnit.get_persistent_unit(None).create_session()
+
+        def rows():
+            try:
+                yield from self.engine.stream_json(query, session, compiled)
+            finally:
+                session.close()
+
+        return StreamingResponse(rows(), media_type="application/x-ndjson")
+
+    def columnar(self, query: CubeQuery, format: Literal["json", "arrow"] = "json") -> Response:
+        if format == "arrow" and not arrow_available():
+            raise HTTPException(status_code=406, detail="arrow format requires pyarrow on the server")
+
+        try:
+            with transaction():
+                result = self.engine.execute_columnar(query)
+        except QueryException as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        if format == "arrow":
+            return Response(encode_arrow(result), media_type=ARROW_MEDIA_TYPE)
+
+        return Response(encode_json(result), media_type="application/json")
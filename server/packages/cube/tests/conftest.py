@@ -0,0 +1,129 @@
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from cube.interface import CubeDescriptor, MeasureDescriptor, DimensionDescriptor, JoinDescriptor, SegmentDescriptor
+from cube.server.persistence.base import Base
+from cube.server.persistence.orders import Customer, Product, Order, OrderItem
+
+# cubes
+
+CUBES = [
+    CubeDescriptor(
+        name="Orders",
+        table="orders",
+        measures=[
+            MeasureDescriptor(name="count", type="count"),
+        ],
+        dimensions=[
+            DimensionDescriptor(name="orderId", column="order_id", type="number", primary_key=True),
+            DimensionDescriptor(name="orderDate", column="order_date", type="time"),
+        ],
+        joins=[
+            JoinDescriptor(name="Customers", relationship="belongsTo", on="${CUBE}.customer_id = ${Customers}.customer_id")
+        ]
+    ),
+    CubeDescriptor(
+        name="Customers",
+        table="customers",
+        measures=[
+            MeasureDescriptor(name="count", type="count"),
+        ],
+        dimensions=[
+            DimensionDescriptor(name="customerId", column="customer_id", type="number", primary_key=True),
+            DimensionDescriptor(name="name", column="name", type="string"),
+            DimensionDescriptor(name="country", column="country", type="string"),
+        ],
+        segments=[
+            SegmentDescriptor(name="german", expression="${CUBE}.country = 'DE'")
+        ]
+    ),
+    CubeDescriptor(
+        name="Products",
+        table="products",
+        measures=[
+            MeasureDescriptor(name="count", type="count"),
+            MeasureDescriptor(name="avgPrice", type="avg", column="price"),
+        ],
+        dimensions=[
+            DimensionDescriptor(name="productId", column="product_id", type="number", primary_key=True),
+            DimensionDescriptor(name="category", column="category", type="string"),
+        ]
+    ),
+    CubeDescriptor(
+        name="OrderItems",
+        table="order_items",
+        measures=[
+            MeasureDescriptor(name="quantity", type="sum", column="quantity"),
+            MeasureDescriptor(name="maxQuantity", type="max", column="quantity"),
+            MeasureDescriptor(name="minQuantity", type="min", column="quantity"),
+            MeasureDescriptor(name="orders", type="countDistinct", column="order_id"),
+            MeasureDescriptor(name="revenue", type="sum", expression="${CUBE}.quantity * ${Products}.price"),
+            MeasureDescriptor(name="bigItems", type="count", filters={"quantity": 5}),
+        ],
+        dimensions=[
+            DimensionDescriptor(name="orderItemId", column="order_item_id", type="number", primary_key=True),
+        ],
+        joins=[
+            JoinDescriptor(name="Orders", relationship="belongsTo", on="${CUBE}.order_id = ${Orders}.order_id"),
+            JoinDescriptor(name="Products", relationship="belongsTo", on="${CUBE}.product_id = ${Products}.product_id"),
+        ]
+    ),
+]
+
+# data
+
+def create_data(session):
+    session.add_all([
+        Customer(customer_id=1, name="Alice", country="DE"),
+        Customer(customer_id=2, name="Bob", country="US"),
+        Customer(customer_id=3, name="Carol", country="DE"),
+
+        Product(product_id=1, name="Laptop", category="Electronics", price=Decimal("1000.00")),
+        Product(product_id=2, name="Mouse", category="Electronics", price=Decimal("20.00")),
+        Product(product_id=3, name="Chair", category="Furniture", price=Decimal("150.00")),
+
+        Order(order_id=1, customer_id=1, order_date=date(2024, 1, 15)),
+        Order(order_id=2, customer_id=2, order_date=date(2024, 1, 20)),
+        Order(order_id=3, customer_id=1, order_date=date(2024, 2, 3)),
+        Order(order_id=4, customer_id=3, order_date=date(2024, 4, 11)),
+
+        OrderItem(order_item_id=1, order_id=1, product_id=1, quantity=1),
+        OrderItem(order_item_id=2, order_id=1, product_id=2, quantity=2),
+        OrderItem(order_item_id=3, order_id=2, product_id=3, quantity=5),
+        OrderItem(order_item_id=4, order_id=3, product_id=2, quantity=3),
+        OrderItem(order_item_id=5, order_id=4, product_id=3, quantity=5),
+    ])
+    session.commit()
+
+# fixtures
+
+@pytest.fixture()
+def cubes():
+    return CUBES
+
+@pytest.fixture()
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    Base.metadata.create_all(engine)
+
+    maker = sessionmaker(bind=engine)
+    with maker() as session:
+        create_data(session)
+
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+@pytest.fixture()
+def session(engine):
+    maker = sessionmaker(bind=engine)
+    with maker() as session:
+        yield session
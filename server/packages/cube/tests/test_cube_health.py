@@ -0,0 +1,72 @@
+from concurrent.futures import Future
+
+from aspyx_service import HealthCheckManager, HealthStatus
+
+from cube.server.cube_health import CubeHealth
+from cube.server.query import CubeQueryCache
+
+def check(health: CubeHealth) -> HealthCheckManager.Result:
+    result = HealthCheckManager.Result("cube-cache")
+
+    health.check_cache(result)
+
+    return result
+
+def lookups(cache: CubeQueryCache, hits: int, misses: int):
+    cache.hits += hits
+    cache.misses += misses
+
+class TestCubeHealth:
+    def test_hit_ratio(self, monkeypatch):
+        monkeypatch.setattr(CubeHealth, "min_hit_ratio", 0.5)
+        monkeypatch.setattr(CubeHealth, "min_lookups", 10)
+
+        cache = CubeQueryCache()
+        health = CubeHealth(cache)
+
+        assert check(health).status is HealthStatus.OK
+
+        # too few lookups to judge
+
+        lookups(cache, 0, 5)
+
+        assert check(health).status is HealthStatus.OK
+
+        # the window grows until it is big enough
+
+        lookups(cache, 1, 4)
+
+        result = check(health)
+
+        assert result.status is HealthStatus.WARNING
+        assert "hit ratio 0.10 of 10 lookups below 0.50" in result.details
+
+        # a new window
+
+        lookups(cache, 9, 1)
+
+        result = check(health)
+
+        assert result.status is HealthStatus.OK
+        assert "hit ratio 0.90 of 10 lookups" in result.details
+
+    def test_disabled_by_default(self):
+        cache = CubeQueryCache()
+        health = CubeHealth(cache)
+
+        lookups(cache, 0, 1000)
+
+        assert check(health).status is HealthStatus.OK
+
+    def test_queries_in_flight(self, monkeypatch):
+        monkeypatch.setattr(CubeHealth, "max_queries_in_flight", 2)
+
+        cache = CubeQueryCache()
+        health = CubeHealth(cache)
+
+        cache.in_flight = {key: Future() for key in range(3)}
+
+        result = check(health)
+
+        assert result.status is HealthStatus.WARNING
+        assert result.details == "3 queries running exceed 2"
@@ -0,0 +1,79 @@
+from aspyx_service import HealthCheckManager, HealthStatus
+
+from cube.server.cube_warmup import CubeWarmup
+from cube.server.orm import MetadataCache
+from cube.server.persistence.base import Base
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore
+
+class SessionWarmup(CubeWarmup):
+    # the catalog is loaded with the test session instead of a persistent unit transaction
+
+    def __init__(self, metadata: MetadataCache, engine: CubeQueryEngine, session):
+        super().__init__(metadata, engine)
+
+        self.session = session
+
+    def load_catalog(self):
+        self.engine.get_compiler(self.session)
+
+def create_warmup(cubes, session) -> SessionWarmup:
+    engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+    engine.set_cubes(cubes)
+
+    return SessionWarmup(MetadataCache(), engine, session)
+
+def check(warmup: CubeWarmup) -> HealthCheckManager.Result:
+    result = HealthCheckManager.Result("cube-warmup")
+
+    warmup.check_warm(result)
+
+    return result
+
+class TestCubeWarmup:
+    def test_warm(self, cubes, session):
+        warmup = create_warmup(cubes, session)
+
+        assert check(warmup).status is HealthStatus.WARNING
+
+        warmup.start()
+
+        assert warmup.wait(30)
+        assert warmup.error is None
+        assert list(warmup.timings) == ["mappers", "metadata postgres", "catalog"]
+        assert check(warmup).status is HealthStatus.OK
+
+        # the caches are filled
+
+        assert "sqlite" in warmup.engine.compilers
+        assert warmup.metadata.get_entry(Base, "postgres").index is not None
+
+    def test_lazy(self, cubes, session):
+        warmup = create_warmup(cubes, session)
+        warmup.lazy = True
+
+        warmup.start()
+
+        assert warmup.wait(0)
+        assert warmup.timings == {}
+        assert warmup.engine.compilers == {}
+        assert check(warmup).status is HealthStatus.OK
+
+    def test_failure(self, cubes, session):
+        warmup = create_warmup(cubes, session)
+
+        def fail():
+            raise RuntimeError("no database")
+
+        warmup.load_catalog = fail
+
+        warmup.start()
+
+        assert warmup.wait(30)
+        assert isinstance(warmup.error, RuntimeError)
+
+        # not fatal, the caches are initialized on first use
+
+        result = check(warmup)
+
+        assert result.status is HealthStatus.OK
+        assert "no database" in result.details
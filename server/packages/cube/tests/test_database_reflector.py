@@ -0,0 +1,134 @@
+import time
+
+from sqlalchemy import create_engine, event, inspect
+
+from cube.server.orm import DatabaseReflector, semantic_type_from_name
+
+TABLES = 3000
+
+def create_database(tables: int = TABLES):
+    engine = create_engine("sqlite://")
+
+    with engine.begin() as connection:
+        connection.exec_driver_sql("create table root (id integer primary key, name varchar(40) not null)")
+
+        for i in range(tables - 1):
+            parent = "root" if i % 10 == 0 else f"t{i - 1}"
+
+            connection.exec_driver_sql(
+                f"create table t{i} (id integer primary key, amount numeric(10, 2), created datetime, "
+                f"parent_id integer references {parent}(id), root_id integer references root)"
+            )
+
+    return engine
+
+def count_queries(engine) -> list:
+    statements = []
+
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    return statements
+
+class TestDatabaseReflector:
+    def test_semantic_types(self):
+        assert semantic_type_from_name("INTEGER") == "number"
+        assert semantic_type_from_name("NUMERIC(10, 2)") == "number"
+        assert semantic_type_from_name("VARCHAR(40)") == "string"
+        assert semantic_type_from_name("DATETIME") == "time"
+        assert semantic_type_from_name("BOOLEAN") == "boolean"
+        assert semantic_type_from_name("") == "string"
+
+    def test_reflect_thousands_of_tables(self):
+        engine = create_database()
+        statements = count_queries(engine)
+
+        start = time.perf_counter()
+        database = DatabaseReflector().reflect(engine)
+        elapsed = time.perf_counter() - start
+
+        schema = database.schemas[0]
+        tables = {table.name: table for table in schema.tables}
+
+        assert database.dialect == "sqlite"
+        assert schema.name == "main"
+        assert len(tables) == TABLES
+
+        # a fixed number of catalog queries, independent of the number of tables
+
+        assert len(statements) <= 4
+        assert elapsed < 10
+
+        table = tables["t5"]
+
+        assert table.id == "main.t5"
+        assert table.primary_key == ["id"]
+        assert [(column.name, column.semantic_type) for column in table.columns] == [
+            ("id", "number"), ("amount", "number"), ("created", "time"), ("parent_id", "number"), ("root_id", "number")
+        ]
+        assert {(fk.source_column, fk.target_table, fk.target_column) for fk in table.foreign_keys} == {
+            ("parent_id", "main.t4", "id"),
+            ("root_id", "main.root", "id") # implicit target column
+        }
+        assert not tables["root"].columns[1].nullable
+        assert sum(len(table.foreign_keys) for table in schema.tables) == 2 * (TABLES - 1)
+
+        # relations on both sides
+
+        left = [relation for relation in table.relations if relation.direction == "left"]
+        right = [relation for relation in tables["t4"].relations if relation.direction == "right"]
+
+        assert {relation.other_table for relation in left} == {"main.t4", "main.root"}
+        assert [relation.other_table for relation in right] == ["main.t5"]
+        assert right[0].mapping.column_pairs == [("parent_id", "id")]
+        assert right[0].mapping.left_cardinality == "many" and right[0].mapping.right_cardinality == "one"
+        assert len([relation for relation in tables["root"].relations if relation.direction == "right"]) == (TABLES - 1) + (TABLES - 1 + 9) // 10
+
+    def test_matches_inspector(self):
+        engine = create_database(50)
+
+        schema = DatabaseReflector().reflect(engine).schemas[0]
+        fallback = DatabaseReflector().create_tables("main", DatabaseReflector().read_inspector_catalog(engine.connect(), "main"))
+
+        inspector = inspect(engine)
+
+        assert sorted(table.name for table in schema.tables) == sorted(inspector.get_table_names())
+        assert [(t.name, t.primary_key, len(t.foreign_keys)) for t in schema.tables] == [(t.name, t.primary_key, len(t.foreign_keys)) for t in fallback]
+
+        for table in schema.tables:
+            columns = [column["name"] for column in inspector.get_columns(table.name)]
+
+            assert [column.name for column in table.columns] == columns
+
+    def test_cached_by_fingerprint(self):
+        engine = create_database(100)
+        reflector = DatabaseReflector()
+
+        first = reflector.reflect(engine).schemas[0]
+
+        statements = count_queries(engine)
+
+        assert reflector.reflect(engine).schemas[0] is first
+        assert len(statements) == 1 # the fingerprint
+
+        # ddl changes the fingerprint
+
+        with engine.begin() as connection:
+            connection.exec_driver_sql("create table extra (id integer primary key, t0_id integer references t0(id))")
+
+        second = reflector.reflect(engine).schemas[0]
+
+        assert second is not first
+        assert len(second.tables) == 101
+        assert reflector.reflect(engine).schemas[0] is second
+
+    def test_cached_by_engine(self):
+        # in-memory databases share the url and may share the schema version
+
+        engines = [create_engine("sqlite://") for _ in range(2)]
+        for engine, table in zip(engines, ["alpha", "beta"]):
+            with engine.begin() as connection:
+                connection.exec_driver_sql(f"create table {table} (id integer primary key)")
+
+        reflector = DatabaseReflector()
+
+        assert [[table.name for table in reflector.reflect(engine).schemas[0].tables] for engine in engines] == [["alpha"], ["beta"]]
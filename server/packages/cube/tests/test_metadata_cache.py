@@ -0,0 +1,59 @@
+import json
+
+from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy.orm import DeclarativeBase, relationship
+
+from cube.server.orm import MetadataCache
+
+class Base(DeclarativeBase):
+    pass
+
+class Author(Base):
+    __tablename__ = "authors"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
+
+    books = relationship("Book", back_populates="author")
+
+class Book(Base):
+    __tablename__ = "books"
+
+    id = Column(Integer, primary_key=True)
+    author_id = Column(Integer, ForeignKey("authors.id"))
+
+    author = relationship("Author", back_populates="books")
+
+def table_names(descriptor) -> list:
+    return sorted(table.name for schema in descriptor.schemas for table in schema.tables)
+
+class TestMetadataCache:
+    def test_memoized(self):
+        cache = MetadataCache()
+
+        first = cache.get_metadata(Base, "sqlite")
+
+        assert cache.get_metadata(Base, "sqlite") is first
+        assert cache.get_metadata(Base, "postgres") is not first
+        assert table_names(first) == ["authors", "books"]
+
+        encoded = cache.get_json(Base, "sqlite")
+
+        assert cache.get_json(Base, "sqlite") is encoded
+        assert [table["name"] for table in json.loads(encoded)["schemas"][0]["tables"]] == ["authors", "books"]
+
+    def test_invalidated_by_new_mappers(self):
+        cache = MetadataCache()
+
+        first = cache.get_metadata(Base, "sqlite")
+
+        class Publisher(Base):
+            __tablename__ = "publishers"
+
+            id = Column(Integer, primary_key=True)
+
+        second = cache.get_metadata(Base, "sqlite")
+
+        assert second is not first
+        assert "publishers" in table_names(second)
+        assert cache.get_metadata(Base, "sqlite") is second
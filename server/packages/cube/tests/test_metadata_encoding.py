@@ -0,0 +1,62 @@
+import dataclasses
+import json
+import sys
+
+import pytest
+
+from cube.interface import ColumnDescriptor, TableDescriptor
+from cube.server.orm import MetadataCache, DatabaseReflector, encode_compact, decode_compact
+from cube.server.persistence.base import Base
+
+from test_database_reflector import create_database
+
+class TestMetadataEncoding:
+    def test_roundtrip_orm(self):
+        database = MetadataCache().get_metadata(Base, "sqlite")
+
+        assert decode_compact(encode_compact(database)) == database
+
+    def test_roundtrip_reflected(self):
+        database = DatabaseReflector().reflect(create_database(3000))
+
+        lines = list(encode_compact(database, chunk_size=500))
+
+        assert len(lines) == 1 + 6
+        assert decode_compact(lines) == database
+
+        # much smaller than the plain json
+
+        compact = sum(len(line) for line in lines)
+        plain = len(json.dumps(dataclasses.asdict(database), separators=(",", ":")))
+
+        assert compact * 4 < plain
+
+    def test_chunks_are_decodable_incrementally(self):
+        database = DatabaseReflector().reflect(create_database(100))
+        lines = list(encode_compact(database, chunk_size=10))
+
+        # every prefix decodes to a prefix of the tables
+
+        partial = decode_compact(lines[:3])
+
+        assert [table.name for table in partial.schemas[0].tables] == [table.name for table in database.schemas[0].tables[:20]]
+
+        # strings are only transferred once
+
+        strings = [string for line in lines[1:] for string in json.loads(line)["strings"]]
+
+        assert len(strings) == len(set(strings))
+
+    def test_invalid_stream(self):
+        with pytest.raises(ValueError):
+            decode_compact([b'{"format": "other"}'])
+
+    def test_interned_and_slotted(self):
+        first = ColumnDescriptor(name="".join(["na", "me"]), db_type="VARCHAR", sqlalchemy_type="String", semantic_type="string", nullable=True, is_primary_key=False, is_foreign_key=False)
+        second = ColumnDescriptor(name="".join(["nam", "e"]), db_type="VARCHAR", sqlalchemy_type="String", semantic_type="string", nullable=True, is_primary_key=False, is_foreign_key=False)
+
+        assert first.name is second.name
+
+        if sys.version_info >= (3, 10):
+            assert not hasattr(first, "__dict__")
+            assert not hasattr(TableDescriptor(id="t", schema="s", name="t"), "__dict__")
@@ -0,0 +1,87 @@
+from types import SimpleNamespace
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from cube.server.orm import MetadataCache, MetadataIndex, DatabaseReflector
+from cube.server.orm.metadata_endpoint import MetadataEndpoint
+
+from test_database_reflector import create_database
+
+class TestMetadataIndex:
+    def test_find_tables(self):
+        index = MetadataIndex(DatabaseReflector().reflect(create_database(300))).get_schema("main")
+
+        total, tables = index.find_tables("t1", 0, 5)
+
+        assert total == 111 # t1, t10..t19, t100..t199
+        assert [table.name for table in tables] == ["t1", "t10", "t100", "t101", "t102"]
+
+        total, tables = index.find_tables("t1", 110, 5)
+
+        assert [table.name for table in tables] == ["t199"]
+        assert index.find_tables("x") == (0, [])
+        assert index.find_tables()[0] == 300
+        assert index.get_table("t5") is index.get_table("main.t5")
+
+    def test_fingerprint(self):
+        first = MetadataIndex(DatabaseReflector().reflect(create_database(50))).get_schema("main")
+        second = MetadataIndex(DatabaseReflector().reflect(create_database(50))).get_schema("main")
+        third = MetadataIndex(DatabaseReflector().reflect(create_database(51))).get_schema("main")
+
+        assert first.fingerprint() == second.fingerprint()
+        assert first.fingerprint() != third.fingerprint()
+
+class TestMetadataEndpoint:
+    def client(self) -> TestClient:
+        server = SimpleNamespace(fast_api=FastAPI())
+
+        MetadataEndpoint(server, MetadataCache())
+
+        return TestClient(server.fast_api)
+
+    def test_paged(self):
+        client = self.client()
+
+        response = client.get("/api/metadata/schemas", params={"dialect": "sqlite"})
+
+        assert response.status_code == 200
+        assert response.json()["schemas"][0]["name"] == "default"
+
+        response = client.get("/api/metadata/schemas/default/tables", params={"dialect": "sqlite", "prefix": "order"})
+
+        assert response.json()["total"] == 2
+        assert [table["name"] for table in response.json()["tables"]] == ["order_items", "orders"]
+
+        response = client.get("/api/metadata/schemas/default/tables/orders", params={"dialect": "sqlite"})
+
+        assert response.status_code == 200
+        assert response.json()["primary_key"] == ["order_id"]
+        assert {relation["other_table"] for relation in response.json()["relations"]} == {"customers", "order_items"}
+
+        assert client.get("/api/metadata/schemas/nope/tables").status_code == 404
+        assert client.get("/api/metadata/schemas/default/tables/nope").status_code == 404
+
+    def test_etags(self):
+        client = self.client()
+
+        for url in ["/api/metadata/schemas", "/api/metadata/schemas/default/tables", "/api/metadata/schemas/default/tables/orders"]:
+            response = client.get(url, params={"dialect": "sqlite"})
+            etag = response.headers["etag"]
+
+            assert response.headers["cache-control"] == "no-cache"
+
+            # stable
+
+            assert client.get(url, params={"dialect": "sqlite"}).headers["etag"] == etag
+
+            not_modified = client.get(url, params={"dialect": "sqlite"}, headers={"If-None-Match": etag})
+
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+
+            assert client.get(url, params={"dialect": "sqlite"}, headers={"If-None-Match": '"other"'}).status_code == 200
+
+            # the dialect is part of the content
+
+            assert client.get(url, params={"dialect": "postgres"}).headers["etag"] != etag
@@ -0,0 +1,78 @@
+from sqlalchemy.dialects import postgresql
+
+from cube.interface import CubeQuery
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore, CubeQueryCompiler, plan_batch
+
+def query(**query) -> CubeQuery:
+    return CubeQuery.model_validate(query)
+
+DATE_RANGE = {"dimension": "Orders.orderDate", "dateRange": ["2024-01-01", "2024-03-31"]}
+
+WIDGETS = [
+    query(measures=["OrderItems.quantity"], dimensions=["Customers.country"], timeDimensions=[DATE_RANGE]),
+    query(measures=["OrderItems.revenue"], dimensions=["Customers.country"], timeDimensions=[DATE_RANGE]),
+    query(measures=["OrderItems.quantity"], dimensions=["Products.category"], timeDimensions=[DATE_RANGE]),
+    query(measures=["OrderItems.quantity"], timeDimensions=[DATE_RANGE]),
+    query(measures=["OrderItems.quantity"], timeDimensions=[{**DATE_RANGE, "granularity": "month"}]),
+    query(dimensions=["OrderItems.orderItemId"], timeDimensions=[DATE_RANGE], order={"OrderItems.orderItemId": "asc"}),
+    # same as the first one
+    query(measures=["OrderItems.quantity"], dimensions=["Customers.country"], timeDimensions=[DATE_RANGE]),
+    # different filter
+    query(measures=["OrderItems.quantity"], dimensions=["Customers.country"]),
+    # limit
+    query(measures=["OrderItems.quantity"], dimensions=["Customers.country"], timeDimensions=[DATE_RANGE], limit=1),
+]
+
+def create_engine(cubes) -> CubeQueryEngine:
+    engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+    engine.cache.default_ttl = 0
+    engine.set_cubes(cubes)
+
+    return engine
+
+class TestBatch:
+    def test_plan(self, cubes):
+        compiler = CubeQueryCompiler(cubes, postgresql.dialect())
+
+        assert plan_batch(WIDGETS, compiler) == [[0, 1, 2, 3, 4, 5, 6], [7], [8]]
+
+    def test_grouping_sets(self, cubes):
+        compiler = CubeQueryCompiler(cubes, postgresql.dialect())
+
+        batch = compiler.build_batch(WIDGETS[:6], grouping_sets=True)
+        sql = str(batch.statement.compile(dialect=postgresql.dialect()))
+
+        assert "GROUPING SETS" in sql
+        assert batch.keys == ["Customers.country", "Products.category", "Orders.orderDate.month", "OrderItems.orderItemId"]
+        assert batch.sets == [("Customers.country",), ("Products.category",), (), ("Orders.orderDate.month",), ("OrderItems.orderItemId",)]
+
+        # grouping(country, category, month, item): a set bit marks a key that is not grouped
+
+        assert batch.set_ids == {0b0111: 0, 0b1011: 1, 0b1111: 2, 0b1101: 3, 0b1110: 4}
+
+    def test_same_results(self, cubes, session):
+        engine = create_engine(cubes)
+
+        results = engine.execute_batch(WIDGETS, session)
+
+        for widget, result in zip(WIDGETS, results):
+            expected = engine.execute(widget, session)
+
+            assert result.columns == expected.columns
+            assert sorted(map(repr, result.data)) == sorted(map(repr, expected.data))
+
+        assert results[5].data == [{"OrderItems.orderItemId": i} for i in range(1, 5)]
+
+    def test_deduplication(self, cubes, session):
+        engine = create_engine(cubes)
+        engine.cache.default_ttl = 60
+
+        engine.execute_batch(WIDGETS, session)
+
+        statistics = engine.cache.get_statistics()
+
+        assert (statistics.misses, statistics.entries) == (8, 8)
+
+        engine.execute_batch(WIDGETS, session)
+
+        assert engine.cache.get_statistics().hits == 8
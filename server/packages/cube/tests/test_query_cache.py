@@ -0,0 +1,194 @@
+import threading
+import time
+
+from cube.interface import CubeQuery, CubeQueryResult, PreAggregationDescriptor
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore, canonical_query
+
+def query(**query) -> CubeQuery:
+    return CubeQuery.model_validate(query)
+
+def result(rows: int) -> CubeQueryResult:
+    return CubeQueryResult(columns=["x"], data=[{"x": i} for i in range(rows)])
+
+class TestCanonicalQuery:
+    def test_normalization(self):
+        first = query(measures=["Orders.count", "OrderItems.quantity"],
+                      dimensions=["Customers.country", "Customers.name"],
+                      filters=[
+                          {"member": "Customers.country", "operator": "equals", "values": ["US", "DE"]},
+                          {"member": "Orders.orderDate", "operator": "inDateRange", "values": ["2024-01-01", "2024-01-31T12:00:00"]}
+                      ],
+                      order={"Orders.count": "desc"})
+
+        second = query(measures=["OrderItems.quantity", "Orders.count"],
+                       dimensions=["Customers.name", "Customers.country"],
+                       filters=[
+                           {"member": "Orders.orderDate", "operator": "inDateRange", "values": ["2024-01-01", "2024-01-31 12:00:00"]},
+                           {"member": "Customers.country", "operator": "equals", "values": ["DE", "US"]}
+                       ],
+                       order={"Orders.count": "desc"})
+
+        assert canonical_query(first) == canonical_query(second)
+
+    def test_default_order_is_significant(self):
+        # without an explicit order, the first measure determines the sort order
+
+        first = query(measures=["Orders.count", "OrderItems.quantity"], dimensions=["Customers.name"])
+        second = query(measures=["OrderItems.quantity", "Orders.count"], dimensions=["Customers.name"])
+
+        assert canonical_query(first) != canonical_query(second)
+
+class TestQueryCache:
+    def test_lru(self):
+        cache = CubeQueryCache()
+        cache.max_entries = 2
+
+        cache.get("a", 60, lambda: result(1))
+        cache.get("b", 60, lambda: result(1))
+        cache.get("a", 60, lambda: result(1))
+        cache.get("c", 60, lambda: result(1))  # evicts b
+
+        assert list(cache.entries.keys()) == ["a", "c"]
+
+        statistics = cache.get_statistics()
+
+        assert (statistics.hits, statistics.misses, statistics.evictions) == (1, 3, 1)
+
+    def test_row_bound(self):
+        cache = CubeQueryCache()
+        cache.max_rows = 10
+
+        cache.get("a", 60, lambda: result(6))
+        cache.get("b", 60, lambda: result(6))
+        cache.get("c", 60, lambda: result(11)) # never cached
+
+        assert list(cache.entries.keys()) == ["b"]
+        assert cache.get_statistics().rows == 6
+
+    def test_ttl(self):
+        cache = CubeQueryCache()
+
+        cache.get("a", 0.01, lambda: result(1))
+        time.sleep(0.02)
+        cache.get("a", 0.01, lambda: result(1))
+
+        assert cache.get_statistics().expirations == 1
+
+    def test_single_flight(self):
+        cache = CubeQueryCache()
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+
+            return result(1)
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(cache.get("a", 60, compute)))
+        leader.start()
+        started.wait(5)
+
+        followers = [threading.Thread(target=lambda: results.append(cache.get("a", 60, compute))) for _ in range(5)]
+        for follower in followers:
+            follower.start()
+
+        while cache.get_statistics().collapsed < 5:
+            time.sleep(0.001)
+
+        release.set()
+        for thread in [leader, *followers]:
+            thread.join()
+
+        assert len(calls) == 1
+        assert len(results) == 6 and all(r is results[0] for r in results)
+
+    def test_clear_while_computing(self):
+        cache = CubeQueryCache()
+        started = threading.Event()
+        release = threading.Event()
+
+        def compute():
+            started.set()
+            release.wait(5)
+
+            return result(1)
+
+        stale = []
+        leader = threading.Thread(target=lambda: stale.append(cache.get("a", 60, compute)))
+        leader.start()
+        started.wait(5)
+
+        cache.clear()
+
+        # a lookup after the clear does not wait for the stale computation
+
+        fresh = cache.get("a", 60, lambda: result(2))
+
+        release.set()
+        leader.join()
+
+        assert len(stale[0].data) == 1 and len(fresh.data) == 2
+        assert cache.lookup("a") is fresh
+
+        # the stale result is not cached
+
+        started.clear()
+        release.clear()
+
+        leader = threading.Thread(target=lambda: cache.get("b", 60, compute))
+        leader.start()
+        started.wait(5)
+
+        cache.clear()
+        release.set()
+        leader.join()
+
+        assert cache.lookup("b") is None
+
+class TestCachedEngine:
+    def create_engine(self, cubes) -> CubeQueryEngine:
+        engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+        engine.set_cubes(cubes)
+
+        return engine
+
+    def test_equivalent_queries(self, cubes, session):
+        engine = self.create_engine(cubes)
+
+        first = engine.execute(query(measures=["Orders.count"], dimensions=["Customers.country", "Customers.name"], order={"Customers.name": "asc"}), session)
+        second = engine.execute(query(measures=["Orders.count"], dimensions=["Customers.name", "Customers.country"], order={"Customers.name": "asc"}), session)
+
+        assert engine.cache.get_statistics().hits == 1
+        assert second.columns == ["Customers.name", "Customers.country", "Orders.count"]
+        assert second.data == first.data
+
+    def test_refresh_keys(self, cubes, session):
+        cubes = [cube.model_copy(deep=True) for cube in cubes]
+        orders = next(cube for cube in cubes if cube.name == "Orders")
+        orders.pre_aggregations = [
+            PreAggregationDescriptor(name="byDate", measures=["count"], dimensions=[], time_dimension="orderDate", refresh_key="every 5 minutes"),
+            PreAggregationDescriptor(name="main", measures=["count"], dimensions=["orderId"], refresh_key="select max(order_id) from orders")
+        ]
+
+        engine = self.create_engine(cubes)
+
+        ttl, values = engine.cache_policy(query(measures=["Orders.count"], timeDimensions=[{"dimension": "Orders.orderDate", "granularity": "day"}]), session)
+
+        assert (ttl, values) == (300, ())
+
+        ttl, values = engine.cache_policy(query(measures=["Orders.count"], dimensions=["Orders.orderId"]), session)
+
+        assert ttl == engine.cache.default_ttl
+        assert values == (("Orders", "4"),)
+
+    def test_invalidate(self, cubes, session):
+        engine = self.create_engine(cubes)
+
+        engine.execute(query(measures=["Orders.count"]), session)
+        engine.invalidate()
+
+        assert engine.cache.get_statistics().entries == 0
@@ -0,0 +1,64 @@
+import base64
+import json
+from decimal import Decimal
+
+import numpy as np
+
+from cube.interface import CubeQuery
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore, to_columnar, encode_json
+
+def decode(column: dict) -> list:
+    values = np.frombuffer(base64.b64decode(column["data"]), dtype=column["dtype"]).tolist()
+    if "dictionary" in column:
+        values = [column["dictionary"][code] if code >= 0 else None for code in values]
+
+    if "validity" in column:
+        bits = np.unpackbits(np.frombuffer(base64.b64decode(column["validity"]), dtype=np.uint8), bitorder="little")
+        values = [value if bit else None for value, bit in zip(values, bits.tolist())]
+
+    return values
+
+class TestColumnar:
+    def test_types_and_nulls(self):
+        rows = [
+            ("DE", 1, Decimal("1.5"), True),
+            (None, None, None, False),
+            ("DE", 3, 2.5, None),
+        ]
+
+        result = to_columnar(["country", "count", "revenue", "flag"], ["string", "integer", "number", "boolean"], rows)
+
+        country, count, revenue, flag = result.columns
+
+        assert country.dictionary == ["DE"] and country.values.tolist() == [0, -1, 0]
+        assert count.values.dtype == np.int64 and count.validity.tolist() == [True, False, True]
+        assert revenue.values.dtype == np.float64 and revenue.validity.tolist() == [True, False, True]
+        assert result.to_rows() == [
+            {"country": "DE", "count": 1, "revenue": 1.5, "flag": True},
+            {"country": None, "count": None, "revenue": None, "flag": False},
+            {"country": "DE", "count": 3, "revenue": 2.5, "flag": None},
+        ]
+
+    def test_json_encoding(self):
+        result = to_columnar(["name", "count"], ["string", "integer"], [("a", 1), ("b", None), ("a", 3)])
+
+        payload = json.loads(encode_json(result))
+
+        assert payload["rowCount"] == 3
+        assert [decode(column) for column in payload["columns"]] == [["a", "b", "a"], [1, None, 3]]
+
+    def test_engine(self, cubes, session):
+        engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+        engine.set_cubes(cubes)
+
+        query = CubeQuery.model_validate({
+            "measures": ["OrderItems.revenue", "OrderItems.orders"],
+            "dimensions": ["Customers.country"],
+            "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "month"}],
+            "order": {"Customers.country": "asc"}
+        })
+
+        result = engine.execute_columnar(query, session)
+
+        assert [column.type for column in result.columns] == ["string", "time", "number", "integer"]
+        assert result.to_rows() == engine.execute(query, session).data
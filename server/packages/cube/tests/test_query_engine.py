@@ -0,0 +1,173 @@
+import json
+
+import pytest
+
+from cube.interface import CubeQuery
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore, QueryException
+
+def create_engine(cubes) -> CubeQueryEngine:
+    query_engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=InMemoryCubeStore())
+    query_engine.set_cubes(cubes)
+
+    return query_engine
+
+def run(cubes, session, **query):
+    return create_engine(cubes).execute(CubeQuery.model_validate(query), session=session)
+
+class TestQueryEngine:
+    def test_count(self, cubes, session):
+        result = run(cubes, session, measures=["Orders.count"])
+
+        assert result.columns == ["Orders.count"]
+        assert result.data == [{"Orders.count": 4}]
+
+    def test_group_by_joined_dimension(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     dimensions=["Customers.country"],
+                     order={"Customers.country": "asc"})
+
+        assert result.data == [
+            {"Customers.country": "DE", "Orders.count": 3},
+            {"Customers.country": "US", "Orders.count": 1},
+        ]
+
+    def test_join_path(self, cubes, session):
+        # order items -> orders -> customers
+
+        result = run(cubes, session,
+                     measures=["OrderItems.quantity", "OrderItems.orders"],
+                     dimensions=["Customers.name"],
+                     order={"Customers.name": "asc"})
+
+        assert result.data == [
+            {"Customers.name": "Alice", "OrderItems.quantity": 6, "OrderItems.orders": 2},
+            {"Customers.name": "Bob", "OrderItems.quantity": 5, "OrderItems.orders": 1},
+            {"Customers.name": "Carol", "OrderItems.quantity": 5, "OrderItems.orders": 1},
+        ]
+
+    def test_measure_types(self, cubes, session):
+        result = run(cubes, session, measures=[
+            "OrderItems.maxQuantity",
+            "OrderItems.minQuantity",
+            "OrderItems.revenue",
+            "OrderItems.bigItems"
+        ])
+
+        row = result.data[0]
+
+        assert row["OrderItems.maxQuantity"] == 5
+        assert row["OrderItems.minQuantity"] == 1
+        assert float(row["OrderItems.revenue"]) == 1000 + 40 + 750 + 60 + 750
+        assert row["OrderItems.bigItems"] == 2
+
+    def test_time_dimension(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     timeDimensions=[{"dimension": "Orders.orderDate", "granularity": "month"}])
+
+        assert result.columns == ["Orders.orderDate.month", "Orders.count"]
+        assert result.data == [
+            {"Orders.orderDate.month": "2024-01-01", "Orders.count": 2},
+            {"Orders.orderDate.month": "2024-02-01", "Orders.count": 1},
+            {"Orders.orderDate.month": "2024-04-01", "Orders.count": 1},
+        ]
+
+    def test_time_dimension_quarter_and_week(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     timeDimensions=[{"dimension": "Orders.orderDate", "granularity": "quarter"}])
+
+        assert [row["Orders.orderDate.quarter"] for row in result.data] == ["2024-01-01", "2024-04-01"]
+
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     timeDimensions=[{"dimension": "Orders.orderDate", "granularity": "week"}])
+
+        # 2024-01-15 is a monday, 2024-01-20 a saturday
+
+        assert result.data[0] == {"Orders.orderDate.week": "2024-01-15", "Orders.count": 2}
+
+    def test_date_range(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     timeDimensions=[{"dimension": "Orders.orderDate", "dateRange": ["2024-01-01", "2024-01-20"]}])
+
+        assert result.data == [{"Orders.count": 2}]
+
+    def test_filters(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     filters=[{"member": "Customers.country", "operator": "equals", "values": ["DE"]}])
+
+        assert result.data == [{"Orders.count": 3}]
+
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     filters=[{"member": "Customers.name", "operator": "startsWith", "values": ["a", "c"]}])
+
+        assert result.data == [{"Orders.count": 3}]
+
+        result = run(cubes, session,
+                     measures=["Orders.count"],
+                     dimensions=["Customers.name"],
+                     filters=[{"member": "Orders.count", "operator": "gt", "values": [1]}])
+
+        assert result.data == [{"Customers.name": "Alice", "Orders.count": 2}]
+
+    def test_segment(self, cubes, session):
+        result = run(cubes, session, measures=["Customers.count"], segments=["Customers.german"])
+
+        assert result.data == [{"Customers.count": 2}]
+
+    def test_order_and_limit(self, cubes, session):
+        result = run(cubes, session,
+                     measures=["OrderItems.quantity"],
+                     dimensions=["Products.category"],
+                     limit=1)
+
+        # default order is the first measure descending
+
+        assert result.data == [{"Products.category": "Furniture", "OrderItems.quantity": 10}]
+
+    def test_statement_cache(self, cubes, session):
+        query_engine = create_engine(cubes)
+
+        def query(country: str) -> CubeQuery:
+            return CubeQuery.model_validate({
+                "measures": ["Orders.count"],
+                "filters": [{"member": "Customers.country", "operator": "equals", "values": [country]}]
+            })
+
+        first = query_engine.compile(query("DE"), session)
+        second = query_engine.compile(query("US"), session)
+
+        assert first.statement is second.statement
+        assert second.parameters == {"f0": ["US"]}
+        assert query_engine.execute(query("US"), session).data == [{"Orders.count": 1}]
+
+    def test_stream(self, cubes, session):
+        query_engine = create_engine(cubes)
+        query_engine.chunk_size = 2
+
+        query = CubeQuery(dimensions=["Orders.orderId"])
+
+        chunks = list(query_engine.stream(query, session))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2]
+
+        lines = b"".join(query_engine.stream_json(query, session)).decode().splitlines()
+
+        assert [json.loads(line) for line in lines] == [{"Orders.orderId": i} for i in range(1, 5)]
+
+    def test_errors(self, cubes, session):
+        with pytest.raises(QueryException):
+            run(cubes, session, measures=["Orders.unknown"])
+
+        with pytest.raises(QueryException):
+            run(cubes, session, measures=["Unknown.count"])
+
+        with pytest.raises(QueryException):
+            # no join from customers to orders
+
+            run(cubes, session, measures=["Customers.count"], dimensions=["Orders.orderDate"])
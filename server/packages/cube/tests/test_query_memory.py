@@ -0,0 +1,222 @@
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from cube.interface import CubeQuery
+from cube.server.persistence.orders import Order, OrderItem
+from cube.server.query import CubeQueryEngine, CubeQueryCache, InMemoryCubeStore, CubeQueryCompiler
+from cube.server.query.query_cache import sort_rows
+from cube.server.query.query_memory import InMemoryCube
+
+QUERIES = [
+    {"measures": ["OrderItems.quantity", "OrderItems.orders", "OrderItems.maxQuantity", "OrderItems.minQuantity", "OrderItems.bigItems"]},
+    {"measures": ["OrderItems.revenue", "OrderItems.orders"], "dimensions": ["Customers.country"]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Products.category", "Customers.name"], "order": {"Customers.name": "asc", "Products.category": "asc"}},
+    {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "month"}]},
+    {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "week"}]},
+    {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "quarter"}]},
+    {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "dateRange": ["2024-01-01", "2024-01-31"]}]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Customers.name"], "filters": [{"member": "Customers.name", "operator": "startsWith", "values": ["a", "b"]}]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Customers.name"], "filters": [{"member": "OrderItems.quantity", "operator": "gt", "values": [5]}]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Products.category"], "filters": [{"member": "Products.category", "operator": "notEquals", "values": ["Furniture"]}]},
+    {"measures": ["OrderItems.quantity"], "segments": ["Customers.german"]},
+    {"dimensions": ["OrderItems.orderItemId"], "filters": [{"member": "Customers.country", "operator": "equals", "values": ["DE"]}], "order": {"OrderItems.orderItemId": "asc"}},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Customers.name"], "order": {"Customers.name": "desc"}, "limit": 2, "offset": 1},
+    {"measures": ["OrderItems.quantity"], "filters": [{"member": "Customers.country", "operator": "equals", "values": ["FR"]}]},
+]
+
+# cube.js sends filter values as strings, also for numeric dimensions and measures
+
+STRING_VALUED_QUERIES = [
+    {"measures": ["OrderItems.quantity"], "filters": [{"member": "OrderItems.orderItemId", "operator": "equals", "values": ["1"]}]},
+    {"measures": ["OrderItems.quantity"], "filters": [{"member": "OrderItems.orderItemId", "operator": "notEquals", "values": ["1", "2"]}]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Customers.customerId"], "filters": [{"member": "Customers.customerId", "operator": "equals", "values": ["1"]}]},
+    {"measures": ["OrderItems.quantity"], "dimensions": ["Customers.name"], "filters": [{"member": "Customers.customerId", "operator": "gte", "values": ["2"]}], "order": {"Customers.name": "asc"}},
+]
+
+def create_engine(cubes, memory: InMemoryCubeStore) -> CubeQueryEngine:
+    engine = CubeQueryEngine(repository=None, cache=CubeQueryCache(), memory=memory)
+    engine.cache.default_ttl = 0 # do not cache
+    engine.set_cubes(cubes)
+
+    return engine
+
+def normalize(data: list) -> list:
+    return [{key: float(value) if isinstance(value, (int, float)) or type(value).__name__ == "Decimal" else value for key, value in row.items()} for row in data]
+
+class TestInMemoryCube:
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_same_results_as_sql(self, cubes, session, query):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        query = CubeQuery.model_validate(query)
+
+        expected = create_engine(cubes, InMemoryCubeStore()).execute(query, session)
+        result = create_engine(cubes, memory).execute(query, session)
+
+        assert memory.answered == 1
+        assert result.columns == expected.columns
+        assert normalize(result.data) == normalize(expected.data)
+
+    def test_dialect_conventions(self, cubes, session):
+        # an item of an unknown product has no category, which sorts first on sqlite and last on postgres
+
+        session.add(OrderItem(order_item_id=6, order_id=4, product_id=99, quantity=1))
+        session.commit()
+
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        compiler = CubeQueryCompiler(cubes, postgresql.dialect())
+        sql = create_engine(cubes, InMemoryCubeStore())
+
+        for query in [
+            {"measures": ["OrderItems.quantity"], "dimensions": ["Products.category"], "order": {"Products.category": "asc"}},
+            {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "month"}]},
+            {"measures": ["OrderItems.quantity"], "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "week"}], "dimensions": ["Products.category"]},
+        ]:
+            query = CubeQuery.model_validate(query)
+
+            # the sqlite results converted to the postgres conventions: timestamps and nulls last
+
+            expected = [
+                {key: datetime.fromisoformat(value) if key.startswith("Orders.orderDate.") and value is not None else value for key, value in row.items()}
+                for row in sql.execute(query, session).data
+            ]
+            expected = sort_rows(query, expected, nulls_first=False)
+
+            assert memory.execute(query, compiler, session).data == expected
+            assert memory.execute(query, sql.get_compiler(session), session).data == sql.execute(query, session).data
+
+    @pytest.mark.parametrize("query", STRING_VALUED_QUERIES)
+    def test_string_values_on_numbers(self, cubes, session, query):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        query = CubeQuery.model_validate(query)
+
+        expected = create_engine(cubes, InMemoryCubeStore()).execute(query, session)
+        result = create_engine(cubes, memory).execute(query, session)
+
+        assert memory.answered == 1
+        assert expected.data
+        assert normalize(result.data) == normalize(expected.data)
+
+    def test_unconvertible_values_fall_back(self, cubes, session):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        create_engine(cubes, memory).execute(CubeQuery.model_validate({"measures": ["OrderItems.quantity"], "filters": [{"member": "OrderItems.orderItemId", "operator": "equals", "values": ["one"]}]}), session)
+
+        assert (memory.answered, memory.fallbacks) == (0, 1)
+
+    def test_fallback(self, cubes, session):
+        memory = InMemoryCubeStore()
+        memory.register("Orders")
+
+        engine = create_engine(cubes, memory)
+
+        # queries rooted at other cubes are not considered
+
+        engine.execute(CubeQuery(measures=["OrderItems.quantity"]), session)
+
+        # equals on a time dimension is evaluated in sql
+
+        engine.execute(CubeQuery.model_validate({"measures": ["Orders.count"], "filters": [{"member": "Orders.orderDate", "operator": "equals", "values": ["2024-01-15"]}]}), session)
+
+        assert (memory.answered, memory.fallbacks) == (0, 1)
+
+    def test_incremental_refresh_by_primary_key(self, cubes, session):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        engine = create_engine(cubes, memory)
+        query = CubeQuery(measures=["OrderItems.quantity"])
+
+        assert engine.execute(query, session).data == [{"OrderItems.quantity": 16}]
+
+        session.add(OrderItem(order_item_id=6, order_id=4, product_id=1, quantity=4))
+        session.commit()
+
+        memory.refresh(engine.get_compiler(session), session)
+
+        assert memory.cubes["OrderItems"].row_count == 6
+        assert engine.execute(query, session).data == [{"OrderItems.quantity": 20}]
+
+    def test_incremental_refresh_by_watermark(self, cubes, session):
+        memory = InMemoryCubeStore()
+        memory.register("Orders", watermark="Orders.orderDate")
+
+        engine = create_engine(cubes, memory)
+        query = CubeQuery(measures=["Orders.count"], dimensions=["Customers.country"], order={"Customers.country": "asc"})
+
+        assert engine.execute(query, session).data == [{"Customers.country": "DE", "Orders.count": 3}, {"Customers.country": "US", "Orders.count": 1}]
+
+        session.add_all([
+            Order(order_id=5, customer_id=2, order_date=date(2024, 4, 11)), # same day as the watermark
+            Order(order_id=6, customer_id=2, order_date=date(2024, 5, 1)),
+        ])
+        session.commit()
+
+        memory.refresh(engine.get_compiler(session), session)
+
+        assert memory.cubes["Orders"].row_count == 6
+        assert engine.execute(query, session).data == [{"Customers.country": "DE", "Orders.count": 3}, {"Customers.country": "US", "Orders.count": 3}]
+
+    def test_loads_once(self, cubes, session, monkeypatch):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems", primary_key="OrderItems.orderItemId")
+
+        refreshes = []
+        refresh = InMemoryCube.refresh
+
+        def counting(cube, session, full=False):
+            refreshes.append((cube.root, full))
+            refresh(cube, session, full=full)
+
+        monkeypatch.setattr(InMemoryCube, "refresh", counting)
+
+        compiler = create_engine(cubes, memory).get_compiler(session)
+
+        memory.refresh(compiler, session, full=True)
+        assert refreshes == [("OrderItems", False)] # a new cube is not refreshed twice
+
+        memory.refresh(compiler, session, full=True)
+        assert refreshes == [("OrderItems", False), ("OrderItems", True)]
+
+    def test_load_does_not_block_other_cubes(self, cubes, session, monkeypatch):
+        memory = InMemoryCubeStore()
+        memory.register("OrderItems")
+        memory.register("Orders")
+
+        compiler = create_engine(cubes, memory).get_compiler(session)
+        items = memory.get_cube("OrderItems", compiler, session)
+
+        loading, release = threading.Event(), threading.Event()
+        refresh = InMemoryCube.refresh
+
+        def blocking(cube, session, full=False):
+            loading.set()
+            release.wait(5)
+            refresh(cube, session, full=full)
+
+        monkeypatch.setattr(InMemoryCube, "refresh", blocking)
+
+        thread = threading.Thread(target=memory.get_cube, args=("Orders", compiler, session))
+        thread.start()
+        loading.wait(5)
+
+        try:
+            start = time.perf_counter()
+
+            assert memory.get_cube("OrderItems", compiler, session) is items # while Orders loads
+            assert time.perf_counter() - start < 1
+        finally:
+            release.set()
+            thread.join()
+
+        assert memory.cubes["Orders"].row_count == 4
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+
+from fastapi import HTTPException
+
+from sqlalchemy.dialects import sqlite
+
+from cube.interface import DatabaseDescriptor
+from cube.server.orm import MetadataCache, RelationGraph, RelationGraphException, UnknownTableException, DatabaseReflector
+from cube.server.orm_service_impl import MetadataServiceServiceImpl
+from cube.server.persistence.base import Base
+from cube.server.query import CubeQueryCompiler
+
+from test_database_reflector import create_database
+
+NAMES = {"orders": "Orders", "customers": "Customers", "products": "Products", "order_items": "OrderItems"}
+
+class TestRelationGraph:
+    def test_orm_joins(self, cubes):
+        graph = MetadataCache().get_graph(Base, "sqlite")
+
+        path = graph.path("order_items", "customers")
+
+        assert [(edge.source, edge.target, edge.relationship) for edge in path] == [
+            ("order_items", "orders", "belongsTo"),
+            ("orders", "customers", "belongsTo")
+        ]
+        assert [edge.relationship for edge in graph.path("customers", "order_items")] == ["hasMany", "hasMany"]
+        assert graph.path("customers", "customers") == []
+
+        # the derived joins match the hand written ones
+
+        joins = graph.joins("order_items", ["orders", "products"], NAMES)
+
+        assert [(join.name, join.relationship, join.on) for join in joins] == [
+            (join.name, join.relationship, join.on) for join in cubes[3].joins
+        ]
+        assert joins[0].relation_mapping_id is not None
+
+        joins = graph.joins("orders", ["customers"], NAMES)
+
+        assert [(join.name, join.on) for join in joins] == [("Customers", "${CUBE}.customer_id = ${Customers}.customer_id")]
+
+        joins = graph.joins("order_items", ["customers"], NAMES)
+
+        assert [(join.name, join.on) for join in joins] == [
+            ("Orders", "${CUBE}.order_id = ${Orders}.order_id"),
+            ("Customers", "${Orders}.customer_id = ${Customers}.customer_id")
+        ]
+
+        # derived joins compile
+
+        cube = cubes[3].model_copy(update={"joins": graph.joins("order_items", ["orders", "products"], NAMES)})
+        compiler = CubeQueryCompiler([*cubes[:3], cube], sqlite.dialect())
+
+        assert [join.name for _, join in compiler.join_plan("OrderItems", ["Products", "Orders"])] == ["Orders", "Products"]
+
+    def test_unknown_tables(self):
+        graph = MetadataCache().get_graph(Base, "sqlite")
+
+        with pytest.raises(UnknownTableException):
+            graph.path("orders", "nope")
+
+    def test_service_errors(self):
+        service = MetadataServiceServiceImpl(MetadataCache(), None, None)
+
+        with pytest.raises(HTTPException) as e:
+            service.get_joins("orders", "nope", "sqlite")
+
+        assert e.value.status_code == 404
+
+        with pytest.raises(HTTPException) as e:
+            service.get_join_path("nope", "orders", "sqlite")
+
+        assert e.value.status_code == 404
+
+    def test_unreachable(self):
+        graph = RelationGraph(DatabaseReflector().reflect(create_database(20)))
+        graph.tables["main.lonely"] = graph.tables["main.t0"].__class__(id="main.lonely", schema="main", name="lonely")
+        graph.adjacency["main.lonely"] = []
+        graph.names["lonely"] = "main.lonely"
+
+        assert graph.path("t1", "lonely") is None
+        with pytest.raises(RelationGraphException) as e:
+            graph.joins("t1", ["lonely"])
+
+        assert not isinstance(e.value, UnknownTableException)
+
+    def test_thousands_of_foreign_keys(self):
+        database: DatabaseDescriptor = DatabaseReflector().reflect(create_database(3000))
+
+        start = time.perf_counter()
+        graph = RelationGraph(database)
+        build = time.perf_counter() - start
+
+        # directly by root_id instead of the parent chain
+
+        path = graph.path("t2998", "root")
+
+        assert [edge.target for edge in path] == ["main.root"]
+        assert [edge.target for edge in graph.path("t2998", "t2990")] == ["main.root", "main.t2990"]
+
+        joins = {join.name: join for join in graph.joins("t2998", ["t2997", "root"])}
+
+        assert joins.keys() == {"t2997", "root"}
+        assert joins["t2997"].on == "${CUBE}.parent_id = ${t2997}.id"
+        assert joins["root"].relationship == "belongsTo"
+
+        # memoized searches
+
+        start = time.perf_counter()
+        for i in range(1000):
+            graph.joins("t2998", ["t2997", "root"])
+        lookups = (time.perf_counter() - start) / 1000
+
+        assert build < 5
+        assert lookups < 0.001
+        assert len(graph.trees) == 1
@@ -0,0 +1,193 @@
+import random
+
+import pytest
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from cube.server.orm import StatisticsCollector, DatabaseReflector, MetadataCache, estimate_distinct
+from cube.server.persistence.base import Base
+
+from conftest import create_data
+
+@pytest.fixture()
+def file_engine(tmp_path):
+    # statistics are computed on worker threads, each with its own connection
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'statistics.db'}")
+
+    Base.metadata.create_all(engine)
+    with sessionmaker(bind=engine)() as session:
+        create_data(session)
+
+    try:
+        yield engine
+    finally:
+        engine.dispose()
+
+def tables(database) -> dict:
+    return {table.name: table for schema in database.schemas for table in schema.tables}
+
+def columns(table) -> dict:
+    return {column.name: column.statistics for column in table.columns}
+
+class TestStatistics:
+    def test_estimate_distinct(self):
+        assert estimate_distinct([1, 2, 2, None], 4) == 2
+
+        # a uniform sample of 100000 rows with 1000 distinct values
+
+        rng = random.Random(1)
+        sample = [rng.randrange(1000) for _ in range(5000)]
+
+        assert 900 <= estimate_distinct(sample, 100_000) <= 1100
+
+        # unique values
+
+        sample = rng.sample(range(100_000), 5000)
+
+        assert estimate_distinct(sample, 100_000) > 20_000
+        assert estimate_distinct([], 10) == 0
+
+    def test_annotate(self, file_engine):
+        collector = StatisticsCollector()
+        database = DatabaseReflector().reflect(file_engine)
+
+        annotated = collector.annotate(file_engine, database)
+
+        orders = tables(annotated)["orders"]
+
+        assert orders.statistics.row_count == 4
+        assert orders.statistics.sample_size == 4
+        assert columns(orders)["order_date"].min == "2024-01-15"
+        assert columns(orders)["order_date"].max == "2024-04-11"
+        assert columns(orders)["customer_id"].distinct_count == 3
+        assert columns(orders)["order_id"].null_fraction == 0
+
+        customers = tables(annotated)["customers"]
+
+        assert columns(customers)["country"].distinct_count == 2
+        assert columns(customers)["country"].min is None # no ranges of strings
+
+        products = columns(tables(annotated)["products"])
+
+        assert products["price"].min == 20.0 and products["price"].max == 1000.0
+
+        # the input is not modified
+
+        assert tables(database)["orders"].statistics is None
+        assert all(column.statistics is None for column in tables(database)["orders"].columns)
+
+    def test_orm_metadata(self, file_engine):
+        annotated = StatisticsCollector().annotate(file_engine, MetadataCache().get_metadata(Base, "sqlite"), tables=["order_items"])
+
+        assert tables(annotated)["order_items"].statistics.row_count == 5
+        assert tables(annotated)["orders"].statistics is None
+        assert columns(tables(annotated)["order_items"])["quantity"].max == 5
+
+    def test_sampled(self, file_engine):
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql("create table facts (id integer primary key, kind varchar(10), amount integer)")
+            connection.exec_driver_sql(
+                "with recursive n(i) as (select 1 union all select i + 1 from n where i < 20000) "
+                "insert into facts select i, 'k' || (i % 50), case when i % 4 = 0 then null else i end from n"
+            )
+
+        collector = StatisticsCollector()
+        collector.sample_size = 2000
+
+        facts = tables(collector.annotate(file_engine, DatabaseReflector().reflect(file_engine)))["facts"]
+
+        assert facts.statistics.row_count == 20000
+        assert facts.statistics.sample_size == 2000
+        assert columns(facts)["kind"].distinct_count == 50
+        assert columns(facts)["amount"].null_fraction == 0.25
+        assert columns(facts)["amount"].max == 19999
+        assert 10_000 < columns(facts)["id"].distinct_count <= 20_000
+
+    def test_budget_and_cache(self, file_engine):
+        with file_engine.begin() as connection:
+            for i in range(100):
+                connection.exec_driver_sql(f"create table t{i} (id integer primary key, value integer)")
+
+        database = DatabaseReflector().reflect(file_engine)
+        collector = StatisticsCollector()
+
+        # no time at all: nothing or little is done, the rest continues in the background
+
+        partial = collector.annotate(file_engine, database, budget=0)
+
+        assert sum(1 for table in tables(partial).values() if table.statistics is None) > 0
+
+        complete = collector.annotate(file_engine, database, budget=30)
+
+        assert all(table.statistics is not None for table in tables(complete).values())
+
+        # cached
+
+        statistics = tables(complete)["t5"].statistics
+
+        assert tables(collector.annotate(file_engine, database, budget=0))["t5"].statistics is statistics
+
+        collector.invalidate()
+
+        assert tables(collector.annotate(file_engine, database))["t5"].statistics is not statistics
+
+    def test_failure_is_cached(self, file_engine, caplog):
+        database = DatabaseReflector().reflect(file_engine)
+
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql("drop table order_items")
+
+        collector = StatisticsCollector()
+        calls = []
+
+        collect = collector.collect
+        def counting(connection, table):
+            calls.append(table.name)
+            return collect(connection, table)
+
+        collector.collect = counting
+
+        with caplog.at_level("WARNING", logger="cube.statistics"):
+            annotated = collector.annotate(file_engine, database, tables=["order_items"], budget=30)
+
+        assert tables(annotated)["order_items"].statistics is None
+        assert "statistics of" in caplog.text
+
+        # not retried before the ttl expires
+
+        collector.annotate(file_engine, database, tables=["order_items"], budget=30)
+
+        assert calls == ["order_items"]
+
+    def test_sampled_without_key(self, file_engine):
+        with file_engine.begin() as connection:
+            connection.exec_driver_sql("create table events (kind varchar(10), amount integer)")
+            connection.exec_driver_sql(
+                "with recursive n(i) as (select 1 union all select i + 1 from n where i < 20000) "
+                "insert into events select 'k' || (i % 50), i from n"
+            )
+
+        collector = StatisticsCollector()
+        collector.sample_size = 2000
+
+        events = tables(collector.annotate(file_engine, DatabaseReflector().reflect(file_engine)))["events"]
+
+        assert events.statistics.sample_size == 2000
+        assert columns(events)["kind"].distinct_count == 50
+
+    def test_cached_by_engine(self):
+        # in-memory databases share the url, one connection each is shared with the worker threads
+
+        engines = [create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}) for _ in range(2)]
+        for engine, rows in zip(engines, [1, 3]):
+            with engine.begin() as connection:
+                connection.exec_driver_sql("create table facts (id integer primary key)")
+                connection.execute(text("insert into facts values (:id)"), [{"id": i} for i in range(rows)])
+
+        collector = StatisticsCollector()
+        reflector = DatabaseReflector()
+
+        assert [tables(collector.annotate(engine, reflector.reflect(engine)))["facts"].statistics.row_count for engine in engines] == [1, 3]
@@ -0,0 +1,74 @@
+"""
+load test of the event hub with simulated websocket subscribers.
+
+    python benchmarks/bench_event_hub.py [subscribers] [events] [slow fraction] [events per tick]
+
+Every subscriber listens to the same topic, a fraction of them is slow - every send takes five seconds.
+Reports the time until every fast subscriber got every event, the frames sent and the messages dropped, for the
+"drop" policy and the "disconnect" policy.
+"""
+import asyncio
+import sys
+import time
+
+from portal.server.event_hub import EventHub
+
+class SimulatedSocket:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.frames = 0
+        self.received = 0
+
+    async def send_text(self, text: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        self.frames += 1
+        self.received += text.count('"event_name"')
+
+    async def close(self, code: int, reason: str = ""):
+        pass
+
+async def run(policy: str, subscribers: int, events: int, slow_fraction: float, per_tick: int):
+    hub = EventHub()
+    hub.slow_consumer_policy = policy
+
+    sockets = [SimulatedSocket(5.0 if i < subscribers * slow_fraction else 0.0) for i in range(subscribers)]
+    for i, socket in enumerate(sockets):
+        hub.subscribe(hub.connect(f"client-{i}", socket), "Tick")
+
+    fast = [socket for socket in sockets if not socket.delay]
+
+    start = time.perf_counter()
+    for i in range(events):
+        hub.publish({"value": i}, event_name="Tick")
+        if i % per_tick == per_tick - 1:
+            await asyncio.sleep(hub.tick_interval) # the next tick
+
+    while sum(socket.received for socket in fast) < len(fast) * events:
+        await asyncio.sleep(0.01)
+
+    elapsed = time.perf_counter() - start
+
+    statistics = hub.get_statistics()
+    frames = sum(socket.frames for socket in sockets)
+    dropped = sum(connection.dropped for connection in hub.connections.values())
+
+    print(f"{policy:<12} {elapsed * 1000:10.1f} ms {len(fast) * events / elapsed:14,.0f} deliveries/s "
+          f"{frames:10,} frames {dropped:10,} dropped {subscribers - statistics['connections']:8,} disconnected")
+
+    hub.destroy()
+
+def main():
+    subscribers = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    slow_fraction = float(sys.argv[3]) if len(sys.argv) > 3 else 0.01
+    per_tick = int(sys.argv[4]) if len(sys.argv) > 4 else 50 # below the queue size, so fast subscribers lose nothing
+
+    print(f"{subscribers:,} subscribers, {events:,} events, {per_tick} per tick, {slow_fraction:.0%} slow\n")
+
+    for policy in ["drop", "disconnect"]:
+        asyncio.run(run(policy, subscribers, events, slow_fraction, per_tick))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+measures the throughput of `ChatMessage` and `ManifestChanged` events through the event manager and the in-process
+transport, for several batch sizes.
+
+    python benchmarks/bench_local_events.py [events]
+
+A batch size of 1 delivers every event on its own, which is what a transport sending every event separately does.
+Reports the time a publisher spends in `send_event` and the time until the subscriber received every event.
+"""
+import asyncio
+import sys
+import time
+
+from aspyx_event import EventManager
+
+from portal.interface import ChatMessage
+from portal.interface.portal_model import ManifestChanged
+from portal.server.local_events import LocalEventProvider
+
+async def run(name: str, create_event, events: int, batch_size: int):
+    provider = LocalEventProvider()
+    provider.batch_size = batch_size
+    provider.max_queued_events = max(provider.max_queued_events, batch_size)
+
+    manager = EventManager(provider)
+
+    received = 0
+    done = asyncio.Event()
+
+    def on_event(event):
+        nonlocal received
+        received += 1
+        if received == events:
+            done.set()
+
+    await manager.subscribe(type(create_event(0)), on_event)
+
+    payloads = [create_event(i) for i in range(events)]
+
+    start = time.perf_counter()
+    for event in payloads:
+        await manager.send_event(event)
+    published = time.perf_counter() - start
+
+    await done.wait()
+    elapsed = time.perf_counter() - start
+
+    await provider.stop()
+
+    print(f"{name:<16} {batch_size:>6} {events / published:14,.0f} {events / elapsed:14,.0f} {provider.batches:8,} {provider.max_queue_depth:10,}")
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print(f"{'event':<16} {'batch':>6} {'publish/s':>14} {'deliver/s':>14} {'batches':>8} {'max depth':>10}")
+
+    for name, create_event in [
+        ("ChatMessage", lambda i: ChatMessage(content=f"chunk {i}", questionId="q1")),
+        ("ManifestChanged", lambda i: ManifestChanged(name=f"mfe{i % 50}", version=f"{i:016x}"))
+    ]:
+        for batch_size in [1, 10, 100, 1000]:
+            asyncio.run(run(name, create_event, events, batch_size))
+
+if __name__ == "__main__":
+    main()
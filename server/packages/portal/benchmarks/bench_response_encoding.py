@@ -0,0 +1,145 @@
+"""
+compares the cpu time of json encoding and compression with the bytes saved, for the biggest payloads:
+deployments, dashboard configurations and orm metadata trees.
+
+    python benchmarks/bench_response_encoding.py [scale]
+
+brotli is measured if installed.
+"""
+import gzip
+import json
+import sys
+import time
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import Column, Integer, String, Numeric, Date, ForeignKey
+from sqlalchemy.orm import DeclarativeBase, relationship
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from cube.interface.dashboard_service import Dashboard
+from cube.server.orm import MetadataCache
+from portal.interface.portal_model import Deployment, Manifest, Feature, ClientConstraints
+from portal.server.response_encoding import dump_json
+
+def create_deployment(scale: int) -> Deployment:
+    modules = {}
+
+    for m in range(scale):
+        features = [
+            Feature(
+                id=f"mfe{m}-feature{f}",
+                label=f"Feature {f} of module {m}",
+                path=f"/mfe{m}/feature{f}",
+                icon="📄",
+                component=f"Feature{f}",
+                tags=["reporting", "beta"] if f % 3 == 0 else [],
+                permissions=["read"],
+                features=[],
+                clients=ClientConstraints(screen_sizes=["md", "lg"], platforms=["web"], min_width=768) if f % 2 == 0 else None
+            )
+            for f in range(20)
+        ]
+
+        modules[f"mfe{m}"] = Manifest(name=f"mfe{m}", uri=f"http://localhost:{3000 + m}", module=f"Mfe{m}Module", features=features)
+
+    return Deployment(modules=modules)
+
+def create_dashboards(scale: int) -> list:
+    dashboards = []
+
+    for d in range(scale):
+        widgets = [
+            {
+                "id": str(uuid4()),
+                "type": "chart",
+                "title": f"Revenue by month {w}",
+                "layout": {"x": w % 4 * 3, "y": w // 4 * 4, "w": 3, "h": 4},
+                "query": {
+                    "measures": ["OrderItems.revenue", "OrderItems.quantity"],
+                    "dimensions": ["Customers.country", "Products.category"],
+                    "timeDimensions": [{"dimension": "Orders.orderDate", "granularity": "month", "dateRange": ["2023-01-01", "2023-12-31"]}],
+                    "filters": [{"member": "Customers.country", "operator": "equals", "values": ["DE", "US"]}]
+                },
+                "options": {"stacked": True, "legend": "bottom", "colors": ["#1f77b4", "#ff7f0e", "#2ca02c"]}
+            }
+            for w in range(24)
+        ]
+
+        dashboards.append(Dashboard(id=uuid4(), version_id=1, name=f"Dashboard {d}", configuration=json.dumps({"widgets": widgets})))
+
+    return dashboards
+
+def create_metadata(scale: int):
+    class Base(DeclarativeBase):
+        pass
+
+    Base.classes = []
+
+    for i in range(scale * 20):
+        attributes = {
+            "__tablename__": f"table_{i}",
+            "id": Column(Integer, primary_key=True),
+            "name": Column(String(100)),
+            "amount": Column(Numeric(10, 2)),
+            "created": Column(Date),
+        }
+
+        if i > 0:
+            attributes["parent_id"] = Column(Integer, ForeignKey(f"table_{i - 1}.id"))
+            attributes["parent"] = relationship(f"Entity{i - 1}")
+
+        Base.classes.append(type(f"Entity{i}", (Base,), attributes))
+
+    return MetadataCache().get_metadata(Base, "postgres")
+
+def measure(run, repeat: int = 5) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best * 1000
+
+def compare(name: str, payload):
+    standard = measure(lambda: json.dumps(jsonable_encoder(payload)).encode())
+    fast = measure(lambda: dump_json(payload))
+
+    body = dump_json(payload)
+
+    print(f"\n{name}: {len(body) / 1024:,.0f} kB")
+    print(f"  {'jsonable_encoder + json':<24} {standard:9.2f} ms")
+    print(f"  {'orjson':<24} {fast:9.2f} ms")
+
+    compressors = [
+        ("gzip 1", lambda: gzip.compress(body, 1)),
+        ("gzip 6", lambda: gzip.compress(body, 6)),
+        ("gzip 9", lambda: gzip.compress(body, 9))
+    ]
+
+    if brotli is not None:
+        compressors += [
+            ("brotli 4", lambda: brotli.compress(body, quality=4)),
+            ("brotli 11", lambda: brotli.compress(body, quality=11))
+        ]
+
+    for label, compress in compressors:
+        size = len(compress())
+        print(f"  {label:<24} {measure(compress):9.2f} ms   {size / 1024:9,.0f} kB   saved {100 - 100 * size / len(body):5.1f} %")
+
+def main():
+    scale = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    compare(f"deployment ({scale} modules)", create_deployment(scale))
+    compare(f"dashboards ({scale})", create_dashboards(scale))
+    compare(f"metadata ({scale * 20} tables)", create_metadata(scale))
+
+if __name__ == "__main__":
+    main()
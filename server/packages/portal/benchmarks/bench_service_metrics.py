@@ -0,0 +1,74 @@
+"""
+measures the overhead the service metrics add to a service method call.
+
+    python benchmarks/bench_service_metrics.py [calls]
+
+Compares a direct call, a call through an around advice which only proceeds - the price of any aop advice -
+and a call through the metrics advice.
+"""
+import sys
+import time
+from types import SimpleNamespace
+
+from aspyx.di.aop.aop import Aspects, FunctionAspect, Invocation, MethodAspect
+from aspyx_service import ServiceManager
+
+from portal.server.service_metrics import ServiceMetrics
+
+class EchoService:
+    def echo(self, value: int) -> int:
+        pass
+
+class EchoServiceImpl(EchoService):
+    def echo(self, value: int) -> int:
+        return value
+
+class Proceed:
+    def proceed(self, invocation: Invocation):
+        return invocation.proceed()
+
+def chain(instance, aspect_instance, aspect_function):
+    func = EchoServiceImpl.echo
+    method = MethodAspect(instance, func)
+    aspects = Aspects([], [FunctionAspect(aspect_instance, aspect_function, method), method], [], [])
+
+    return lambda value: Invocation(func, aspects).call(instance, value)
+
+def measure(name: str, call, calls: int, baseline: float = None) -> float:
+    best = None
+    for _ in range(5):
+        start = time.perf_counter()
+        for i in range(calls):
+            call(i)
+        elapsed = (time.perf_counter() - start) / calls
+
+        best = elapsed if best is None else min(best, elapsed)
+
+    overhead = f"   +{(best - baseline) * 1e6:6.3f} µs" if baseline is not None else ""
+    print(f"{name:<20} {best * 1e6:8.3f} µs / call{overhead}")
+
+    return best
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    ServiceManager.descriptors_by_name = {"echo-service": SimpleNamespace(type=EchoService)}
+
+    service = EchoServiceImpl()
+    metrics = ServiceMetrics()
+
+    direct = measure("direct", service.echo, calls)
+    advised = measure("around advice", chain(service, Proceed(), Proceed.proceed), calls, direct)
+    measure("metrics advice", chain(service, metrics, ServiceMetrics.measure), calls, advised)
+
+    # rendering
+
+    for i in range(100):
+        metrics.methods[i] = metrics.methods[EchoServiceImpl.echo].__class__("echo-service", f"method_{i}", len(metrics.bounds))
+
+    start = time.perf_counter()
+    text = metrics.render()
+    print(f"\nrender 101 methods   {(time.perf_counter() - start) * 1000:8.3f} ms, {len(text) / 1024:.0f} kB")
+
+if __name__ == "__main__":
+    main()
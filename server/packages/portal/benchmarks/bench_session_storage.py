@@ -0,0 +1,119 @@
+"""
+measures the get / put throughput of the session storages under contention.
+
+    python benchmarks/bench_session_storage.py [sessions]
+
+The memory storages are shared by threads of one process, the sqlite storage by worker processes.
+Every operation is a read, every tenth additionally a store - roughly a request and a login or token refresh.
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from aspyx_service import SessionManager
+
+from portal.server.session_storage import ShardedMemoryStorage, SQLiteStorage
+
+DURATION = 2.0 # seconds per run
+
+class LockedStorage(SessionManager.Storage):
+    """
+    the TTLCache of the InMemoryStorage is not thread safe, this is what a guarded version costs
+    """
+    def __init__(self, storage: SessionManager.Storage):
+        self.storage = storage
+        self.lock = threading.Lock()
+
+    def store(self, token, session, ttl_seconds):
+        with self.lock:
+            self.storage.store(token, session, ttl_seconds)
+
+    def read(self, token):
+        with self.lock:
+            return self.storage.read(token)
+
+def work(storage: SessionManager.Storage, sessions: int, seed: int, deadline: float) -> int:
+    operations = 0
+    i = seed
+
+    while time.perf_counter() < deadline:
+        token = f"token-{i % sessions}"
+
+        if storage.read(token) is None or operations % 10 == 0:
+            storage.store(token, {"user": token, "roles": ["user"]}, 3600)
+
+        operations += 1
+        i += 7919 # a prime, to spread the tokens
+
+    return operations
+
+def run_threads(storage: SessionManager.Storage, sessions: int, threads: int) -> float:
+    counts = [0] * threads
+    deadline = time.perf_counter() + DURATION
+
+    def run(index: int):
+        counts[index] = work(storage, sessions, index, deadline)
+
+    workers = [threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    return sum(counts) / DURATION
+
+def process_work(path: str, sessions: int, seed: int, start: float, results):
+    storage = SQLiteStorage(path)
+
+    # all processes start at the same time, after the connections are opened
+
+    time.sleep(max(0.0, start - time.time()))
+
+    results.put(work(storage, sessions, seed, time.perf_counter() + DURATION))
+
+    storage.close()
+
+def run_processes(path: str, sessions: int, processes: int) -> float:
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    start = time.time() + 2.0
+
+    workers = [context.Process(target=process_work, args=(path, sessions, i, start, results)) for i in range(processes)]
+    for worker in workers:
+        worker.start()
+
+    total = sum(results.get() for _ in workers)
+
+    for worker in workers:
+        worker.join()
+
+    return total / DURATION
+
+def report(name: str, parallelism: int, throughput: float):
+    print(f"{name:<28} {parallelism:3}   {throughput:12,.0f} ops/s")
+
+def main():
+    sessions = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+
+    print(f"{sessions} sessions, {DURATION} s per run\n")
+    print(f"{'storage':<28} {'n':>3}   {'throughput':>12}")
+
+    for threads in (1, 4, 16):
+        report("InMemoryStorage + lock", threads, run_threads(LockedStorage(SessionManager.InMemoryStorage(max_size=sessions, ttl=3600)), sessions, threads))
+        report("ShardedMemoryStorage", threads, run_threads(ShardedMemoryStorage(max_size=sessions, ttl=3600), sessions, threads))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "sessions.db")
+
+        storage = SQLiteStorage(path)
+        report("SQLiteStorage (threads)", 4, run_threads(storage, sessions, 4))
+        storage.close()
+
+        for processes in (1, 4):
+            report("SQLiteStorage (processes)", processes, run_processes(path, sessions, processes))
+
+if __name__ == "__main__":
+    main()
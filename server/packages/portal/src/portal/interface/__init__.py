@@ -1,7 +1,7 @@
 from .portal_component import PortalComponent
 from .portal_service import PortalService
 from .portal_crud_service import PortalCRUDService
-from .chat_service import ChatService, ChatMessage, ChatQuestion
+from .chat_service import ChatService, ChatMessage, ChatQuestion, ChatChunk
 
 __all__ = [
     # portal_component
@@ -20,5 +20,6 @@ __all__ = [
 
     "ChatService",
     "ChatMessage",
-    "ChatQuestion"
+    "ChatQuestion",
+    "ChatChunk"
 ]
\ No newline at end of file
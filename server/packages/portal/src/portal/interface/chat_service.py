@@ -1,4 +1,5 @@
 from abc import abstractmethod
+from typing import Optional
 
 from pydantic import BaseModel
 
@@ -12,6 +13,17 @@ class ChatMessage(BaseModel):
 
 class ChatQuestion(BaseModel):
     question: str
+    questionId: str = ""
+
+class ChatChunk(BaseModel):
+    """
+    a part of a streamed answer. The last chunk of a stream is either `done` or carries an `error`
+    """
+    questionId: str
+    index: int
+    content: str = ""
+    done: bool = False
+    error: Optional[str] = None
 
 @service(name="chat-service", description="chat stuff")
 @rest("/api/chat/")
@@ -2,6 +2,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from uuid import UUID
 from typing import List, Dict, Optional, Literal
 
+from aspyx_event import event
+
 
 class ClientConstraints(BaseModel):
     model_config = ConfigDict(populate_by_name=True, extra='allow')
@@ -79,3 +81,12 @@ class Manifest(BaseModel):
 
 class Deployment(BaseModel):
     modules: Dict[str, Manifest]
+
+
+@event(durable=False)
+class ManifestChanged(BaseModel):
+    """
+    published whenever a manifest is added, changed or - with an empty version - removed
+    """
+    name: str
+    version: str
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+
+from aspyx.di import injectable
+from aspyx_service import FastAPIServer
+
+from portal.interface import ChatQuestion, ChatChunk
+
+# -------------------------
+# Answer generators
+# -------------------------
+
+class AnswerGenerator(ABC):
+    """
+    produces the answer of a question piece by piece
+    """
+    @abstractmethod
+    def generate(self, question: ChatQuestion) -> AsyncIterator[str]:
+        pass
+
+class EchoAnswerGenerator(AnswerGenerator):
+    """
+    local generator, which answers word by word - after `delay` seconds each - by repeating the question
+    """
+    # constructor
+
+    def __init__(self, delay: float = 0.0, repeat: int = 1):
+        self.delay = delay
+        self.repeat = repeat
+
+    # implement
+
+    async def generate(self, question: ChatQuestion) -> AsyncIterator[str]:
+        words = f"you asked: {question.question}".split()
+
+        for _ in range(self.repeat):
+            for word in words:
+                if self.delay > 0:
+                    await asyncio.sleep(self.delay)
+
+                yield word + " "
+
+# -------------------------
+# Streams
+# -------------------------
+
+class ChatStream:
+    """
+    The chunks of a single answer. A producer task pulls the chunks from the generator into a buffer of at most
+    `max_buffered_chunks` chunks, which the consumer iterates.
+    A consumer that does not make room within `slow_consumer_timeout` seconds loses the buffered chunks and
+    receives a final "slow consumer" error instead, which also stops the generator.
+    """
+    # constructor
+
+    def __init__(self, question_id: str, chunks: AsyncIterator[str], max_buffered_chunks: int, slow_consumer_timeout: float):
+        self.question_id = question_id
+        self.slow_consumer_timeout = slow_consumer_timeout
+        self.buffer: asyncio.Queue[ChatChunk] = asyncio.Queue(maxsize=max_buffered_chunks)
+        self.index = 0
+        self.cancelled = False
+        self.task = asyncio.create_task(self.produce(chunks))
+        self.task.add_done_callback(self.finished)
+
+    # internal
+
+    async def produce(self, chunks: AsyncIterator[str]):
+        try:
+            async for content in chunks:
+                if self.cancelled: # wait_for may swallow a cancellation
+                    raise asyncio.CancelledError()
+
+                if not await self.put(ChatChunk(questionId=self.question_id, index=self.index, content=content)):
+                    return
+
+                self.index += 1
+
+            await self.put(ChatChunk(questionId=self.question_id, index=self.index, done=True))
+        except asyncio.CancelledError:
+            self.close("cancelled")
+        except Exception as e:
+            await self.put(ChatChunk(questionId=self.question_id, index=self.index, error=str(e)))
+        finally:
+            aclose = getattr(chunks, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+    async def put(self, chunk: ChatChunk) -> bool:
+        if not self.buffer.full():
+            self.buffer.put_nowait(chunk)
+
+            return True
+
+        try:
+            await asyncio.wait_for(self.buffer.put(chunk), self.slow_consumer_timeout)
+
+            return True
+        except asyncio.TimeoutError:
+            self.close("slow consumer")
+
+            return False
+
+    def finished(self, task: asyncio.Task):
+        if task.cancelled(): # before it even started
+            self.close("cancelled")
+
+    def close(self, error: str):
+        # the error replaces whatever the consumer did not fetch yet
+
+        while not self.buffer.empty():
+            self.buffer.get_nowait()
+
+        self.buffer.put_nowait(ChatChunk(questionId=self.question_id, index=self.index, error=error))
+
+    # public
+
+    def cancel(self):
+        self.cancelled = True
+        self.task.cancel()
+
+    async def __aiter__(self) -> AsyncIterator[ChatChunk]:
+        while True:
+            chunk = await self.buffer.get()
+
+            yield chunk
+
+            if chunk.done or chunk.error is not None:
+                return
+
+@injectable()
+class ChatStreams:
+    """
+    the open answer streams by question id
+    """
+    # class properties
+
+    max_buffered_chunks = 64
+    slow_consumer_timeout = 5.0
+
+    # constructor
+
+    def __init__(self, generator: AnswerGenerator):
+        self.generator = generator
+        self.streams: Dict[str, ChatStream] = {}
+
+    # public
+
+    def open(self, question: ChatQuestion) -> ChatStream:
+        """
+        start answering the question, an open stream of the same question id is cancelled
+        """
+        question_id = question.questionId or str(uuid.uuid4())
+
+        self.cancel(question_id)
+
+        stream = ChatStream(question_id, self.generator.generate(question), self.max_buffered_chunks, self.slow_consumer_timeout)
+
+        self.streams[question_id] = stream
+
+        return stream
+
+    def get(self, question_id: str) -> Optional[ChatStream]:
+        return self.streams.get(question_id)
+
+    def cancel(self, question_id: str) -> bool:
+        stream = self.streams.pop(question_id, None)
+        if stream is None:
+            return False
+
+        stream.cancel()
+
+        return True
+
+    def release(self, stream: ChatStream):
+        """
+        called by the consumer when it is done, which stops a generator that is still running
+        """
+        if self.streams.get(stream.question_id) is stream:
+            del self.streams[stream.question_id]
+
+        stream.cancel()
+
+# -------------------------
+# Endpoint
+# -------------------------
+
+@injectable()
+class ChatStreamEndpoint:
+    """
+    Registers `POST /api/chat/stream`, which answers a `ChatQuestion` as server sent events - `chunk` events followed
+    by a final `done` or `error` event - and `POST /api/chat/cancel/{question_id}`.
+    A client closing the connection cancels its answer as well.
+    """
+    # constructor
+
+    def __init__(self, server: FastAPIServer, streams: ChatStreams):
+        self.streams = streams
+
+        server.fast_api.add_api_route("/api/chat/stream", self.stream, methods=["POST"], include_in_schema=False)
+        server.fast_api.add_api_route("/api/chat/cancel/{question_id}", self.cancel, methods=["POST"], include_in_schema=False)
+
+    # internal
+
+    async def events(self, stream: ChatStream) -> AsyncIterator[str]:
+        try:
+            async for chunk in stream:
+                event = "error" if chunk.error is not None else "done" if chunk.done else "chunk"
+
+                yield f"event: {event}\ndata: {chunk.model_dump_json()}\n\n"
+        finally:
+            self.streams.release(stream)
+
+    # endpoint
+
+    async def stream(self, question: ChatQuestion) -> StreamingResponse:
+        stream = self.streams.open(question)
+
+        return StreamingResponse(self.events(stream), media_type="text/event-stream", headers={
+            "cache-control": "no-cache",
+            "x-question-id": stream.question_id
+        })
+
+    async def cancel(self, question_id: str) -> dict:
+        return {"cancelled": self.streams.cancel(question_id)}
@@ -0,0 +1,95 @@
+from operator import attrgetter
+from typing import Callable, List, Optional, Tuple
+
+from ..interface.portal_model import ClientConstraints, ClientInfo
+
+ClientPredicate = Callable[[ClientInfo], bool]
+
+# the number of usual values of a client property and the rough share of clients passing a bound or a capability,
+# used to run the most selective checks first
+
+SCREEN_SIZES = 5
+ORIENTATIONS = 2
+PLATFORMS = 3
+BOUND = 0.5
+CAPABILITY = 0.5
+
+def accept_all(client_info: ClientInfo) -> bool:
+    return True
+
+def _one_of(attribute: str, values: List[str], domain: int) -> Tuple[float, ClientPredicate]:
+    get = attrgetter(attribute)
+    allowed = frozenset(values)
+
+    if len(allowed) == 1:
+        value, = allowed
+        return 1 / domain, lambda client_info: get(client_info) == value
+
+    return len(allowed) / domain, lambda client_info: get(client_info) in allowed
+
+def compile_constraints(constraints: Optional[ClientConstraints]) -> ClientPredicate:
+    """
+    compile the constraints of a feature into a predicate on the client, which is equivalent to checking them one
+    by one. Absent constraints are skipped and the remaining checks run from the most to the least selective one.
+    """
+    if not constraints:
+        return accept_all
+
+    checks: List[Tuple[float, ClientPredicate]] = []
+
+    # membership
+
+    if constraints.screen_sizes:
+        checks.append(_one_of("screen_size", constraints.screen_sizes, SCREEN_SIZES))
+    if constraints.orientation:
+        checks.append(_one_of("orientation", constraints.orientation, ORIENTATIONS))
+    if constraints.platforms:
+        checks.append(_one_of("platform", constraints.platforms, PLATFORMS))
+
+    # bounds
+
+    min_width, max_width = constraints.min_width, constraints.max_width
+    if min_width is not None:
+        checks.append((BOUND, lambda client_info: client_info.width >= min_width))
+    if max_width is not None:
+        checks.append((BOUND, lambda client_info: client_info.width <= max_width))
+
+    min_height, max_height = constraints.min_height, constraints.max_height
+    if min_height is not None:
+        checks.append((BOUND, lambda client_info: client_info.height >= min_height))
+    if max_height is not None:
+        checks.append((BOUND, lambda client_info: client_info.height <= max_height))
+
+    # capabilities, the client must have all of them
+
+    if constraints.capabilities:
+        required = frozenset(constraints.capabilities)
+
+        if len(required) == 1:
+            capability, = required
+            checks.append((CAPABILITY, lambda client_info: capability in client_info.capabilities))
+        else:
+            checks.append((CAPABILITY ** len(required), lambda client_info: required.issubset(client_info.capabilities)))
+
+    if not checks:
+        return accept_all
+
+    checks.sort(key=lambda check: check[0])
+
+    predicates = tuple(predicate for _, predicate in checks)
+
+    if len(predicates) == 1:
+        return predicates[0]
+
+    if len(predicates) == 2:
+        first, second = predicates
+        return lambda client_info: first(client_info) and second(client_info)
+
+    def matches(client_info: ClientInfo) -> bool:
+        for predicate in predicates:
+            if not predicate(client_info):
+                return False
+
+        return True
+
+    return matches
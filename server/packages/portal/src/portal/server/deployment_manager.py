@@ -1,18 +1,27 @@
 from __future__ import annotations
 
+import asyncio
 import dataclasses
-from typing import Dict, List
+import hashlib
+import threading
+from operator import attrgetter
+from typing import Callable, Dict, List, Optional, Tuple
 from abc import ABC
 
 import json
 
-from aspyx.di import injectable, inject
+from aspyx.di import injectable, inject, on_running, on_destroy
+from aspyx.di.configuration import inject_value
+from aspyx_event import EventManager
 
 from ..interface.portal_crud_service import PortalCRUDService
-from ..interface.portal_model import Deployment, Manifest, Feature, DeploymentRequest, ClientInfo, ClientConstraints
+from ..interface.portal_model import Deployment, Manifest, Feature, DeploymentRequest, ClientInfo, ClientConstraints, ManifestChanged
 
 from .permission_manager import PermissionManager
 from .feature_manager import FeatureManager
+from .manifest_snapshot import ManifestSnapshots
+from .event_hub import EventHub
+from .client_constraints import ClientPredicate, compile_constraints
 
 @dataclasses.dataclass
 class FilterContext:
@@ -80,30 +89,139 @@ class FeatureFeatureFilter(AbstractFeatureFilter):
 
 
 @injectable()
-class DeploymentManager:
-    # properties
+class MicrofrontendChanges:
+    """
+    tells the listeners - like the deployment manager - that microfrontends were created or updated
+    """
+    # constructor
+
+    def __init__(self):
+        self.listeners: List[Callable[[], None]] = []
+
+    # public
 
-    microfrontends : Dict[str, Manifest] = {}
-    manifest_filter : List[ManifestFilter] = []
-    feature_filter  : List[ManifestFilter] = []
+    def add_listener(self, listener: Callable[[], None]):
+        self.listeners.append(listener)
 
+    def changed(self):
+        for listener in self.listeners:
+            listener()
+
+@injectable()
+class DeploymentManager:
     # constructor
 
     def __init__(self, crud_service: PortalCRUDService):
         self.crud_service = crud_service
 
+        self.microfrontends : Dict[str, Manifest] = {}
+        self.versions : Dict[str, str] = {}
+        self.predicates : Tuple[Optional[Dict[str, Manifest]], Dict[int, ClientPredicate]] = (None, {})
+        self.event_manager : Optional[EventManager] = None
+        self.manifest_filter : List[ManifestFilter] = []
+        self.feature_filter  : List[FeatureFilter] = []
+
+        self.snapshots : Optional[ManifestSnapshots] = None
+        self.watch_interval = 1.0 # seconds
+        self.watcher : Optional[threading.Thread] = None
+        self.stopped = threading.Event()
+
     #
 
     def register_manifest_filter(self, filter: ManifestFilter):
         self.manifest_filter.append(filter)
 
-    def register_feature_filter(self, filter: ManifestFilter):
+    def register_feature_filter(self, filter: FeatureFilter):
         self.feature_filter.append(filter)
 
+    @inject()
+    def set_event_manager(self, event_manager: EventManager):
+        self.event_manager = event_manager
+
+    @inject()
+    def set_event_hub(self, event_hub: EventHub):
+        event_hub.coalesce("ManifestChanged", attrgetter("name")) # clients only need the latest version
+
+    @inject()
+    def set_microfrontend_changes(self, changes: MicrofrontendChanges):
+        changes.add_listener(self.reload)
+
+    @inject_value("MANIFEST_SNAPSHOTS", default="")
+    def set_snapshot_directory(self, directory: str):
+        # if set, the manifests are shared between processes, see ManifestSnapshots
+
+        self.snapshots = ManifestSnapshots(directory) if directory else None
+
+    @inject_value("MANIFEST_WATCH_INTERVAL", default=1.0)
+    def set_watch_interval(self, interval: float):
+        self.watch_interval = interval
+
     # internal
 
+    @staticmethod
+    def manifest_version(manifest: Manifest) -> str:
+        return hashlib.sha1(manifest.model_dump_json().encode()).hexdigest()[:16]
+
+    def notify_changes(self, microfrontends: Dict[str, Manifest]):
+        """
+        publish a `ManifestChanged` for every manifest that differs from the last reload
+        """
+        versions = {name: self.manifest_version(manifest) for name, manifest in microfrontends.items()}
+
+        changes = [(name, version) for name, version in versions.items() if self.versions.get(name) != version]
+        changes.extend((name, "") for name in self.versions if name not in versions)
+
+        self.versions = versions
+
+        if self.event_manager is not None and changes:
+            self.send_events([ManifestChanged(name=name, version=version) for name, version in changes])
+
+    def send_events(self, events: List[ManifestChanged]):
+        async def send():
+            for event in events:
+                await self.event_manager.send_event(event)
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(send()) # reloads run on threads without a loop
+        else:
+            loop.create_task(send())
+
+    def watch(self):
+        """
+        notify the local clients of the generations published by the loader, since events do not leave the process
+        """
+        generation = 0
+        while True:
+            current = self.snapshots.current_generation()
+            if current != generation:
+                generation = current
+
+                self.notify_changes(self.snapshots.get_manifests())
+
+            if self.stopped.wait(self.watch_interval):
+                return
+
+    def get_predicates(self, microfrontends: Dict[str, Manifest]) -> Dict[int, ClientPredicate]:
+        """
+        return the compiled client constraints of all features by feature id(), compiled once per set of manifests.
+        Keeping the manifests referenced keeps the ids valid.
+        """
+        compiled_for, predicates = self.predicates
+        if compiled_for is not microfrontends:
+            predicates = {
+                id(feature): compile_constraints(feature.clients)
+                for manifest in microfrontends.values()
+                for feature in manifest.features
+            }
+
+            self.predicates = (microfrontends, predicates)
+
+        return predicates
+
     def _matches_constraints(self, feature: Feature, client_info: ClientInfo) -> bool:
-        """Check if a feature's constraints match the client info"""
+        """Check if a feature's constraints match the client info, see compile_constraints for the compiled form"""
         if not feature.clients:
             return True
 
@@ -143,7 +261,10 @@ class DeploymentManager:
     def _filter_manifests(self, context: FilterContext) -> List[Manifest]:
         filtered_manifests = []
 
-        for manifest in self.microfrontends.values():
+        microfrontends = self.get_microfrontends()
+        predicates = self.get_predicates(microfrontends)
+
+        for manifest in microfrontends.values():
             # Check if manifest passes all filters
             if all(f.accept(manifest, context) for f in self.manifest_filter):
                 # Filter features for this manifest
@@ -157,7 +278,7 @@ class DeploymentManager:
                         continue
 
                     # Check client constraints if client_info is provided
-                    if context.client_info and not self._matches_constraints(feature, context.client_info):
+                    if context.client_info and not predicates[id(feature)](context.client_info):
                         continue
 
                     # For features without a path (e.g., navigation), deduplicate by ID
@@ -188,10 +309,9 @@ class DeploymentManager:
 
         return filtered_manifests
 
-    # life cycle
+    def read_microfrontends(self) -> Dict[str, Manifest]:
+        microfrontends = {}
 
-    #TODO FOO @on_running()
-    def on_init(self):
         for mfe in self.crud_service.read_microfrontends():
             if mfe.enabled:
                 json_payload = json.loads(mfe.configuration)
@@ -206,13 +326,57 @@ class DeploymentManager:
                     features= features
                 )
 
-                self.microfrontends[manifest.name] = manifest
+                microfrontends[manifest.name] = manifest
 
-                print(manifest)
+        return microfrontends
+
+    # life cycle
+
+    @on_running()
+    def on_init(self):
+        # with snapshots, only the elected process reads the database
 
+        if self.snapshots is None or self.snapshots.acquire_loader():
+            self.reload()
+        else:
+            self.watcher = threading.Thread(target=self.watch, name="manifest-watch", daemon=True)
+            self.watcher.start()
+
+    @on_destroy()
+    def close_snapshots(self):
+        self.stopped.set()
+        if self.watcher is not None:
+            self.watcher.join()
+            self.watcher = None
+
+        if self.snapshots is not None:
+            self.snapshots.close()
 
     # public
 
+    def get_microfrontends(self) -> Dict[str, Manifest]:
+        if self.snapshots is not None:
+            return self.snapshots.get_manifests()
+
+        return self.microfrontends
+
+    def reload(self):
+        """
+        reread the enabled microfrontends, - with snapshots - publish them to all processes and notify the clients of
+        changed manifests
+        """
+        microfrontends = self.read_microfrontends()
+
+        if self.snapshots is not None:
+            self.snapshots.publish(microfrontends.values())
+        else:
+            self.microfrontends = microfrontends
+            self.get_predicates(microfrontends)
+
+        # clients refetch only after the new manifests are in place
+
+        self.notify_changes(microfrontends)
+
     def create_deployment(self, request: DeploymentRequest) -> Deployment:
         print(request.client_info)
 
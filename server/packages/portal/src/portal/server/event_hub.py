@@ -0,0 +1,407 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import WebSocket, WebSocketDisconnect, status
+
+from aspyx.di import injectable, inject, on_destroy
+from aspyx.di.configuration import inject_value
+from aspyx.util import get_serializer
+from aspyx_event import EventManager
+from aspyx_service import FastAPIServer
+
+# -------------------------
+# Connection
+# -------------------------
+
+class EventConnection:
+    """
+    A client connection with a bounded queue of serialized messages, which a writer task sends.
+    All messages queued since the last send go out as a single frame - a `batch` message if there are several.
+    A full queue either drops the oldest message - policy "drop" - or closes the connection - policy "disconnect".
+    """
+    __slots__ = [
+        "client_id",
+        "websocket",
+        "topics",
+        "queue",
+        "max_queued_messages",
+        "policy",
+        "dropped",
+        "closed",
+        "wakeup",
+        "writer"
+    ]
+
+    # constructor
+
+    def __init__(self, client_id: str, websocket: WebSocket, max_queued_messages: int, policy: str):
+        self.client_id = client_id
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: Deque[str] = deque()
+        self.max_queued_messages = max_queued_messages
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self.wakeup = asyncio.Event()
+        self.writer = asyncio.create_task(self.write())
+
+    # public
+
+    def send(self, message: str) -> bool:
+        """
+        queue a serialized message, return `False` if the connection is - or just got - closed
+        """
+        if self.closed:
+            return False
+
+        if len(self.queue) >= self.max_queued_messages:
+            if self.policy == "disconnect":
+                self.close(status.WS_1008_POLICY_VIOLATION, "slow consumer")
+
+                return False
+
+            self.queue.popleft()
+            self.dropped += 1
+
+        self.queue.append(message)
+        self.wakeup.set()
+
+        return True
+
+    def close(self, code: int = status.WS_1000_NORMAL_CLOSURE, reason: str = ""):
+        if not self.closed:
+            self.closed = True
+            self.queue.clear()
+            self.writer.cancel()
+
+            asyncio.create_task(self.close_socket(code, reason))
+
+    # internal
+
+    async def close_socket(self, code: int, reason: str):
+        try:
+            await self.websocket.close(code=code, reason=reason)
+        except Exception:
+            pass # already gone
+
+    async def write(self):
+        try:
+            while True:
+                await self.wakeup.wait()
+                self.wakeup.clear()
+
+                while self.queue:
+                    messages = list(self.queue)
+                    self.queue.clear()
+
+                    if len(messages) == 1:
+                        await self.websocket.send_text(messages[0])
+                    else:
+                        await self.websocket.send_text('{"type":"batch","messages":[' + ",".join(messages) + "]}")
+        except asyncio.CancelledError:
+            pass
+        except Exception:
+            self.close() # the receive loop notices the broken socket as well
+
+# -------------------------
+# Hub
+# -------------------------
+
+@injectable()
+class EventHub:
+    """
+    Fans out events to the websocket clients subscribed to them.
+
+    Events sent via the `EventManager` reach the hub through one subscription per event name, which exists as long
+    as a client listens to that name. Published events are collected for `tick_interval` seconds. Events of the same name and coalescing key replace
+    each other within a tick, so only the latest state goes out. At the end of the tick every event is serialized once
+    and queued on the connections found in the topic index.
+    """
+    # class properties
+
+    logger = logging.getLogger("portal.event_hub")
+
+    tick_interval = 0.02
+    max_queued_messages = 256
+    slow_consumer_policy = "drop" # or "disconnect"
+
+    # constructor
+
+    def __init__(self):
+        self.connections: Dict[str, EventConnection] = {}
+        self.topics: Dict[str, Set[EventConnection]] = {}
+        self.pending: Dict[Hashable, Tuple[str, Any]] = {}
+        self.sequence = 0
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[int] = None
+        self.flush_handle: Optional[asyncio.TimerHandle] = None
+        self.event_manager: Optional[EventManager] = None
+        self.forwarded: Dict[str, Optional[str]] = {} # event name -> subscription id of the event manager
+        self.keys: Dict[str, Callable[[Any], Hashable]] = {} # event name -> coalescing key of forwarded events
+        self.published = 0
+        self.coalesced = 0
+
+    @inject()
+    def set_event_manager(self, event_manager: EventManager):
+        self.event_manager = event_manager
+
+    # configuration
+
+    @inject_value("EVENT_QUEUE_SIZE", default=max_queued_messages)
+    def set_max_queued_messages(self, max_queued_messages: int):
+        self.max_queued_messages = max_queued_messages
+
+    @inject_value("EVENT_SLOW_CONSUMER", default=slow_consumer_policy)
+    def set_slow_consumer_policy(self, slow_consumer_policy: str):
+        self.slow_consumer_policy = slow_consumer_policy
+
+    # lifecycle
+
+    @on_destroy()
+    def destroy(self):
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+
+        for connection in list(self.connections.values()):
+            connection.writer.cancel()
+
+    # connections
+
+    def connect(self, client_id: str, websocket: WebSocket) -> EventConnection:
+        self.loop = asyncio.get_running_loop()
+        self.thread = threading.get_ident()
+
+        previous = self.connections.get(client_id)
+        if previous is not None:
+            self.disconnect(previous)
+            previous.close(status.WS_1000_NORMAL_CLOSURE, "replaced")
+
+        connection = EventConnection(client_id, websocket, self.max_queued_messages, self.slow_consumer_policy)
+
+        self.connections[client_id] = connection
+
+        return connection
+
+    def disconnect(self, connection: EventConnection):
+        for topic in connection.topics:
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.topics[topic]
+                    self.stop_forwarding(topic)
+
+        connection.topics.clear()
+
+        if self.connections.get(connection.client_id) is connection:
+            del self.connections[connection.client_id]
+
+    def subscribe(self, connection: EventConnection, event_name: str):
+        connection.topics.add(event_name)
+        self.topics.setdefault(event_name, set()).add(connection)
+
+    def unsubscribe(self, connection: EventConnection, event_name: str) -> bool:
+        if event_name not in connection.topics:
+            return False
+
+        connection.topics.discard(event_name)
+
+        subscribers = self.topics[event_name]
+        subscribers.discard(connection)
+        if not subscribers:
+            del self.topics[event_name]
+            self.stop_forwarding(event_name)
+
+        return True
+
+    # event manager
+
+    def coalesce(self, event_name: str, key: Callable[[Any], Hashable]):
+        """
+        coalesce forwarded events of the given name by the key computed from the event
+        """
+        self.keys[event_name] = key
+
+    def publish_forwarded(self, event_name: str, event: Any):
+        key = self.keys.get(event_name)
+
+        self.publish(event, key=key(event) if key is not None else None, event_name=event_name)
+
+    async def forward(self, event_name: str):
+        """
+        make sure that events of the given name sent via the event manager are published to the clients
+        """
+        if self.event_manager is None or event_name in self.forwarded or event_name not in EventManager.events_by_name:
+            return
+
+        self.forwarded[event_name] = None # reserved while subscribing
+
+        subscription_id = await self.event_manager.subscribe(
+            event_name,
+            lambda event: self.publish_forwarded(event_name, event),
+            name=f"ws_broadcast_{event_name}",
+            per_process=True,
+            metadata={
+                "websocket": True,
+                "channel": f"ws_broadcast_{event_name}#ephemeral"
+            }
+        )
+
+        if event_name in self.forwarded and event_name in self.topics:
+            self.forwarded[event_name] = subscription_id
+        else:
+            await self.event_manager.unsubscribe(subscription_id) # the last client left meanwhile
+
+    def stop_forwarding(self, event_name: str):
+        subscription_id = self.forwarded.pop(event_name, None)
+        if subscription_id is not None:
+            asyncio.get_running_loop().create_task(self.event_manager.unsubscribe(subscription_id))
+
+    # public
+
+    def publish(self, event: Any, key: Optional[Hashable] = None, event_name: Optional[str] = None):
+        """
+        publish an event to the subscribed clients with the next tick. The name defaults to the name of the `@event`.
+        Events with a `key` are coalesced with earlier events of the same name and key of the current tick.
+        Can be called from any thread.
+        """
+        if event_name is None:
+            descriptor = EventManager.events.get(type(event))
+            event_name = descriptor.name if descriptor is not None else type(event).__name__
+
+        if event_name not in self.topics:
+            return # nobody listens
+
+        loop = self.loop
+        if loop is None or loop.is_closed():
+            return
+
+        if threading.get_ident() != self.thread:
+            loop.call_soon_threadsafe(self.add, event_name, event, key)
+        else:
+            self.add(event_name, event, key)
+
+    # internal
+
+    def add(self, event_name: str, event: Any, key: Optional[Hashable]):
+        self.published += 1
+
+        if key is None:
+            self.sequence += 1
+            self.pending[self.sequence] = (event_name, event)
+        else:
+            pending_key = (event_name, key)
+            if pending_key in self.pending:
+                self.coalesced += 1
+                del self.pending[pending_key] # keep the order of the latest
+
+            self.pending[pending_key] = (event_name, event)
+
+        if self.flush_handle is None:
+            self.flush_handle = self.loop.call_later(self.tick_interval, self.flush)
+
+    def flush(self):
+        self.flush_handle = None
+
+        pending = self.pending
+        self.pending = {}
+
+        timestamp = datetime.now().isoformat()
+        for event_name, event in pending.values():
+            subscribers = self.topics.get(event_name)
+            if not subscribers:
+                continue
+
+            try:
+                message = json.dumps({
+                    "type": "event",
+                    "event_name": event_name,
+                    "data": event if isinstance(event, dict) else get_serializer(type(event))(event),
+                    "timestamp": timestamp
+                })
+            except Exception as e:
+                self.logger.error(f"cannot serialize event {event_name}: {e}")
+                continue
+
+            for connection in list(subscribers):
+                if not connection.send(message):
+                    self.disconnect(connection)
+
+    # statistics
+
+    def get_statistics(self) -> Dict[str, int]:
+        return {
+            "connections": len(self.connections),
+            "topics": len(self.topics),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "dropped": sum(connection.dropped for connection in self.connections.values())
+        }
+
+# -------------------------
+# Endpoint
+# -------------------------
+
+@injectable()
+class EventHubEndpoint:
+    """
+    Registers the websocket `/ws/events/{client_id}`, which speaks the protocol of the `EventWebSocketClient`.
+    """
+    # constructor
+
+    def __init__(self, server: FastAPIServer, hub: EventHub):
+        self.hub = hub
+
+        server.fast_api.add_api_websocket_route("/ws/events/{client_id}", self.events)
+
+    # internal
+
+    async def handle(self, connection: EventConnection, message: dict) -> dict:
+        message_type = message.get("type")
+
+        if message_type == "ping":
+            return {"type": "pong"}
+
+        if message_type in ("subscribe", "unsubscribe"):
+            event_name = message.get("event_name")
+            if not event_name:
+                return {"type": "error", "message": "Missing event_name"}
+
+            if message_type == "subscribe":
+                self.hub.subscribe(connection, event_name)
+                await self.hub.forward(event_name)
+                success = True
+            else:
+                success = self.hub.unsubscribe(connection, event_name)
+
+            return {"type": f"{message_type}_response", "event_name": event_name, "success": success}
+
+        return {"type": "error", "message": f"Unknown message type: {message_type}"}
+
+    # endpoint
+
+    async def events(self, websocket: WebSocket, client_id: str):
+        await websocket.accept()
+
+        connection = self.hub.connect(client_id, websocket)
+        try:
+            while not connection.closed:
+                try:
+                    response = await self.handle(connection, json.loads(await websocket.receive_text()))
+                except json.JSONDecodeError:
+                    response = {"type": "error", "message": "Invalid JSON"}
+
+                connection.send(json.dumps(response))
+        except (WebSocketDisconnect, RuntimeError):
+            pass # closed by the client or by the hub
+        finally:
+            self.hub.disconnect(connection)
+            connection.close()
@@ -0,0 +1,151 @@
+import asyncio
+import collections
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy.pool import QueuePool
+
+from aspyx.di import injectable, on_destroy
+from aspyx.di.configuration import inject_value
+from aspyx_persistence import PersistentUnit
+from aspyx_service import HealthCheckManager, HealthStatus, health_checks, health_check
+
+from .service_metrics import ServiceMetrics
+
+@injectable()
+@health_checks()
+class LoadMonitor:
+    """
+    Health checks that report how loaded this process is, so that a load balancer sees an overloaded
+    instance - and sheds its traffic - before latency collapses:
+
+    - `event-loop-lag` the delay of timers on the event loop, measured by a task that sleeps `loop_lag_interval`
+    - `db-pool` the ratio of checked out connections of every connection pool
+    - `request-queue` the number of service method calls in progress
+
+    Every check reports its value in the details and turns into a warning once its threshold is exceeded.
+    """
+    # class properties
+
+    loop_lag_interval = 0.25 # seconds
+    loop_lag_samples = 8
+    max_loop_lag = 0.1 # seconds
+    max_pool_saturation = 0.9
+    max_queue_depth = 200
+
+    # constructor
+
+    def __init__(self, metrics: ServiceMetrics):
+        self.metrics = metrics
+
+        self.lags: Deque[float] = collections.deque(maxlen=self.loop_lag_samples)
+        self.task: Optional[asyncio.Task] = None
+
+    # configuration
+
+    @inject_value("HEALTH_MAX_LOOP_LAG", default=max_loop_lag)
+    def set_max_loop_lag(self, max_loop_lag: float):
+        self.max_loop_lag = max_loop_lag
+
+    @inject_value("HEALTH_MAX_POOL_SATURATION", default=max_pool_saturation)
+    def set_max_pool_saturation(self, max_pool_saturation: float):
+        self.max_pool_saturation = max_pool_saturation
+
+    @inject_value("HEALTH_MAX_QUEUE_DEPTH", default=max_queue_depth)
+    def set_max_queue_depth(self, max_queue_depth: int):
+        self.max_queue_depth = max_queue_depth
+
+    # internal
+
+    async def sample_loop_lag(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            start = loop.time()
+
+            await asyncio.sleep(self.loop_lag_interval)
+
+            self.lags.append(max(0.0, loop.time() - start - self.loop_lag_interval))
+
+    def pools(self) -> List[Tuple[str, QueuePool]]:
+        pools = {}
+        for unit in list(PersistentUnit.units.values()):
+            pool = unit.engine.pool
+            if isinstance(pool, QueuePool):
+                pools.setdefault(id(pool), (type(unit).__name__, pool))
+
+        return list(pools.values())
+
+    # public
+
+    def start(self):
+        """
+        start measuring the lag of the running event loop. Called by the first health check.
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.lags.clear()
+            self.task = loop.create_task(self.sample_loop_lag(), name="event-loop-lag")
+
+    def get_loop_lag(self) -> Optional[float]:
+        """
+        return the maximum lag of the recent samples in seconds or `None` if nothing was measured yet
+        """
+        return max(self.lags) if self.lags else None
+
+    def get_queue_depth(self) -> int:
+        return self.metrics.get_in_flight()
+
+    # lifecycle
+
+    @on_destroy()
+    def stop(self):
+        task = self.task
+        if task is not None and not task.done() and not task.get_loop().is_closed():
+            task.get_loop().call_soon_threadsafe(task.cancel)
+
+        self.task = None
+
+    # health
+
+    @health_check(name="event-loop-lag")
+    async def check_loop_lag(self, result: HealthCheckManager.Result):
+        self.start()
+
+        lag = self.get_loop_lag()
+        if lag is None:
+            result.set_status(HealthStatus.OK, "measuring")
+        elif lag > self.max_loop_lag:
+            result.set_status(HealthStatus.WARNING, f"lag {lag * 1000:.1f} ms exceeds {self.max_loop_lag * 1000:.1f} ms")
+        else:
+            result.set_status(HealthStatus.OK, f"lag {lag * 1000:.1f} ms")
+
+    @health_check(name="db-pool")
+    def check_pools(self, result: HealthCheckManager.Result):
+        details = []
+        status = HealthStatus.OK
+
+        for name, pool in self.pools():
+            checked_out = pool.checkedout()
+
+            if pool._max_overflow < 0: # unbounded
+                details.append(f"{name} {checked_out} connections")
+                continue
+
+            capacity = pool.size() + pool._max_overflow
+
+            details.append(f"{name} {checked_out}/{capacity} connections")
+            if checked_out / capacity > self.max_pool_saturation:
+                status = HealthStatus.WARNING
+                details[-1] += f" exceeds {self.max_pool_saturation:.0%}"
+
+        result.set_status(status, ", ".join(details))
+
+    @health_check(name="request-queue")
+    def check_queue(self, result: HealthCheckManager.Result):
+        depth = self.get_queue_depth()
+
+        if depth > self.max_queue_depth:
+            result.set_status(HealthStatus.WARNING, f"{depth} calls in progress exceed {self.max_queue_depth}")
+        else:
+            result.set_status(HealthStatus.OK, f"{depth} calls in progress")
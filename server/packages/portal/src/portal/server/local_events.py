@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from aspyx.di import injectable
+from aspyx.di.configuration import inject_value
+from aspyx_event import EventManager
+from aspyx_service import HealthCheckManager, HealthStatus, health_checks, health_check
+
+class LocalEnvelope(EventManager.Envelope[Any]):
+    """
+    in-process envelope, which passes the event itself - subscribers share the instance
+    """
+    # constructor
+
+    def __init__(self, event: Any):
+        super().__init__(event)
+
+        self.headers: Dict[str, str] = {}
+
+    # implement envelope
+
+    def encode(self) -> Any:
+        return self.event
+
+    def decode(self, message: Any) -> Any:
+        self.event = message
+
+        return message
+
+    def set(self, key: str, value: str):
+        self.headers[key] = value
+
+    def get(self, key: str) -> str:
+        return self.headers.get(key, "")
+
+class LocalEnvelopeFactory(EventManager.EnvelopeFactory):
+    def for_send(self, provider: EventManager.Provider, event: Any) -> EventManager.Envelope:
+        return LocalEnvelope(event)
+
+    def for_receive(self, provider: EventManager.Provider, message: Any, descriptor: EventManager.EventDescriptor) -> EventManager.Envelope:
+        return LocalEnvelope(message)
+
+@injectable()
+@health_checks()
+class LocalEventProvider(EventManager.Provider):
+    """
+    An in-process event transport, which stands in for NSQ on a single node.
+
+    `send` only queues the event. A flusher task delivers the queue in batches of up to `batch_size` events to the
+    subscriptions of the event manager, as soon as a batch is full or `linger` seconds after the first event of a
+    batch. Senders wait while `max_queued_events` events are queued - except subscribers sending from within a
+    delivery, which would otherwise wait for themselves.
+    The flusher runs on the loop of the first sender. Senders on other threads hand their events over to that loop,
+    and if the loop is gone the next sender starts a new flusher. A stopped - or cancelled - flusher delivers the
+    events still queued before it ends.
+    The health check `event-queue` reports the queue depth and the throughput.
+    """
+    # class properties
+
+    logger = logging.getLogger("portal.local_events")
+
+    batch_size = 100
+    linger = 0.005 # seconds
+    max_queued_events = 10_000
+    throughput_window = 10.0 # seconds
+
+    # constructor
+
+    def __init__(self):
+        super().__init__(LocalEnvelopeFactory())
+
+        self.queue: Deque[Tuple[str, Any]] = deque()
+        self.ready: Optional[asyncio.Event] = None
+        self.space: Optional[asyncio.Event] = None
+        self.flusher: Optional[asyncio.Task] = None
+        self.linger_handle: Optional[asyncio.TimerHandle] = None
+
+        self.published = 0
+        self.delivered = 0
+        self.batches = 0
+        self.errors = 0
+        self.max_queue_depth = 0
+        self.window: Tuple[float, int] = (time.monotonic(), 0)
+
+    # configuration
+
+    @inject_value("EVENT_BATCH_SIZE", default=batch_size)
+    def set_batch_size(self, batch_size: int):
+        self.batch_size = batch_size
+
+    @inject_value("EVENT_LINGER", default=linger)
+    def set_linger(self, linger: float):
+        self.linger = linger
+
+    # lifecycle
+
+    async def start(self):
+        await self.ensure_started()
+
+    async def stop(self):
+        if self.linger_handle is not None:
+            self.linger_handle.cancel()
+            self.linger_handle = None
+
+        flusher, self.flusher = self.flusher, None
+        if flusher is not None and not flusher.done():
+            loop = flusher.get_loop()
+
+            if loop is asyncio.get_running_loop():
+                flusher.cancel()
+
+                await asyncio.gather(flusher, return_exceptions=True) # delivers the rest of the queue
+                await self.deliver_queue() # in case it did not run yet
+            elif loop.is_running():
+                loop.call_soon_threadsafe(flusher.cancel)
+
+                return # the flusher delivers the rest on its loop
+
+        if self.queue:
+            self.logger.warning(f"stopped with {len(self.queue)} undelivered events")
+
+    # internal
+
+    def get_flusher_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """
+        return the loop of a live flusher, if any
+        """
+        flusher = self.flusher
+        if flusher is None or flusher.done():
+            return None
+
+        loop = flusher.get_loop()
+
+        return loop if loop.is_running() else None
+
+    async def ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self.get_flusher_loop() is not loop:
+            self.ready = asyncio.Event()
+            self.space = asyncio.Event()
+            self.linger_handle = None
+            self.flusher = loop.create_task(self.flush())
+
+            await asyncio.sleep(0) # let it enter flush, so that a cancellation delivers the queue
+
+    def ready_later(self):
+        self.linger_handle = None
+        self.ready.set()
+
+    async def flush(self):
+        try:
+            while True:
+                await self.ready.wait()
+                self.ready.clear()
+
+                if self.linger_handle is not None:
+                    self.linger_handle.cancel()
+                    self.linger_handle = None
+
+                await self.deliver_queue()
+        except asyncio.CancelledError:
+            await self.deliver_queue()
+            raise
+
+    async def deliver_queue(self):
+        while self.queue:
+            batch = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+
+            await self.deliver(batch)
+
+            self.space.set()
+
+    def handle_exception(self, subscription: EventManager.EventSubscription, event_name: str, exception: Exception):
+        # as EventManager.dispatch_event does, except that the remaining subscriptions and events are still delivered
+
+        exception_manager = self.manager.exception_manager
+        if exception_manager is not None:
+            try:
+                exception_manager.handle(exception)
+            except Exception as handled:
+                self.logger.error(f"subscription {subscription.name} failed on {event_name}: {handled}", exc_info=True)
+        else:
+            self.logger.error(f"subscription {subscription.name} failed on {event_name}: {exception}", exc_info=True)
+
+    async def deliver(self, batch: List[Tuple[str, Any]]):
+        subscriptions_by_event = self.manager.subscriptions_by_event
+
+        for event_name, event in batch:
+            for subscription in subscriptions_by_event.get(event_name, ()):
+                try:
+                    result = subscription.callback(event)
+                    if inspect.isawaitable(result):
+                        await result
+                except Exception as e:
+                    self.errors += 1
+                    self.handle_exception(subscription, event_name, e)
+
+        self.delivered += len(batch)
+        self.batches += 1
+
+    # implement Provider
+
+    async def send(self, envelope: EventManager.Envelope, descriptor: EventManager.EventDescriptor):
+        event = envelope.encode()
+
+        loop = self.get_flusher_loop()
+        if loop is not None and loop is not asyncio.get_running_loop():
+            try:
+                loop.call_soon_threadsafe(self.enqueue, descriptor.name, event) # no backpressure across threads
+                return
+            except RuntimeError:
+                pass # closed meanwhile, start a flusher here
+
+        await self.ensure_started()
+
+        # a subscriber sending from within deliver must not wait, the flusher waits for it
+
+        if asyncio.current_task() is not self.flusher:
+            while len(self.queue) >= self.max_queued_events:
+                self.space.clear()
+                self.ready.set()
+
+                await self.space.wait()
+
+        self.enqueue(descriptor.name, event)
+
+    def enqueue(self, event_name: str, event: Any):
+        self.queue.append((event_name, event))
+        self.published += 1
+        self.max_queue_depth = max(self.max_queue_depth, len(self.queue))
+
+        if len(self.queue) >= self.batch_size:
+            self.ready.set()
+        elif self.linger_handle is None:
+            self.linger_handle = asyncio.get_running_loop().call_later(self.linger, self.ready_later)
+
+    def listen_to_subscription(self, subscription: EventManager.EventSubscription) -> None:
+        pass # deliver reads the subscriptions of the manager
+
+    # public
+
+    def get_queue_depth(self) -> int:
+        return len(self.queue)
+
+    def get_throughput(self) -> float:
+        """
+        return the delivered events per second since the start of the current window
+        """
+        now = time.monotonic()
+        start, delivered = self.window
+
+        elapsed = now - start
+        throughput = (self.delivered - delivered) / elapsed if elapsed > 0 else 0.0
+
+        if elapsed >= self.throughput_window:
+            self.window = (now, self.delivered)
+
+        return throughput
+
+    def get_statistics(self) -> Dict[str, float]:
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_depth": self.get_queue_depth(),
+            "max_queue_depth": self.max_queue_depth,
+            "throughput": self.get_throughput()
+        }
+
+    # health
+
+    @health_check(name="event-queue")
+    def check_queue(self, result: HealthCheckManager.Result):
+        depth = self.get_queue_depth()
+        details = f"{depth} events queued, {self.get_throughput():.1f} events/s"
+
+        if depth >= self.max_queued_events:
+            result.set_status(HealthStatus.WARNING, f"{details}, queue full")
+        else:
+            result.set_status(HealthStatus.OK, details)
@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError: # pragma: no cover - windows
+    fcntl = None
+
+from pydantic import TypeAdapter
+
+from ..interface.portal_model import Manifest
+
+_MANIFESTS = TypeAdapter(List[Manifest])
+
+class ManifestSnapshots:
+    """
+    Shares the manifests between the worker processes of a host.
+
+    A publisher serializes the manifests into an immutable snapshot file per generation and afterwards bumps
+    the generation number stored in a small control file. Workers map the control file once, so checking for a new
+    generation is a read of 8 bytes without any system call. Only if the generation changed, the new snapshot is
+    mapped and decoded - once per worker and generation.
+
+    The directory should be a memory backed file system like `/dev/shm`.
+    Exactly one process - the loader, see `acquire_loader` - is meant to read the database and publish.
+    """
+    MAGIC = b"MFSNAP01"
+    CONTROL = struct.Struct("<8sQ")  # magic, generation
+    HEADER = struct.Struct("<8sQQ")  # magic, generation, payload length
+
+    # constructor
+
+    def __init__(self, directory: str, name: str = "manifests"):
+        self.directory = Path(directory)
+        self.name = name
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.control: Optional[mmap.mmap] = None
+        self.loader_file = None
+
+        self.generation = 0
+        self.manifests: Dict[str, Manifest] = {}
+        self.lock = threading.Lock()
+
+    # internal
+
+    def path(self, suffix: str) -> Path:
+        return self.directory / f"{self.name}.{suffix}"
+
+    def snapshot_path(self, generation: int) -> Path:
+        return self.path(f"{generation}.snapshot")
+
+    def map_control(self) -> Optional[mmap.mmap]:
+        if self.control is None:
+            try:
+                with open(self.path("current"), "rb") as file:
+                    self.control = mmap.mmap(file.fileno(), self.CONTROL.size, access=mmap.ACCESS_READ)
+            except (FileNotFoundError, ValueError): # not yet published
+                return None
+
+        return self.control
+
+    def read(self, generation: int) -> Dict[str, Manifest]:
+        with open(self.snapshot_path(generation), "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                magic, stored, length = self.HEADER.unpack_from(mapped, 0)
+                if magic != self.MAGIC or stored != generation:
+                    raise ValueError(f"corrupt manifest snapshot {generation}")
+
+                manifests = _MANIFESTS.validate_json(mapped[self.HEADER.size:self.HEADER.size + length])
+
+        return {manifest.name: manifest for manifest in manifests}
+
+    def write_control(self, generation: int):
+        path = self.path("current")
+
+        # the control file has a fixed size and is modified in place, so that the readers' mappings see the change
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if os.fstat(fd).st_size < self.CONTROL.size:
+                os.ftruncate(fd, self.CONTROL.size)
+
+            with mmap.mmap(fd, self.CONTROL.size) as control:
+                self.CONTROL.pack_into(control, 0, self.MAGIC, generation)
+        finally:
+            os.close(fd)
+
+    def remove_snapshots(self, keep: int):
+        # the previous generation is kept for readers which just saw it, mapped files stay valid anyway
+
+        for path in self.directory.glob(f"{self.name}.*.snapshot"):
+            try:
+                generation = int(path.name[len(self.name) + 1:-len(".snapshot")])
+            except ValueError:
+                continue
+
+            if generation < keep:
+                path.unlink(missing_ok=True)
+
+    # public
+
+    def acquire_loader(self) -> bool:
+        """
+        return True if the calling process is - or already was - elected as the one loading and publishing the manifests
+        """
+        if self.loader_file is not None:
+            return True
+
+        if fcntl is None:
+            return True # no locking available, every process loads on its own
+
+        file = open(self.path("lock"), "a+b")
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+
+        self.loader_file = file # the lock is released with the process
+
+        return True
+
+    def current_generation(self) -> int:
+        """
+        return the last published generation, 0 if nothing is published yet
+        """
+        control = self.map_control()
+        if control is None:
+            return 0
+
+        magic, generation = self.CONTROL.unpack_from(control, 0)
+
+        return generation if magic == self.MAGIC else 0
+
+    def publish(self, manifests: Iterable[Manifest]) -> int:
+        """
+        publish a new generation of manifests
+
+        Returns:
+            the generation
+        """
+        payload = _MANIFESTS.dump_json(list(manifests))
+
+        with open(self.path("publish"), "a+b") as lock:
+            # concurrent publishers are serialized
+
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+
+            generation = self.current_generation() + 1
+
+            temporary = self.path(f"{generation}.tmp")
+            with open(temporary, "wb") as file:
+                file.write(self.HEADER.pack(self.MAGIC, generation, len(payload)))
+                file.write(payload)
+
+            os.replace(temporary, self.snapshot_path(generation))
+
+            self.write_control(generation)
+            self.remove_snapshots(generation - 1)
+
+        return generation
+
+    def get_manifests(self) -> Dict[str, Manifest]:
+        """
+        return the manifests of the current generation, which must not be modified
+        """
+        generation = self.current_generation()
+        if generation == self.generation:
+            return self.manifests
+
+        with self.lock:
+            while generation != self.generation:
+                try:
+                    self.manifests = self.read(generation)
+                    self.generation = generation
+                except FileNotFoundError:
+                    # replaced by an even newer generation in the meantime
+
+                    generation = self.current_generation()
+
+            return self.manifests
+
+    def close(self):
+        if self.control is not None:
+            self.control.close()
+            self.control = None
+
+        if self.loader_file is not None:
+            self.loader_file.close()
+            self.loader_file = None
@@ -1,4 +1,6 @@
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from aspyx_persistence import PersistentUnit
 
@@ -8,4 +10,14 @@ class Base(DeclarativeBase):
 
 class PortalPersistentUnit(PersistentUnit):
     def __init__(self, url: str):
-        super().__init__(url=url, declarative_base=Base)
\ No newline at end of file
+        super().__init__(url=url, declarative_base=Base)
+
+        # an in-memory sqlite database lives as long as its connection, so all threads share a single one
+
+        parsed = make_url(url)
+
+        self.in_memory = parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+        if self.in_memory:
+            self.engine.dispose()
+            self.engine = create_engine(url, poolclass=StaticPool, connect_args={"check_same_thread": False})
+            self._maker = sessionmaker(bind=self.engine, autoflush=False, autocommit=False)
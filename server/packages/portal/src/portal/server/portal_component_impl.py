@@ -10,9 +10,10 @@ from ..interface import PortalComponent
 class PortalComponentImpl(AbstractComponent, PortalComponent):
     # constructor
 
-    def __init__(self):
+    def __init__(self, health_check_manager: HealthCheckManager):
         super().__init__()
 
+        self.health_check_manager = health_check_manager
         self.exception_manager = ExceptionManager()
 
     # create
@@ -43,7 +44,9 @@ class PortalComponentImpl(AbstractComponent, PortalComponent):
     # implement
 
     async def get_health(self) -> HealthCheckManager.Health:
-        return HealthCheckManager.Health()
+        # all components share the process, so its pools, caches and event loop count for every one of them
+
+        return await self.health_check_manager.check()
 
     def get_addresses(self, port: int) -> list[ChannelAddress]:
         local_ip = "127.0.0.1" #Server.get_local_ip()
@@ -2,6 +2,9 @@ import threading
 from typing import Optional, List
 from uuid import UUID
 
+from fastapi import HTTPException
+from sqlalchemy import event
+
 from aspyx_persistence import get_current_session, transactional
 
 from aspyx.mapper import Mapper, MappingDefinition, matching_properties
@@ -11,22 +14,39 @@ from ..interface.portal_model import Microfrontend
 from ..server.persistence.entity.microfrontend_entity import MicrofrontendEntity
 
 from .persistence.repository import MicrofrontentRepository
+from .deployment_manager import MicrofrontendChanges
 
 @implementation()
 class PortalCRUDServiceImpl(PortalCRUDService):
     # constructor
 
-    def __init__(self, repository: MicrofrontentRepository):
+    def __init__(self, repository: MicrofrontentRepository, changes: MicrofrontendChanges):
         self.repository = repository
+        self.changes = changes
         self.dto_to_entity_mapper : Optional[Mapper] = None
         self.entity_to_dto_mapper : Optional[Mapper] = None
 
-
     # internal
 
     def schedule_later(self, func):
         threading.Timer(0, func).start()
 
+    def changed_after_commit(self):
+        """
+        report the change of the microfrontends once the current transaction is committed, forget it on a rollback
+        """
+        session = get_current_session()
+
+        def committed(session):
+            event.remove(session, "after_rollback", rolled_back)
+            self.schedule_later(self.changes.changed)
+
+        def rolled_back(session):
+            event.remove(session, "after_commit", committed)
+
+        event.listen(session, "after_commit", committed, once=True)
+        event.listen(session, "after_rollback", rolled_back, once=True)
+
     def get_dto_to_entity_mapper(self):
         if self.dto_to_entity_mapper is None:
             self.dto_to_entity_mapper = Mapper(
@@ -65,13 +85,37 @@ class PortalCRUDServiceImpl(PortalCRUDService):
 
         get_current_session().flush()
 
+        self.changed_after_commit()
+
         # return new dto
 
         return self.get_entity_to_dto_mapper().map(entity)
 
     @transactional()
     def update_microfrontend(self, mfe: Microfrontend) -> Microfrontend:
-        return mfe # TODO
+        entity = self.repository.find(mfe.id)
+        if entity is None:
+            raise HTTPException(status_code=404, detail=f"unknown microfrontend '{mfe.id}'")
+
+        # optimistic locking, the caller must have seen the current version
+
+        if mfe.version_id != entity.version_id:
+            raise HTTPException(status_code=409, detail=f"microfrontend '{mfe.id}' was modified, expected version {entity.version_id} but got {mfe.version_id}")
+
+        entity.name = mfe.name
+        entity.uri = mfe.uri
+        entity.enabled = mfe.enabled
+        entity.configuration = mfe.configuration
+
+        self.repository.save(entity)
+
+        # flush session
+
+        get_current_session().flush()
+
+        self.changed_after_commit()
+
+        return self.get_entity_to_dto_mapper().map(entity)
 
     @transactional()
     def read_microfrontend(self, id: UUID) -> Microfrontend:
@@ -0,0 +1,152 @@
+import collections
+import hmac
+import itertools
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Counter, Optional
+
+from starlette.datastructures import MutableHeaders
+
+# -------------------------
+# Profiler
+# -------------------------
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+
+    return f"{frame.f_globals.get('__name__', '?')}.{getattr(code, 'co_qualname', code.co_name)}:{frame.f_lineno}"
+
+class SamplingProfiler:
+    """
+    Samples the stack of a single thread every `interval` seconds in a background thread and counts the
+    stacks in the collapsed format - `root;caller;callee count` per line - understood by speedscope and
+    flamegraph.pl.
+
+    The sampler needs the gil, so the effective interval of a busy thread is bound by `sys.getswitchinterval()`.
+    """
+    # constructor
+
+    def __init__(self, thread_id: int, interval: float = 0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+
+        self.stacks: Counter[str] = collections.Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    # internal
+
+    def sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+
+        names = []
+        while frame is not None:
+            names.append(_frame_name(frame))
+            frame = frame.f_back
+
+        names.reverse()
+
+        self.stacks[";".join(names)] += 1
+        self.samples += 1
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    # public
+
+    def start(self) -> "SamplingProfiler":
+        self.thread = threading.Thread(target=self.run, name="request-profiler", daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+        return self
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+# -------------------------
+# Middleware
+# -------------------------
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware which profiles single requests with a `SamplingProfiler` on the thread handling them,
+    which is the event loop thread, since the service methods are called there.
+
+    A request is profiled if it carries the `header` with the configured `token`, or - with a `sample_rate` - by
+    chance. The profile is written as a collapsed stack file to `directory` and its name is returned in the
+    `x-profile-file` response header. Requests which are not profiled only pay for a header lookup.
+
+    Concurrent requests handled by the event loop while the profiled one awaits show up in its profile as well.
+    """
+    logger = logging.getLogger("portal.profiler")
+
+    # constructor
+
+    def __init__(self, app, directory: str, token: Optional[str] = None, sample_rate: float = 0.0, interval: float = 0.002, header: str = "x-profile"):
+        self.app = app
+        self.directory = directory
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self.header = header.lower().encode()
+        self.counter = itertools.count()
+
+        os.makedirs(directory, exist_ok=True)
+
+    # internal
+
+    def triggered(self, scope) -> bool:
+        if self.token is not None:
+            for name, value in scope["headers"]:
+                if name == self.header and hmac.compare_digest(value, self.token):
+                    return True
+
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def file_name(self, scope) -> str:
+        path = re.sub(r"[^A-Za-z0-9]+", "-", scope["path"]).strip("-") or "root"
+
+        return f"{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(self.counter)}-{scope['method']}-{path[:80]}.collapsed"
+
+    def write(self, name: str, profiler: SamplingProfiler):
+        with open(os.path.join(self.directory, name), "w") as file:
+            file.write(profiler.collapsed())
+
+        self.logger.info("profiled %s with %d samples", name, profiler.samples)
+
+    # asgi
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.triggered(scope):
+            await self.app(scope, receive, send)
+            return
+
+        name = self.file_name(scope)
+
+        async def profiled_send(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(raw=message["headers"])["x-profile-file"] = name
+
+            await send(message)
+
+        profiler = SamplingProfiler(threading.get_ident(), self.interval).start()
+        try:
+            await self.app(scope, receive, profiled_send)
+        finally:
+            self.write(name, profiler.stop())
@@ -0,0 +1,268 @@
+from __future__ import annotations
+
+import functools
+import inspect
+import zlib
+from decimal import Decimal
+from typing import Any, Iterable, Optional, Set
+
+import orjson
+
+try:
+    import brotli
+except ImportError: # pragma: no cover - optional dependency
+    brotli = None
+
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.datastructures import Headers, MutableHeaders
+
+from aspyx_service import FastAPIServer
+
+# -------------------------
+# JSON
+# -------------------------
+
+def _default(value: Any) -> Any:
+    # what orjson does not know natively, encoded as jsonable_encoder does
+
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+
+    raise TypeError(f"{type(value).__name__} is not json serializable")
+
+def dump_json(value: Any) -> bytes:
+    """
+    encode a value - including pydantic models, dataclasses, datetimes, uuids and decimals - as compact json
+    """
+    return orjson.dumps(value, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+class FastJSONResponse(JSONResponse):
+    """
+    json response encoded with orjson
+    """
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
+
+class FastJSONServer(FastAPIServer):
+    """
+    FastAPIServer whose service routes return a `FastJSONResponse` instead of encoding
+    the result with `jsonable_encoder` and the standard json module.
+    """
+    # internal
+
+    def fast_endpoint(self, wrapper, status_code: int = 200):
+        handler = wrapper.__wrapped__
+        signature = wrapper.__signature__
+
+        @functools.wraps(handler)
+        async def endpoint(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+
+            result = handler(*bound.args, **bound.kwargs)
+            if inspect.iscoroutine(result):
+                result = await result
+
+            return FastJSONResponse(result, status_code=status_code)
+
+        endpoint.__signature__ = signature
+        endpoint.__annotations__ = wrapper.__annotations__
+        endpoint.__doc__ = wrapper.__doc__
+
+        return endpoint
+
+    # override
+
+    def add_routes(self):
+        # the service routes are the ones with wrapped service methods. They are registered with the fast endpoint
+        # and response class, all other arguments of the base server pass through unchanged
+
+        add_api_route = self.router.add_api_route
+
+        def add_fast_route(path: str, endpoint, **kwargs):
+            if hasattr(endpoint, "__wrapped__"):
+                endpoint = self.fast_endpoint(endpoint, kwargs.get("status_code") or 200)
+                kwargs["response_class"] = FastJSONResponse
+
+            add_api_route(path, endpoint, **kwargs)
+
+        self.router.add_api_route = add_fast_route
+        try:
+            super().add_routes()
+        finally:
+            del self.router.add_api_route
+
+# -------------------------
+# Compression
+# -------------------------
+
+COMPRESSIBLE_TYPES = frozenset([
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/javascript",
+    "image/svg+xml"
+])
+
+def accepted_encodings(header: str) -> Set[str]:
+    """
+    return the encodings of an accept-encoding header which are not excluded with `q=0`
+    """
+    encodings = set()
+
+    for part in header.split(","):
+        name, _, parameters = part.strip().partition(";")
+        quality = 1.0
+
+        parameter = parameters.strip()
+        if parameter.startswith("q="):
+            try:
+                quality = float(parameter[2:])
+            except ValueError:
+                quality = 0.0
+
+        if name and quality > 0:
+            encodings.add(name.strip().lower())
+
+    return encodings
+
+class _Compressor:
+    __slots__ = [
+        "compressor",
+        "brotli"
+    ]
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.brotli = encoding == "br"
+
+        if self.brotli:
+            self.compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self.compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip framing
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        if self.brotli:
+            return self.compressor.process(data) + (self.compressor.flush() if flush else b"")
+
+        return self.compressor.compress(data) + (self.compressor.flush(zlib.Z_SYNC_FLUSH) if flush else b"")
+
+    def finish(self) -> bytes:
+        if self.brotli:
+            return self.compressor.finish()
+
+        return self.compressor.flush(zlib.Z_FINISH)
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli - if installed - or gzip, depending on the accept-encoding
+    of the request. Only responses of an allowed content type and at least `minimum_size` bytes are compressed.
+
+    Streamed responses are compressed chunk by chunk and flushed after every chunk, so that clients still
+    receive data as it is produced.
+    """
+    # constructor
+
+    def __init__(self, app, minimum_size: int = 1024, content_types: Optional[Iterable[str]] = None, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_types) if content_types is not None else COMPRESSIBLE_TYPES
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    # internal
+
+    def select_encoding(self, scope) -> Optional[str]:
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+
+        return None
+
+    def compressible(self, message) -> bool:
+        headers = Headers(raw=message["headers"])
+
+        if "content-encoding" in headers or message["status"] in (204, 304):
+            return False
+
+        return headers.get("content-type", "").split(";")[0].strip().lower() in self.content_types
+
+    # asgi
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self.select_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        compressor: Optional[_Compressor] = None
+        passthrough = False
+
+        async def compressing_send(message):
+            nonlocal start, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                start = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                # first chunk, decide
+
+                compressible = self.compressible(start)
+
+                if not compressible or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+
+                    if compressible: # bigger variants of the same resource are compressed
+                        MutableHeaders(raw=start["headers"]).add_vary_header("Accept-Encoding")
+
+                    await send(start)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+
+                headers = MutableHeaders(raw=start["headers"])
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+
+                if more_body:
+                    del headers["content-length"]
+                else:
+                    body = compressor.compress(body, False) + compressor.finish()
+                    headers["content-length"] = str(len(body))
+
+                    await send(start)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                await send(start)
+
+            if more_body:
+                await send({"type": "http.response.body", "body": compressor.compress(body, True), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.compress(body, False) + compressor.finish()})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi.responses import Response
+
+from aspyx.di import injectable
+from aspyx.di.aop import Invocation
+from aspyx_service import FastAPIServer, ServiceManager
+
+# -------------------------
+# Metrics
+# -------------------------
+
+class MethodMetrics:
+    """
+    latency histogram, in-flight gauge and error counter of a single service method
+    """
+    __slots__ = [
+        "service",
+        "method",
+        "lock",
+        "in_flight",
+        "errors",
+        "count",
+        "sum",
+        "buckets"
+    ]
+
+    def __init__(self, service: str, method: str, bounds: int):
+        self.service = service
+        self.method = method
+        self.lock = threading.Lock()
+
+        self.in_flight = 0
+        self.errors = 0
+        self.count = 0
+        self.sum = 0.0
+        self.buckets = [0] * (bounds + 1) # not cumulative, the last one is +Inf
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def exit(self, bucket: int, seconds: float, failed: bool):
+        with self.lock:
+            self.in_flight -= 1
+            self.count += 1
+            self.sum += seconds
+            self.buckets[bucket] += 1
+            if failed:
+                self.errors += 1
+
+_UNRESOLVED = object()
+
+def _labels(metrics: MethodMetrics) -> str:
+    return f'service="{metrics.service}",method="{metrics.method}"'
+
+@injectable()
+class ServiceMetrics:
+    """
+    Collects latency histograms, in-flight gauges and error counts per service and method and renders them in the
+    Prometheus text format. Calls are recorded by around advices, which delegate to `measure` or `measure_async`.
+
+    Only methods declared by a service interface are recorded, everything else is passed through.
+    """
+    # class properties
+
+    bounds = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0) # seconds
+
+    # constructor
+
+    def __init__(self):
+        self.methods: Dict[Callable, Optional[MethodMetrics]] = {}
+        self.lock = threading.Lock()
+
+    # internal
+
+    def resolve(self, invocation: Invocation) -> Optional[MethodMetrics]:
+        func = invocation.func
+
+        metrics = self.methods.get(func, _UNRESOLVED)
+        if metrics is not _UNRESOLVED:
+            return metrics
+
+        # first call, find the service interface declaring the method
+
+        services = {descriptor.type: name for name, descriptor in ServiceManager.descriptors_by_name.items()}
+
+        metrics = None
+        for clazz in type(invocation.args[0]).__mro__:
+            name = services.get(clazz)
+            if name is not None and func.__name__ in clazz.__dict__:
+                metrics = MethodMetrics(name, func.__name__, len(self.bounds))
+                break
+
+        with self.lock:
+            return self.methods.setdefault(func, metrics)
+
+    # public
+
+    def measure(self, invocation: Invocation):
+        metrics = self.resolve(invocation)
+        if metrics is None:
+            return invocation.proceed()
+
+        metrics.enter()
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = invocation.proceed()
+            failed = False
+
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.exit(bisect.bisect_left(self.bounds, seconds), seconds, failed)
+
+    async def measure_async(self, invocation: Invocation):
+        metrics = self.resolve(invocation)
+        if metrics is None:
+            return await invocation.proceed_async()
+
+        metrics.enter()
+        failed = True
+        start = time.perf_counter()
+        try:
+            result = await invocation.proceed_async()
+            failed = False
+
+            return result
+        finally:
+            seconds = time.perf_counter() - start
+            metrics.exit(bisect.bisect_left(self.bounds, seconds), seconds, failed)
+
+    def get_metrics(self) -> List[MethodMetrics]:
+        with self.lock:
+            methods = [metrics for metrics in self.methods.values() if metrics is not None]
+
+        return sorted(methods, key=lambda metrics: (metrics.service, metrics.method))
+
+    def get_in_flight(self) -> int:
+        """
+        return the number of service method calls in progress
+        """
+        return sum(metrics.in_flight for metrics in self.get_metrics())
+
+    def render(self) -> str:
+        """
+        return all metrics in the Prometheus text exposition format
+        """
+        methods = self.get_metrics()
+        snapshots: List[Tuple[MethodMetrics, int, int, int, float, List[int]]] = []
+
+        for metrics in methods:
+            with metrics.lock:
+                snapshots.append((metrics, metrics.in_flight, metrics.errors, metrics.count, metrics.sum, list(metrics.buckets)))
+
+        lines = [
+            "# HELP service_method_duration_seconds Duration of service method calls.",
+            "# TYPE service_method_duration_seconds histogram"
+        ]
+
+        for metrics, _, _, count, total, buckets in snapshots:
+            labels = _labels(metrics)
+            cumulative = 0
+
+            for bound, bucket in zip(self.bounds, buckets):
+                cumulative += bucket
+                lines.append(f'service_method_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+
+            lines.append(f'service_method_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"service_method_duration_seconds_sum{{{labels}}} {total!r}")
+            lines.append(f"service_method_duration_seconds_count{{{labels}}} {count}")
+
+        lines.append("# HELP service_method_in_flight Service method calls in progress.")
+        lines.append("# TYPE service_method_in_flight gauge")
+
+        for metrics, in_flight, _, _, _, _ in snapshots:
+            lines.append(f"service_method_in_flight{{{_labels(metrics)}}} {in_flight}")
+
+        lines.append("# HELP service_method_errors_total Service method calls that raised an exception.")
+        lines.append("# TYPE service_method_errors_total counter")
+
+        for metrics, _, errors, _, _, _ in snapshots:
+            lines.append(f"service_method_errors_total{{{_labels(metrics)}}} {errors}")
+
+        return "\n".join(lines) + "\n"
+
+# -------------------------
+# Endpoint
+# -------------------------
+
+@injectable()
+class MetricsEndpoint:
+    """
+    Registers `GET /metrics`, which returns the service metrics in the Prometheus text format.
+    """
+    # constructor
+
+    def __init__(self, server: FastAPIServer, metrics: ServiceMetrics):
+        self.metrics = metrics
+
+        server.fast_api.add_api_route("/metrics", self.get_metrics, methods=["GET"], include_in_schema=False)
+
+    # endpoint
+
+    def get_metrics(self) -> Response:
+        return Response(self.metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,220 @@
+from __future__ import annotations
+
+import os
+import pickle
+import random
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+from aspyx_service import SessionManager, Session
+
+# -------------------------
+# Memory
+# -------------------------
+
+class _Shard:
+    __slots__ = [
+        "lock",
+        "entries",
+        "capacity"
+    ]
+
+    def __init__(self, capacity: int):
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, Tuple[Session, float]] = OrderedDict() # least recently used first
+        self.capacity = capacity
+
+class ShardedMemoryStorage(SessionManager.Storage):
+    """
+    In-memory session storage for a single process, split into shards with a lock each, so that concurrent requests
+    rarely wait for each other. Every shard is a lru, which evicts the least recently used sessions once it is full.
+
+    Expired sessions are removed when read and - amortized - on every store, which drops a few expired sessions at
+    the cold end of the shard.
+    """
+    # class properties
+
+    expire_per_store = 4 # max expired sessions removed per store
+
+    # constructor
+
+    def __init__(self, max_size: int = 100_000, ttl: int = 3600, shards: int = 16):
+        self.ttl = ttl
+        self.shards = [_Shard(-(-max_size // shards)) for _ in range(shards)]
+
+    # internal
+
+    def shard(self, token: str) -> _Shard:
+        return self.shards[hash(token) % len(self.shards)]
+
+    # implement
+
+    def store(self, token: str, session: Session, ttl_seconds: int):
+        now = time.monotonic()
+        shard = self.shard(token)
+
+        with shard.lock:
+            entries = shard.entries
+
+            # amortized expiry
+
+            for _ in range(self.expire_per_store):
+                oldest = next(iter(entries), None)
+                if oldest is None or entries[oldest][1] > now:
+                    break
+
+                del entries[oldest]
+
+            entries[token] = (session, now + min(ttl_seconds, self.ttl))
+            entries.move_to_end(token)
+
+            while len(entries) > shard.capacity:
+                entries.popitem(last=False)
+
+    def read(self, token: str) -> Optional[Session]:
+        shard = self.shard(token)
+
+        with shard.lock:
+            value = shard.entries.get(token)
+            if value is None:
+                return None
+
+            session, expiry = value
+            if expiry <= time.monotonic():
+                del shard.entries[token]
+                return None
+
+            shard.entries.move_to_end(token)
+
+            return session
+
+    # public
+
+    def remove(self, token: str):
+        shard = self.shard(token)
+
+        with shard.lock:
+            shard.entries.pop(token, None)
+
+    def expire(self) -> int:
+        """
+        remove all expired sessions
+
+        Returns:
+            the number of removed sessions
+        """
+        now = time.monotonic()
+        removed = 0
+
+        for shard in self.shards:
+            with shard.lock:
+                expired = [token for token, (_, expiry) in shard.entries.items() if expiry <= now]
+                for token in expired:
+                    del shard.entries[token]
+
+                removed += len(expired)
+
+        return removed
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self.shards)
+
+# -------------------------
+# SQLite
+# -------------------------
+
+class SQLiteStorage(SessionManager.Storage):
+    """
+    Session storage in a sqlite database file, which is shared by all worker processes of a host.
+    Sessions are pickled by default, so the file must only be writable by the application.
+
+    The database runs in wal mode, so that readers do not block the writer. Every thread uses its own connection.
+    Expired sessions are ignored when read and deleted - amortized - by a random fraction of the stores.
+    """
+    # class properties
+
+    expire_probability = 0.01
+
+    # constructor
+
+    def __init__(self, path: str, ttl: int = 3600, serialize: Callable[[Session], bytes] = pickle.dumps, deserialize: Callable[[bytes], Session] = pickle.loads):
+        self.path = path
+        self.ttl = ttl
+        self.serialize = serialize
+        self.deserialize = deserialize
+
+        self.local = threading.local()
+        self.connections: List[sqlite3.Connection] = []
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self.connection() as connection:
+            connection.execute("create table if not exists sessions (token text primary key, expires real not null, data blob not null) without rowid")
+            connection.execute("create index if not exists sessions_expires on sessions (expires)")
+
+    # internal
+
+    def connection(self) -> sqlite3.Connection:
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=10.0, isolation_level=None, check_same_thread=False)
+
+            connection.execute("pragma journal_mode=wal")
+            connection.execute("pragma synchronous=normal") # sessions survive a crash of the process, not of the os
+
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+
+        return connection
+
+    # implement
+
+    def store(self, token: str, session: Session, ttl_seconds: int):
+        now = time.time()
+        connection = self.connection()
+
+        connection.execute(
+            "insert or replace into sessions (token, expires, data) values (?, ?, ?)",
+            (token, now + min(ttl_seconds, self.ttl), self.serialize(session))
+        )
+
+        if random.random() < self.expire_probability:
+            connection.execute("delete from sessions where expires <= ?", (now,))
+
+    def read(self, token: str) -> Optional[Session]:
+        row = self.connection().execute("select data from sessions where token = ? and expires > ?", (token, time.time())).fetchone()
+
+        return self.deserialize(row[0]) if row is not None else None
+
+    # public
+
+    def remove(self, token: str):
+        self.connection().execute("delete from sessions where token = ?", (token,))
+
+    def expire(self) -> int:
+        """
+        remove all expired sessions
+
+        Returns:
+            the number of removed sessions
+        """
+        return self.connection().execute("delete from sessions where expires <= ?", (time.time(),)).rowcount
+
+    def __len__(self):
+        return self.connection().execute("select count(*) from sessions").fetchone()[0]
+
+    def close(self):
+        with self.lock:
+            for connection in self.connections:
+                connection.close()
+
+            self.connections = []
+
+        self.local = threading.local()
@@ -0,0 +1,18 @@
+import pytest
+
+from aspyx_service import ServiceManager
+
+from application.harness import ApplicationHarness
+
+@pytest.fixture(scope="session")
+def application() -> ApplicationHarness:
+    harness = ApplicationHarness().start()
+
+    try:
+        yield harness
+    finally:
+        harness.stop()
+
+@pytest.fixture()
+def service_manager(application: ApplicationHarness) -> ServiceManager:
+    return application.get(ServiceManager)
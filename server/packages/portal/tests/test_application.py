@@ -0,0 +1,223 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from aspyx_persistence import get_current_session, transaction
+
+from cube.interface import CubeDescriptor
+from cube.server.cube_service_impl import CubeServiceServiceImpl
+from cube.server.query import CubeQueryEngine
+
+from portal.interface import PortalCRUDService
+from portal.interface.portal_model import Microfrontend
+from portal.server.deployment_manager import DeploymentManager, MicrofrontendChanges
+from portal.server.load_monitor import LoadMonitor
+from portal.server.portal_crud_service_impl import PortalCRUDServiceImpl
+
+from application.main import app, boot
+
+FEATURES = [
+    {"id": "home", "label": "Home", "path": "/mfe1", "icon": "🏠", "component": "Home", "tags": [], "permissions": [], "features": []},
+    {"id": "tablet", "label": "Tablet", "path": "/mfe1/tablet", "icon": "📄", "component": "Tablet", "tags": [], "permissions": [], "features": [], "clients": {"screenSizes": ["md"]}},
+    {"id": "secret", "label": "Secret", "path": "/mfe1/secret", "icon": "📄", "component": "Secret", "tags": ["secret"], "permissions": [], "features": []}
+]
+
+CLIENT = {
+    "width": 1920,
+    "height": 1080,
+    "screenSize": "xl",
+    "orientation": "landscape",
+    "pixelRatio": 1.0,
+    "platform": "web",
+    "browser": "chrome",
+    "os": "linux",
+    "osVersion": "6",
+    "capabilities": []
+}
+
+def run(application, scenario):
+    async def with_client():
+        async with application.client() as client:
+            return await scenario(client)
+
+    return asyncio.run(with_client())
+
+class TestApplication:
+    def test_started(self, application):
+        assert application.started.is_set()
+
+        async def scenario(client):
+            return await client.get("/ready"), await client.get("/portal/health"), await client.get("/cube/health")
+
+        for response in run(application, scenario):
+            assert response.status_code == 200, response.text
+
+    def test_ready_under_load(self, application):
+        monitor = application.get(LoadMonitor)
+        monitor.set_max_queue_depth(-1) # every queue is too deep
+
+        async def scenario(client):
+            return await client.get("/ready"), await client.get("/portal/health")
+
+        try:
+            ready, health = run(application, scenario)
+        finally:
+            monitor.set_max_queue_depth(LoadMonitor.max_queue_depth)
+
+        assert ready.status_code == 200, ready.text
+        assert [check["name"] for check in ready.json()["checks"]] == ["cube-warmup"]
+        assert health.status_code == 503
+
+    def test_boot_once(self, application):
+        assert boot() is application.environment
+        assert [route.path for route in app.routes].count("/ready") == 1
+
+    def test_app_boots_on_startup(self):
+        # what `uvicorn application.main:app` does in a fresh process
+
+        script = (
+            "from fastapi.testclient import TestClient\n"
+            "from application.main import app\n"
+            "with TestClient(app) as client:\n"
+            "    print('result', client.get('/api/dashboard/list').status_code, flush=True)\n"
+        )
+
+        output = subprocess.run([sys.executable, "-c", script], env={**os.environ, "DATABASE_URL": "sqlite://"}, capture_output=True, text=True, timeout=60).stdout
+
+        assert "result 200" in output
+
+    def test_deployment(self, application):
+        application.get(PortalCRUDService).create_microfrontend(Microfrontend(
+            id=uuid4(),
+            version_id=0,
+            name="mfe1",
+            uri="http://localhost:3001",
+            enabled=True,
+            configuration=json.dumps({"features": FEATURES})
+        ))
+
+        application.get(DeploymentManager).reload()
+
+        async def deploy(client):
+            return await client.post("/portal/deployment", json={"application": "shell", "client": CLIENT})
+
+        response = run(application, deploy)
+
+        assert response.status_code == 200
+        assert [feature["id"] for feature in response.json()["modules"]["mfe1"]["features"]] == ["home"]
+
+    def test_manifest_changed(self, application):
+        crud = application.get(PortalCRUDService)
+
+        def microfrontend(features: list) -> Microfrontend:
+            return Microfrontend(id=id, version_id=0, name="mfe2", uri="http://localhost:3002", enabled=True, configuration=json.dumps({"features": features}))
+
+        id = uuid4()
+
+        with TestClient(app).websocket_connect("/ws/events/test") as websocket:
+            websocket.send_json({"type": "subscribe", "event_name": "ManifestChanged"})
+            assert websocket.receive_json()["success"]
+
+            # created
+
+            created = crud.create_microfrontend(microfrontend(FEATURES[:1]))
+            event = websocket.receive_json()
+
+            assert event["event_name"] == "ManifestChanged"
+            assert event["data"]["name"] == "mfe2"
+
+            version = event["data"]["version"]
+
+            # updated
+
+            crud.update_microfrontend(microfrontend(FEATURES).model_copy(update={"version_id": created.version_id}))
+            event = websocket.receive_json()
+
+            assert event["data"]["name"] == "mfe2"
+            assert event["data"]["version"] not in ("", version)
+
+        assert "mfe2" in application.get(DeploymentManager).get_microfrontends()
+
+    def test_update_conflicts(self, application):
+        # changes reload the manifests on another thread, which must not use the in-memory database meanwhile
+
+        reloaded = threading.Event()
+        application.get(MicrofrontendChanges).add_listener(reloaded.set)
+
+        crud = application.get(PortalCRUDService)
+        created = crud.create_microfrontend(Microfrontend(id=uuid4(), version_id=0, name="mfe3", uri="http://localhost:3003", enabled=True, configuration=json.dumps({"features": []})))
+
+        assert reloaded.wait(5)
+
+        for mfe, status_code in [(created.model_copy(update={"id": uuid4()}), 404), (created.model_copy(update={"version_id": created.version_id + 1}), 409)]:
+            with pytest.raises(HTTPException) as error:
+                crud.update_microfrontend(mfe)
+
+            assert error.value.status_code == status_code
+
+        reloaded.clear()
+
+        assert crud.update_microfrontend(created.model_copy(update={"enabled": False})).version_id == created.version_id + 1
+        assert reloaded.wait(5)
+
+    def test_no_change_after_rollback(self, application):
+        service = application.get(PortalCRUDServiceImpl)
+
+        with pytest.raises(RuntimeError):
+            with transaction():
+                session = get_current_session()
+                service.repository.find(uuid4())
+                service.changed_after_commit()
+
+                raise RuntimeError("rollback")
+
+        assert not session.dispatch.after_commit
+
+    def test_cube_invalidation_after_commit(self, application):
+        service = application.get(CubeServiceServiceImpl)
+        engine = application.get(CubeQueryEngine)
+
+        with transaction():
+            engine.get_cubes()
+
+        # rolled back
+
+        with pytest.raises(RuntimeError):
+            with transaction():
+                service.create_cube(CubeDescriptor(name="RolledBack", table="orders"))
+
+                raise RuntimeError("rollback")
+
+        assert engine.cubes is not None
+
+        # committed
+
+        with transaction():
+            service.create_cube(CubeDescriptor(name="Committed", table="orders"))
+
+            assert engine.cubes is not None # not before the commit
+
+        assert engine.cubes is None
+
+    def test_dashboards(self, application):
+        configuration = json.dumps({"widgets": []})
+
+        async def scenario(client):
+            created = (await client.post("/api/dashboard/create", json={"name": "sales", "configuration": configuration})).json()
+            found = (await client.get(f"/api/dashboard/find/{created['id']}")).json()
+            listed = (await client.get("/api/dashboard/list")).json()
+
+            return created, found, listed
+
+        created, found, listed = run(application, scenario)
+
+        assert found == created
+        assert created["id"] in [dashboard["id"] for dashboard in listed]
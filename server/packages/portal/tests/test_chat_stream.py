@@ -0,0 +1,128 @@
+import asyncio
+import json
+
+from portal.interface import ChatQuestion
+from portal.server.chat_stream import ChatStreams, EchoAnswerGenerator, AnswerGenerator
+
+class FailingAnswerGenerator(AnswerGenerator):
+    async def generate(self, question: ChatQuestion):
+        yield "partial "
+        raise RuntimeError("model unavailable")
+
+def create_streams(generator: AnswerGenerator, max_buffered_chunks: int = 64, slow_consumer_timeout: float = 5.0) -> ChatStreams:
+    streams = ChatStreams(generator)
+    streams.max_buffered_chunks = max_buffered_chunks
+    streams.slow_consumer_timeout = slow_consumer_timeout
+
+    return streams
+
+async def collect(stream) -> list:
+    return [chunk async for chunk in stream]
+
+class TestChatStreams:
+    def test_chunks(self):
+        async def scenario():
+            streams = create_streams(EchoAnswerGenerator())
+            stream = streams.open(ChatQuestion(question="what is a cube", questionId="q1"))
+
+            return await collect(stream)
+
+        chunks = asyncio.run(scenario())
+
+        assert "".join(chunk.content for chunk in chunks) == "you asked: what is a cube "
+        assert [chunk.index for chunk in chunks] == list(range(len(chunks)))
+        assert all(chunk.questionId == "q1" for chunk in chunks)
+        assert chunks[-1].done and not any(chunk.done for chunk in chunks[:-1])
+
+    def test_question_id(self):
+        async def scenario():
+            stream = create_streams(EchoAnswerGenerator()).open(ChatQuestion(question="hi"))
+
+            return stream.question_id, await collect(stream)
+
+        question_id, chunks = asyncio.run(scenario())
+
+        assert question_id
+        assert chunks[0].questionId == question_id
+
+    def test_slow_consumer(self):
+        async def scenario():
+            streams = create_streams(EchoAnswerGenerator(repeat=100), max_buffered_chunks=4, slow_consumer_timeout=0.05)
+            stream = streams.open(ChatQuestion(question="tell me everything", questionId="q1"))
+
+            await asyncio.sleep(0.2) # the consumer does not read
+
+            return stream, await collect(stream)
+
+        stream, chunks = asyncio.run(scenario())
+
+        assert [chunk.error for chunk in chunks] == ["slow consumer"]
+        assert stream.index == 4
+        assert stream.task.done()
+
+    def test_cancel(self):
+        async def scenario():
+            streams = create_streams(EchoAnswerGenerator(delay=0.01, repeat=100))
+            stream = streams.open(ChatQuestion(question="tell me everything", questionId="q1"))
+
+            chunks = []
+            async for chunk in stream:
+                chunks.append(chunk)
+                if len(chunks) == 3:
+                    assert streams.cancel("q1")
+
+            return streams, stream, chunks
+
+        streams, stream, chunks = asyncio.run(scenario())
+
+        assert chunks[-1].error == "cancelled"
+        assert not any(chunk.done for chunk in chunks)
+        assert stream.task.done()
+        assert streams.get("q1") is None
+        assert not streams.cancel("q1")
+
+    def test_reopen(self):
+        async def scenario():
+            streams = create_streams(EchoAnswerGenerator(delay=0.01, repeat=100))
+            first = streams.open(ChatQuestion(question="first", questionId="q1"))
+            second = streams.open(ChatQuestion(question="second", questionId="q1"))
+
+            return await collect(first), streams.get("q1") is second
+
+        chunks, current = asyncio.run(scenario())
+
+        assert chunks[-1].error == "cancelled"
+        assert current
+
+    def test_generator_error(self):
+        async def scenario():
+            return await collect(create_streams(FailingAnswerGenerator()).open(ChatQuestion(question="hi", questionId="q1")))
+
+        chunks = asyncio.run(scenario())
+
+        assert chunks[0].content == "partial "
+        assert chunks[-1].error == "model unavailable"
+
+class TestChatStreamEndpoint:
+    def test_stream(self, application):
+        async def scenario():
+            async with application.client() as client:
+                response = await client.post("/api/chat/stream", json={"question": "what is a cube", "questionId": "q1"})
+                cancelled = await client.post("/api/chat/cancel/q1")
+
+                return response, cancelled.json()
+
+        response, cancelled = asyncio.run(scenario())
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert response.headers["x-question-id"] == "q1"
+
+        events = [event.split("\n") for event in response.text.strip().split("\n\n")]
+        names = [lines[0].removeprefix("event: ") for lines in events]
+        chunks = [json.loads(lines[1].removeprefix("data: ")) for lines in events]
+
+        assert names[-1] == "done" and set(names[:-1]) == {"chunk"}
+        assert "".join(chunk["content"] for chunk in chunks) == "you asked: what is a cube "
+
+        assert cancelled == {"cancelled": False} # released once the answer was sent
@@ -0,0 +1,69 @@
+from hypothesis import given, settings, strategies as st
+
+from portal.interface.portal_model import ClientConstraints, ClientInfo, Feature
+from portal.server.client_constraints import accept_all, compile_constraints
+from portal.server.deployment_manager import DeploymentManager
+
+SCREEN_SIZES = ["xs", "sm", "md", "lg", "xl"]
+ORIENTATIONS = ["portrait", "landscape"]
+PLATFORMS = ["web", "ios", "android", "windows"]
+CAPABILITIES = ["touch", "camera", "geolocation", "notifications", "offline"]
+
+def subsets(values: list):
+    return st.lists(st.sampled_from(values), max_size=len(values) + 1) # duplicates as well
+
+def optional(strategy):
+    return st.one_of(st.none(), strategy)
+
+dimensions = st.integers(min_value=0, max_value=4000)
+
+constraints = st.one_of(st.none(), st.builds(
+    ClientConstraints,
+    screen_sizes=optional(subsets(SCREEN_SIZES)),
+    orientation=optional(subsets(ORIENTATIONS)),
+    platforms=optional(subsets(PLATFORMS)),
+    min_width=optional(dimensions),
+    max_width=optional(dimensions),
+    min_height=optional(dimensions),
+    max_height=optional(dimensions),
+    capabilities=optional(subsets(CAPABILITIES))
+))
+
+clients = st.builds(
+    ClientInfo,
+    width=dimensions,
+    height=dimensions,
+    screen_size=st.sampled_from(SCREEN_SIZES + ["xxl"]),
+    orientation=st.sampled_from(ORIENTATIONS),
+    pixel_ratio=st.just(2.0),
+    platform=st.sampled_from(PLATFORMS + ["linux"]),
+    browser=st.just("chrome"),
+    os=st.just("linux"),
+    os_version=st.just("6"),
+    capabilities=subsets(CAPABILITIES)
+)
+
+def create_feature(clients) -> Feature:
+    return Feature(id="feature", label="feature", icon="", component="Feature", tags=[], permissions=[], features=[], clients=clients)
+
+manager = DeploymentManager(None)
+
+class TestCompileConstraints:
+    @settings(max_examples=500)
+    @given(constraints, clients)
+    def test_equivalence(self, constraints, client_info):
+        feature = create_feature(constraints)
+
+        assert compile_constraints(constraints)(client_info) == manager._matches_constraints(feature, client_info)
+
+    @given(constraints, st.lists(clients, min_size=1, max_size=20))
+    def test_reuse(self, constraints, client_infos):
+        feature = create_feature(constraints)
+        predicate = compile_constraints(constraints)
+
+        assert [predicate(client_info) for client_info in client_infos] == [manager._matches_constraints(feature, client_info) for client_info in client_infos]
+
+    def test_absent(self):
+        assert compile_constraints(None) is accept_all
+        assert compile_constraints(ClientConstraints()) is accept_all
+        assert compile_constraints(ClientConstraints(platforms=[], capabilities=[])) is accept_all
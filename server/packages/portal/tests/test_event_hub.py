@@ -0,0 +1,211 @@
+import asyncio
+import json
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from types import SimpleNamespace
+
+from aspyx_event import EventManager
+
+from portal.interface import ChatMessage
+from portal.server.event_hub import EventHub, EventHubEndpoint
+
+from application.main import app as application_app
+
+class FakeSocket:
+    def __init__(self, blocked: bool = False):
+        self.frames = []
+        self.closed = None
+        self.unblocked = asyncio.Event()
+        if not blocked:
+            self.unblocked.set()
+
+    async def send_text(self, text: str):
+        await self.unblocked.wait()
+        self.frames.append(json.loads(text))
+
+    async def close(self, code: int, reason: str = ""):
+        self.closed = (code, reason)
+
+    def events(self) -> list:
+        events = []
+        for frame in self.frames:
+            events.extend(frame["messages"] if frame["type"] == "batch" else [frame])
+
+        return events
+
+def create_hub(**configuration) -> EventHub:
+    hub = EventHub()
+    hub.tick_interval = 0.001
+    for name, value in configuration.items():
+        setattr(hub, name, value)
+
+    return hub
+
+async def settle():
+    await asyncio.sleep(0.05)
+
+class TestEventHub:
+    def test_fan_out(self):
+        async def scenario():
+            hub = create_hub()
+            sockets = [FakeSocket() for _ in range(3)]
+            connections = [hub.connect(f"client-{i}", socket) for i, socket in enumerate(sockets)]
+
+            hub.subscribe(connections[0], "ChatMessage")
+            hub.subscribe(connections[1], "ChatMessage")
+            hub.subscribe(connections[2], "Other")
+
+            hub.publish(ChatMessage(content="hello", questionId="q1"))
+            await settle()
+
+            return sockets
+
+        sockets = asyncio.run(scenario())
+
+        for socket in sockets[:2]:
+            assert [(event["event_name"], event["data"]) for event in socket.events()] == [("ChatMessage", {"content": "hello", "questionId": "q1"})]
+
+        assert sockets[2].frames == []
+
+    def test_batch_and_coalesce(self):
+        async def scenario():
+            hub = create_hub()
+            socket = FakeSocket()
+            hub.subscribe(hub.connect("client", socket), "Progress")
+
+            for i in range(10):
+                hub.publish({"value": i}, key="job-1", event_name="Progress")
+            hub.publish({"value": "other"}, key="job-2", event_name="Progress")
+            hub.publish({"value": "unkeyed"}, event_name="Progress")
+            await settle()
+
+            return hub, socket
+
+        hub, socket = asyncio.run(scenario())
+
+        assert len(socket.frames) == 1 and socket.frames[0]["type"] == "batch"
+        assert [event["data"]["value"] for event in socket.events()] == [9, "other", "unkeyed"]
+        assert hub.get_statistics()["coalesced"] == 9
+
+    def test_drop_policy(self):
+        async def scenario():
+            hub = create_hub(max_queued_messages=4)
+            socket = FakeSocket(blocked=True)
+            connection = hub.connect("client", socket)
+            hub.subscribe(connection, "Tick")
+
+            for i in range(10):
+                hub.publish({"value": i}, event_name="Tick")
+                await settle()
+
+            socket.unblocked.set()
+            await settle()
+
+            return connection, socket
+
+        connection, socket = asyncio.run(scenario())
+
+        values = [event["data"]["value"] for event in socket.events()]
+
+        assert values[-4:] == [6, 7, 8, 9] # the newest survive
+        assert connection.dropped == 10 - len(values)
+        assert connection.dropped > 0
+
+    def test_disconnect_policy(self):
+        async def scenario():
+            hub = create_hub(max_queued_messages=4, slow_consumer_policy="disconnect")
+            socket = FakeSocket(blocked=True)
+            hub.subscribe(hub.connect("client", socket), "Tick")
+
+            for i in range(10):
+                hub.publish({"value": i}, event_name="Tick")
+                await settle()
+
+            return hub, socket
+
+        hub, socket = asyncio.run(scenario())
+
+        assert socket.closed == (1008, "slow consumer")
+        assert hub.get_statistics()["connections"] == 0
+        assert "Tick" not in hub.topics
+
+    def test_publish_from_thread(self):
+        async def scenario():
+            hub = create_hub()
+            socket = FakeSocket()
+            hub.subscribe(hub.connect("client", socket), "Tick")
+
+            thread = threading.Thread(target=hub.publish, args=({"value": 1},), kwargs={"event_name": "Tick"})
+            thread.start()
+            thread.join()
+            await settle()
+
+            return socket
+
+        assert asyncio.run(scenario()).events()[0]["data"] == {"value": 1}
+
+    def test_10k_subscribers(self):
+        async def scenario():
+            hub = create_hub()
+            sockets = [FakeSocket() for _ in range(10_000)]
+            for i, socket in enumerate(sockets):
+                hub.subscribe(hub.connect(f"client-{i}", socket), "ChatMessage")
+
+            for i in range(5):
+                hub.publish(ChatMessage(content=f"message {i}", questionId="q1"))
+            await asyncio.sleep(0.5)
+
+            return sockets
+
+        sockets = asyncio.run(scenario())
+
+        assert all(len(socket.events()) == 5 for socket in sockets)
+
+class TestEventHubEndpoint:
+    def test_protocol(self):
+        app = FastAPI()
+        hub = create_hub()
+        EventHubEndpoint(SimpleNamespace(fast_api=app), hub)
+
+        with TestClient(app).websocket_connect("/ws/events/client-1") as websocket:
+            websocket.send_json({"type": "subscribe", "event_name": "ChatMessage"})
+            assert websocket.receive_json() == {"type": "subscribe_response", "event_name": "ChatMessage", "success": True}
+
+            hub.publish(ChatMessage(content="hello", questionId="q1"))
+            event = websocket.receive_json()
+            assert (event["type"], event["data"]["content"]) == ("event", "hello")
+
+            websocket.send_json({"type": "ping"})
+            assert websocket.receive_json() == {"type": "pong"}
+
+            websocket.send_json({"type": "unsubscribe", "event_name": "ChatMessage"})
+            assert websocket.receive_json()["success"]
+
+            websocket.send_text("{")
+            assert websocket.receive_json() == {"type": "error", "message": "Invalid JSON"}
+
+    def test_event_manager(self, application):
+        event_manager = application.get(EventManager)
+        hub = application.get(EventHub)
+
+        async def send(content: str):
+            await event_manager.send_event(ChatMessage(content=content, questionId="q1"))
+            await asyncio.sleep(0.05) # the transport delivers asynchronously
+
+        with TestClient(application_app).websocket_connect("/ws/events/client-2") as websocket:
+            websocket.send_json({"type": "subscribe", "event_name": "ChatMessage"})
+            assert websocket.receive_json()["success"]
+            assert hub.forwarded["ChatMessage"] is not None
+
+            asyncio.run(send("hello"))
+
+            event = websocket.receive_json()
+            assert (event["event_name"], event["data"]["content"]) == ("ChatMessage", "hello")
+
+            websocket.send_json({"type": "unsubscribe", "event_name": "ChatMessage"})
+            assert websocket.receive_json()["success"]
+
+        assert "ChatMessage" not in hub.forwarded
+        assert not event_manager.subscriptions_by_event.get("ChatMessage")
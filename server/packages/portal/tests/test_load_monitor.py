@@ -0,0 +1,92 @@
+import asyncio
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from aspyx_persistence import PersistentUnit
+from aspyx_service import HealthCheckManager, HealthStatus
+
+from portal.server.load_monitor import LoadMonitor
+from portal.server.service_metrics import ServiceMetrics
+
+def check(monitor: LoadMonitor, method) -> HealthCheckManager.Result:
+    result = HealthCheckManager.Result("check")
+
+    if asyncio.iscoroutinefunction(method):
+        asyncio.run(method(monitor, result))
+    else:
+        method(monitor, result)
+
+    return result
+
+class QueueUnit:
+    def __init__(self):
+        self.engine = create_engine("sqlite://", poolclass=QueuePool, pool_size=2, max_overflow=1)
+
+class StaticUnit:
+    def __init__(self):
+        self.engine = create_engine("sqlite://", poolclass=StaticPool)
+
+class TestLoadMonitor:
+    def test_loop_lag(self, monkeypatch):
+        monkeypatch.setattr(LoadMonitor, "loop_lag_interval", 0.01)
+        monkeypatch.setattr(LoadMonitor, "max_loop_lag", 0.05)
+
+        monitor = LoadMonitor(ServiceMetrics())
+
+        async def run(block: float) -> HealthCheckManager.Result:
+            result = HealthCheckManager.Result("event-loop-lag")
+
+            await monitor.check_loop_lag(result)
+            assert result.details == "measuring"
+
+            await asyncio.sleep(0.02)
+            time.sleep(block) # blocks the loop
+            await asyncio.sleep(0.02)
+
+            await monitor.check_loop_lag(result)
+
+            monitor.stop()
+
+            return result
+
+        assert asyncio.run(run(0)).status is HealthStatus.OK
+
+        result = asyncio.run(run(0.1))
+
+        assert result.status is HealthStatus.WARNING
+        assert "exceeds 50.0 ms" in result.details
+
+    def test_pools(self, monkeypatch):
+        queue = QueueUnit()
+        monkeypatch.setattr(PersistentUnit, "units", {"a": queue, "b": queue, "c": StaticUnit()}) # a shared pool is reported once
+
+        monitor = LoadMonitor(ServiceMetrics())
+
+        assert check(monitor, LoadMonitor.check_pools).details == "QueueUnit 0/3 connections"
+
+        connections = [queue.engine.connect() for _ in range(3)]
+        try:
+            result = check(monitor, LoadMonitor.check_pools)
+
+            assert result.status is HealthStatus.WARNING
+            assert result.details == "QueueUnit 3/3 connections exceeds 90%"
+        finally:
+            for connection in connections:
+                connection.close()
+
+    def test_queue(self, monkeypatch):
+        monkeypatch.setattr(LoadMonitor, "max_queue_depth", 1)
+
+        metrics = ServiceMetrics()
+        monitor = LoadMonitor(metrics)
+
+        assert check(monitor, LoadMonitor.check_queue).details == "0 calls in progress"
+
+        monkeypatch.setattr(metrics, "get_in_flight", lambda: 2)
+
+        result = check(monitor, LoadMonitor.check_queue)
+
+        assert result.status is HealthStatus.WARNING
+        assert result.details == "2 calls in progress exceed 1"
@@ -0,0 +1,205 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+from aspyx_event import EventManager
+from aspyx_service import HealthCheckManager, HealthStatus
+
+from portal.interface import ChatMessage
+from portal.interface.portal_model import ManifestChanged
+from portal.server.local_events import LocalEventProvider
+
+def create_manager(**configuration) -> EventManager:
+    provider = LocalEventProvider()
+    for name, value in configuration.items():
+        setattr(provider, name, value)
+
+    return EventManager(provider)
+
+class TestLocalEventProvider:
+    def test_batches(self):
+        async def scenario():
+            manager = create_manager(batch_size=10, linger=0.01)
+            chats, manifests = [], []
+
+            await manager.subscribe(ChatMessage, chats.append)
+            await manager.subscribe(ManifestChanged, manifests.append)
+
+            for i in range(25):
+                await manager.send_event(ChatMessage(content=str(i)))
+            await manager.send_event(ManifestChanged(name="mfe1", version="1"))
+
+            assert chats == [] # asynchronous
+
+            await asyncio.sleep(0.05)
+            await manager.provider.stop()
+
+            return manager.provider, chats, manifests
+
+        provider, chats, manifests = asyncio.run(scenario())
+
+        assert [chat.content for chat in chats] == [str(i) for i in range(25)]
+        assert [manifest.name for manifest in manifests] == ["mfe1"]
+        assert provider.batches == 3
+        assert provider.get_statistics()["delivered"] == 26
+
+    def test_linger(self):
+        async def scenario():
+            manager = create_manager(batch_size=100, linger=0.05)
+            received = []
+            await manager.subscribe(ChatMessage, received.append)
+
+            await manager.send_event(ChatMessage(content="hello"))
+
+            await asyncio.sleep(0.01)
+            early = len(received)
+            await asyncio.sleep(0.1)
+            await manager.provider.stop()
+
+            return early, received
+
+        early, received = asyncio.run(scenario())
+
+        assert early == 0
+        assert len(received) == 1
+
+    def test_async_subscriber_and_errors(self):
+        async def scenario():
+            manager = create_manager(linger=0.001)
+            received = []
+
+            async def on_message(message: ChatMessage):
+                await asyncio.sleep(0)
+                received.append(message)
+
+            def fail(message: ChatMessage):
+                raise RuntimeError("boom")
+
+            await manager.subscribe(ChatMessage, on_message)
+            await manager.subscribe(ChatMessage, fail)
+
+            await manager.send_event(ChatMessage(content="hello"))
+            await asyncio.sleep(0.05)
+            await manager.provider.stop()
+
+            return manager.provider, received
+
+        provider, received = asyncio.run(scenario())
+
+        assert len(received) == 1
+        assert provider.errors == 1
+
+    def test_exception_manager(self):
+        async def scenario():
+            manager = create_manager(linger=0.001)
+            handled, received = [], []
+            manager.exception_manager = SimpleNamespace(handle=handled.append)
+
+            def fail(message: ChatMessage):
+                raise RuntimeError(message.content)
+
+            await manager.subscribe(ChatMessage, fail)
+            await manager.subscribe(ChatMessage, received.append)
+
+            await manager.send_event(ChatMessage(content="boom"))
+            await manager.provider.stop()
+
+            return handled, received
+
+        handled, received = asyncio.run(scenario())
+
+        assert [str(e) for e in handled] == ["boom"]
+        assert len(received) == 1
+
+    def test_backpressure(self):
+        async def scenario():
+            manager = create_manager(batch_size=5, max_queued_events=10, linger=0.001)
+            received = []
+
+            async def slow(message: ChatMessage):
+                await asyncio.sleep(0.001)
+                received.append(message)
+
+            await manager.subscribe(ChatMessage, slow)
+
+            for i in range(100):
+                await manager.send_event(ChatMessage(content=str(i)))
+
+            await asyncio.sleep(0.2)
+            await manager.provider.stop()
+
+            return manager.provider, received
+
+        provider, received = asyncio.run(scenario())
+
+        assert len(received) == 100
+        assert provider.max_queue_depth <= 10
+
+    def test_send_from_subscriber(self):
+        async def scenario():
+            manager = create_manager(batch_size=1, max_queued_events=2, linger=0.001)
+            manifests = []
+
+            async def on_message(message: ChatMessage):
+                for i in range(5): # more than fit into the queue
+                    await manager.send_event(ManifestChanged(name=f"mfe{i}", version=message.content))
+
+            await manager.subscribe(ChatMessage, on_message)
+            await manager.subscribe(ManifestChanged, manifests.append)
+
+            for i in range(3):
+                await manager.send_event(ChatMessage(content=str(i)))
+
+            await manager.provider.stop()
+
+            return manifests
+
+        assert len(asyncio.run(asyncio.wait_for(scenario(), 2.0))) == 15
+
+    def test_stop_delivers_queued_events(self):
+        async def scenario():
+            manager = create_manager(linger=10.0)
+            received = []
+            await manager.subscribe(ChatMessage, received.append)
+
+            for i in range(3):
+                await manager.send_event(ChatMessage(content=str(i)))
+
+            await manager.provider.stop()
+
+            return received
+
+        assert [chat.content for chat in asyncio.run(scenario())] == ["0", "1", "2"]
+
+    def test_send_from_other_thread(self):
+        manager = create_manager(linger=0.001)
+        received = []
+
+        async def run_flusher(started: threading.Event):
+            await manager.subscribe(ChatMessage, received.append)
+            await manager.provider.start()
+
+            started.set()
+            await asyncio.sleep(0.2)
+            await manager.provider.stop()
+
+        started = threading.Event()
+        thread = threading.Thread(target=asyncio.run, args=(run_flusher(started),))
+        thread.start()
+        started.wait()
+
+        asyncio.run(manager.send_event(ChatMessage(content="hello"))) # a short lived loop
+        thread.join()
+
+        assert [chat.content for chat in received] == ["hello"]
+
+    def test_health(self):
+        provider = LocalEventProvider()
+        provider.max_queued_events = 2
+        provider.queue.extend([("ChatMessage", None)] * 2)
+
+        result = HealthCheckManager.Result("event-queue")
+        provider.check_queue(result)
+
+        assert result.status is HealthStatus.WARNING
+        assert result.details.startswith("2 events queued")
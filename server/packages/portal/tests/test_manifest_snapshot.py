@@ -0,0 +1,254 @@
+import json
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from portal.interface.portal_model import Manifest, Feature
+from portal.server.deployment_manager import DeploymentManager, FilterContext
+from portal.server.manifest_snapshot import ManifestSnapshots
+
+def create_feature(id: str, path: str) -> dict:
+    return {
+        "id": id,
+        "label": id,
+        "path": path,
+        "icon": "",
+        "component": id,
+        "tags": [],
+        "permissions": [],
+        "features": []
+    }
+
+def create_manifest(name: str, *features: str) -> Manifest:
+    return Manifest(name=name, uri=f"http://{name}", module="module", features=[Feature.model_validate(create_feature(feature, f"/{feature}")) for feature in features])
+
+class CRUDService:
+    def __init__(self, *names: str):
+        self.names = list(names)
+        self.reads = 0
+
+    def read_microfrontends(self):
+        self.reads += 1
+
+        return [
+            SimpleNamespace(name=name, uri=f"http://{name}", enabled=True, configuration=json.dumps({"features": [create_feature(name, f"/{name}")]}))
+            for name in self.names
+        ]
+
+class TestManifestSnapshots:
+    def test_publish(self, tmp_path):
+        publisher = ManifestSnapshots(str(tmp_path))
+        reader = ManifestSnapshots(str(tmp_path))
+
+        assert reader.current_generation() == 0
+        assert reader.get_manifests() == {}
+
+        assert publisher.publish([create_manifest("mfe1", "a", "b")]) == 1
+
+        manifests = reader.get_manifests()
+
+        assert list(manifests) == ["mfe1"]
+        assert [feature.id for feature in manifests["mfe1"].features] == ["a", "b"]
+
+        # decoded once per generation
+
+        assert reader.get_manifests() is manifests
+
+        assert publisher.publish([create_manifest("mfe1"), create_manifest("mfe2")]) == 2
+        assert list(reader.get_manifests()) == ["mfe1", "mfe2"]
+
+        # old generations are removed
+
+        publisher.publish([])
+
+        assert sorted(path.name for path in tmp_path.glob("*.snapshot")) == ["manifests.2.snapshot", "manifests.3.snapshot"]
+        assert reader.get_manifests() == {}
+
+    def test_loader(self, tmp_path):
+        first = ManifestSnapshots(str(tmp_path))
+        second = ManifestSnapshots(str(tmp_path))
+
+        assert first.acquire_loader()
+        assert first.acquire_loader()
+        assert not second.acquire_loader()
+
+        first.close()
+
+        assert second.acquire_loader()
+
+    def test_processes(self, tmp_path):
+        ManifestSnapshots(str(tmp_path)).publish([create_manifest("mfe1", "a")])
+
+        script = (
+            "import sys\n"
+            "from portal.server.manifest_snapshot import ManifestSnapshots\n"
+            "snapshots = ManifestSnapshots(sys.argv[1])\n"
+            "print(snapshots.acquire_loader(), snapshots.current_generation(), *snapshots.get_manifests())\n"
+        )
+
+        output = subprocess.run([sys.executable, "-c", script, str(tmp_path)], capture_output=True, text=True, check=True).stdout
+
+        assert output.split() == ["True", "1", "mfe1"]
+
+class TestDeploymentManager:
+    def test_snapshots(self, tmp_path):
+        crud = CRUDService("mfe1", "mfe2")
+
+        workers = [DeploymentManager(crud) for _ in range(4)]
+        for worker in workers:
+            worker.set_snapshot_directory(str(tmp_path))
+            worker.on_init()
+
+        # a single database load
+
+        assert crud.reads == 1
+
+        for worker in workers:
+            assert [manifest.name for manifest in worker._filter_manifests(FilterContext(has_session=False))] == ["mfe1", "mfe2"]
+
+        crud.names = ["mfe3"]
+        workers[2].reload()
+
+        assert all(set(worker.get_microfrontends()) == {"mfe3"} for worker in workers)
+
+        for worker in workers:
+            worker.close_snapshots()
+
+    def test_election_on_boot(self, tmp_path):
+        # every process boots the application, only the first one loads the manifests
+
+        script = (
+            "import sys\n"
+            "from application.harness import ApplicationHarness\n"
+            "from portal.server.deployment_manager import DeploymentManager\n"
+            "from portal.server.event_hub import EventHub\n"
+            "harness = ApplicationHarness(configuration={'MANIFEST_SNAPSHOTS': sys.argv[1], 'EVENT_QUEUE_SIZE': '7'}).start()\n"
+            "snapshots = harness.get(DeploymentManager).snapshots\n"
+            "print('result', snapshots.acquire_loader(), snapshots.current_generation(), harness.get(EventHub).max_queued_messages, flush=True)\n"
+            "sys.stdin.readline()\n"
+            "harness.stop()\n"
+        )
+
+        def boot():
+            return subprocess.Popen([sys.executable, "-c", script, str(tmp_path)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+        def result(process) -> list:
+            for line in process.stdout:
+                if line.startswith("result "):
+                    return line.split()[1:]
+
+        first = boot()
+        try:
+            assert result(first) == ["True", "1", "7"]
+
+            second = boot()
+            try:
+                assert result(second) == ["False", "1", "7"]
+            finally:
+                second.communicate("\n", timeout=30)
+        finally:
+            first.communicate("\n", timeout=30)
+
+    def test_changes_reach_other_processes(self, tmp_path):
+        # the loader publishes a new generation, the other worker notifies its websocket clients
+
+        loader = (
+            "import json, sys, threading, uuid\n"
+            "from application.harness import ApplicationHarness\n"
+            "from portal.interface import PortalCRUDService\n"
+            "from portal.interface.portal_model import Microfrontend\n"
+            "from portal.server.deployment_manager import MicrofrontendChanges\n"
+            "harness = ApplicationHarness(configuration={'MANIFEST_SNAPSHOTS': sys.argv[1]}).start()\n"
+            "reloaded = threading.Event()\n"
+            "harness.get(MicrofrontendChanges).add_listener(reloaded.set)\n"
+            "print('result started', flush=True)\n"
+            "sys.stdin.readline()\n"
+            "harness.get(PortalCRUDService).create_microfrontend(Microfrontend(id=uuid.uuid4(), version_id=0, name='mfe9', uri='http://mfe9', enabled=True, configuration=json.dumps({'features': []})))\n"
+            "print('result', reloaded.wait(10), flush=True)\n"
+            "sys.stdin.readline()\n"
+            "harness.stop()\n"
+        )
+        worker = (
+            "import os, sys, threading\n"
+            "from fastapi.testclient import TestClient\n"
+            "from application.harness import ApplicationHarness\n"
+            "from application.main import app\n"
+            "timeout = threading.Timer(30, os._exit, (1,))\n"
+            "timeout.daemon = True # exits without an event\n"
+            "timeout.start()\n"
+            "harness = ApplicationHarness(configuration={'MANIFEST_SNAPSHOTS': sys.argv[1], 'MANIFEST_WATCH_INTERVAL': '0.05'}).start()\n"
+            "with TestClient(app).websocket_connect('/ws/events/worker') as websocket:\n"
+            "    websocket.send_json({'type': 'subscribe', 'event_name': 'ManifestChanged'})\n"
+            "    websocket.receive_json()\n"
+            "    print('result subscribed', flush=True)\n"
+            "    event = websocket.receive_json()\n"
+            "    print('result', event['event_name'], event['data']['name'], flush=True)\n"
+            "harness.stop()\n"
+        )
+
+        def boot(script: str):
+            return subprocess.Popen([sys.executable, "-c", script, str(tmp_path)], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+
+        def result(process) -> list:
+            for line in process.stdout:
+                if line.startswith("result "):
+                    return line.split()[1:]
+
+        first = boot(loader)
+        try:
+            assert result(first) == ["started"]
+
+            second = boot(worker)
+            try:
+                assert result(second) == ["subscribed"]
+
+                first.stdin.write("\n")
+                first.stdin.flush()
+
+                assert result(first) == ["True"]
+                assert result(second) == ["ManifestChanged", "mfe9"]
+            finally:
+                second.communicate(timeout=30)
+        finally:
+            first.communicate("\n", timeout=30)
+
+    def test_in_process(self):
+        crud = CRUDService("mfe1")
+
+        first = DeploymentManager(crud)
+        second = DeploymentManager(crud)
+
+        first.on_init()
+
+        assert set(first.get_microfrontends()) == {"mfe1"}
+        assert second.get_microfrontends() == {}
+
+    def test_changes(self):
+        crud = CRUDService("mfe1", "mfe2")
+        published = []
+
+        async def send_event(event):
+            published.append((event.name, event.version))
+
+        manager = DeploymentManager(crud)
+        manager.set_event_manager(SimpleNamespace(send_event=send_event))
+
+        manager.reload()
+        versions = dict(published)
+
+        assert set(versions) == {"mfe1", "mfe2"}
+
+        # unchanged
+
+        published.clear()
+        manager.reload()
+
+        assert published == []
+
+        # removed and added
+
+        crud.names = ["mfe2", "mfe3"]
+        manager.reload()
+
+        assert sorted(published) == [("mfe1", ""), ("mfe3", manager.versions["mfe3"])]
+        assert manager.versions["mfe2"] == versions["mfe2"]
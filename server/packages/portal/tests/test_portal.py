@@ -7,8 +7,6 @@ from portal.interface.portal_model import Microfrontend
 from portal.server.deployment_manager import DeploymentRequest
 from portal.server.persistence.base import PortalPersistentUnit, Base
 
-from .setup import service_manager
-
 MFE_CONFIGURATION = """{
   "id": "mfe1",
   "label": "MFE1 Module",
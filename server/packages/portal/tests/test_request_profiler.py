@@ -0,0 +1,67 @@
+import os
+import threading
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from portal.server.request_profiler import ProfilingMiddleware, SamplingProfiler
+
+def busy(seconds: float):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+def create_app(directory, **configuration) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, directory=str(directory), interval=0.001, **configuration)
+
+    @app.get("/api/deployment")
+    async def deployment():
+        busy(0.05)
+        return {"value": 1}
+
+    return app
+
+def read_profile(directory, response) -> str:
+    with open(os.path.join(directory, response.headers["x-profile-file"])) as file:
+        return file.read()
+
+class TestSamplingProfiler:
+    def test_collapsed(self):
+        profiler = SamplingProfiler(threading.get_ident(), 0.001).start()
+        busy(0.05)
+        profiler.stop()
+
+        assert profiler.samples > 0
+
+        lines = profiler.collapsed().splitlines()
+
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.samples
+        assert any(frame.startswith(f"{__name__}.busy:") for line in lines for frame in line.split(";"))
+
+class TestProfilingMiddleware:
+    def test_token(self, tmp_path):
+        client = TestClient(create_app(tmp_path, token="secret"))
+
+        # not triggered
+
+        assert "x-profile-file" not in client.get("/api/deployment").headers
+        assert "x-profile-file" not in client.get("/api/deployment", headers={"x-profile": "wrong"}).headers
+        assert os.listdir(tmp_path) == []
+
+        # triggered
+
+        response = client.get("/api/deployment", headers={"x-profile": "secret"})
+
+        assert response.json() == {"value": 1}
+        assert response.headers["x-profile-file"].endswith("-GET-api-deployment.collapsed")
+        assert f"{__name__}.busy:" in read_profile(tmp_path, response)
+
+    def test_sample_rate(self, tmp_path):
+        client = TestClient(create_app(tmp_path, sample_rate=1.0))
+
+        names = {client.get("/api/deployment").headers["x-profile-file"] for _ in range(3)}
+
+        assert len(names) == 3
+        assert sorted(os.listdir(tmp_path)) == sorted(names)
@@ -0,0 +1,166 @@
+import dataclasses
+import gzip
+import inspect
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, Field
+
+from aspyx_service import FastAPIServer
+
+from portal.server.response_encoding import FastJSONServer, FastJSONResponse, CompressionMiddleware, accepted_encodings, dump_json
+
+class Item(BaseModel):
+    name: str
+    price: Decimal
+    created: datetime
+    alias_field: Optional[str] = Field(None, alias="aliasField")
+
+@dataclasses.dataclass
+class Row:
+    id: UUID
+    day: date
+    items: List[Item]
+
+def create_app(**configuration) -> FastAPI:
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(CompressionMiddleware, **configuration)
+
+    @app.get("/big")
+    def big():
+        return {"values": list(range(1000))}
+
+    @app.get("/small")
+    def small():
+        return {"value": 1}
+
+    @app.get("/text")
+    def text():
+        return PlainTextResponse("x" * 5000, media_type="text/csv")
+
+    @app.get("/stream")
+    def stream():
+        def lines():
+            for i in range(100):
+                yield f'{{"row": {i}}}\n'.encode()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    return app
+
+class TestJSON:
+    def test_like_jsonable_encoder(self):
+        value = Row(
+            id=UUID("12345678-1234-5678-1234-567812345678"),
+            day=date(2024, 1, 15),
+            items=[Item(name="a", price=Decimal("1.50"), created=datetime(2024, 1, 15, 10, 30), aliasField="x")]
+        )
+
+        assert json.loads(dump_json(value)) == json.loads(json.dumps(jsonable_encoder(value)))
+        assert json.loads(dump_json({1: {"a", "a"}})) == {"1": ["a"]}
+
+    def test_fast_endpoint(self):
+        # a service route endpoint as produced by FastAPIServer
+
+        async def handler(id: str, count: int = 1):
+            return [Item(name=id, price=Decimal(count), created=datetime(2024, 1, 1))]
+
+        def wrapper(*args, **kwargs):
+            pass
+
+        wrapper.__wrapped__ = handler
+        wrapper.__signature__ = inspect.signature(handler)
+
+        app = FastAPI()
+        app.get("/items/{id}")(FastJSONServer.fast_endpoint(None, wrapper))
+
+        response = TestClient(app).get("/items/x", params={"count": 2})
+
+        assert response.json() == [{"name": "x", "price": "2", "created": "2024-01-01T00:00:00", "aliasField": None}]
+
+    def test_route_arguments_pass_through(self, monkeypatch):
+        calls = []
+
+        async def handler():
+            return {"value": 1}
+
+        def wrapper():
+            pass
+
+        wrapper.__wrapped__ = handler
+        wrapper.__signature__ = inspect.signature(handler)
+
+        def add_routes(server):
+            server.router.add_api_route("/value", wrapper, methods=["GET"], status_code=201, deprecated=True, include_in_schema=False, dependencies=[Depends(lambda: calls.append(1))])
+
+        monkeypatch.setattr(FastAPIServer, "add_routes", add_routes)
+
+        server = FastJSONServer.__new__(FastJSONServer)
+        server.router = APIRouter()
+        server.add_routes()
+
+        route, = server.router.routes
+
+        assert route.response_class is FastJSONResponse
+        assert (route.status_code, route.deprecated, route.include_in_schema) == (201, True, False)
+
+        app = FastAPI()
+        app.include_router(server.router)
+
+        response = TestClient(app).get("/value")
+
+        assert (response.status_code, response.json(), calls) == (201, {"value": 1}, [1])
+
+class TestCompression:
+    def test_gzip(self):
+        client = TestClient(create_app(minimum_size=100))
+
+        response = client.get("/big", headers={"accept-encoding": "gzip"})
+
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+        assert int(response.headers["content-length"]) < len(response.content)
+        assert response.json()["values"][-1] == 999
+
+    def test_not_compressed(self):
+        client = TestClient(create_app(minimum_size=100))
+
+        # too small
+
+        response = client.get("/small", headers={"accept-encoding": "gzip"})
+
+        assert "content-encoding" not in response.headers
+        assert response.headers["vary"] == "Accept-Encoding"
+
+        # not accepted
+
+        assert "content-encoding" not in client.get("/big", headers={"accept-encoding": "identity"}).headers
+        assert "content-encoding" not in client.get("/big", headers={"accept-encoding": "gzip;q=0"}).headers
+
+        # not an allowed content type
+
+        assert "content-encoding" not in client.get("/text", headers={"accept-encoding": "gzip"}).headers
+        assert "content-encoding" in TestClient(create_app(content_types=["text/csv"])).get("/text", headers={"accept-encoding": "gzip"}).headers
+
+    def test_stream(self):
+        client = TestClient(create_app(minimum_size=100))
+
+        with client.stream("GET", "/stream", headers={"accept-encoding": "gzip"}) as response:
+            assert response.headers["content-encoding"] == "gzip"
+            assert "content-length" not in response.headers
+
+            raw = b"".join(response.iter_raw())
+
+        assert gzip.decompress(raw).decode().splitlines()[-1] == '{"row": 99}'
+
+    def test_accepted_encodings(self):
+        assert accepted_encodings("gzip, deflate, br") == {"gzip", "deflate", "br"}
+        assert accepted_encodings("br;q=0, gzip;q=0.5") == {"gzip"}
+        assert accepted_encodings("") == set()
@@ -0,0 +1,103 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from aspyx.di.aop.aop import Aspects, FunctionAspect, Invocation, MethodAspect
+from aspyx_service import ServiceManager
+
+from portal.server.service_metrics import ServiceMetrics
+
+class GreetingService:
+    def greet(self, name: str) -> str:
+        pass
+
+    async def greet_async(self, name: str) -> str:
+        pass
+
+class GreetingServiceImpl(GreetingService):
+    def greet(self, name: str) -> str:
+        if not name:
+            raise ValueError("no name")
+
+        return f"hello {name}"
+
+    async def greet_async(self, name: str) -> str:
+        return self.greet(name)
+
+    def helper(self) -> int:
+        return 1
+
+def invoke(metrics: ServiceMetrics, instance, name: str, *args):
+    # the invocation chain aspyx builds for an around advice
+
+    func = getattr(type(instance), name)
+    method = MethodAspect(instance, func)
+
+    if asyncio.iscoroutinefunction(func):
+        aspect = FunctionAspect(metrics, ServiceMetrics.measure_async, method)
+        return asyncio.run(Invocation(func, Aspects([], [aspect, method], [], [])).call_async(instance, *args))
+
+    aspect = FunctionAspect(metrics, ServiceMetrics.measure, method)
+    return Invocation(func, Aspects([], [aspect, method], [], [])).call(instance, *args)
+
+@pytest.fixture()
+def metrics(monkeypatch):
+    monkeypatch.setattr(ServiceManager, "descriptors_by_name", {"greeting-service": SimpleNamespace(type=GreetingService)})
+
+    return ServiceMetrics()
+
+def sample(text: str, name: str, method: str, extra: str = "") -> float:
+    match = re.search(rf'^{name}{{service="greeting-service",method="{method}"{extra}}} (\S+)$', text, re.MULTILINE)
+
+    return float(match.group(1))
+
+class TestServiceMetrics:
+    def test_measure(self, metrics):
+        service = GreetingServiceImpl()
+
+        assert invoke(metrics, service, "greet", "andi") == "hello andi"
+        assert invoke(metrics, service, "greet_async", "bert") == "hello bert"
+
+        with pytest.raises(ValueError):
+            invoke(metrics, service, "greet", "")
+
+        text = metrics.render()
+
+        assert sample(text, "service_method_duration_seconds_count", "greet") == 2
+        assert sample(text, "service_method_duration_seconds_count", "greet_async") == 1
+        assert sample(text, "service_method_errors_total", "greet") == 1
+        assert sample(text, "service_method_in_flight", "greet") == 0
+        assert sample(text, "service_method_duration_seconds_bucket", "greet", ',le="\\+Inf"') == 2
+        assert sample(text, "service_method_duration_seconds_bucket", "greet", ',le="10.0"') == 2
+
+    def test_not_a_service_method(self, metrics):
+        assert invoke(metrics, GreetingServiceImpl(), "helper") == 1
+        assert metrics.get_metrics() == []
+
+    def test_in_flight(self, metrics):
+        seen = []
+
+        class Blocking(GreetingServiceImpl):
+            def greet(self, name: str) -> str:
+                seen.append(sample(metrics.render(), "service_method_in_flight", "greet"))
+                return name
+
+        invoke(metrics, Blocking(), "greet", "x")
+
+        assert seen == [1]
+
+    def test_format(self, metrics):
+        invoke(metrics, GreetingServiceImpl(), "greet", "andi")
+
+        lines = metrics.render().splitlines()
+
+        assert "# TYPE service_method_duration_seconds histogram" in lines
+        assert "# TYPE service_method_in_flight gauge" in lines
+        assert "# TYPE service_method_errors_total counter" in lines
+
+        buckets = [int(line.rsplit(" ", 1)[1]) for line in lines if line.startswith("service_method_duration_seconds_bucket")]
+
+        assert len(buckets) == len(ServiceMetrics.bounds) + 1
+        assert buckets == sorted(buckets) # cumulative
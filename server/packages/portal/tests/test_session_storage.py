@@ -0,0 +1,124 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from aspyx_service import Session
+
+from portal.server.session_storage import ShardedMemoryStorage, SQLiteStorage
+
+class UserSession(Session):
+    def __init__(self, user: str):
+        super().__init__()
+
+        self.user = user
+
+@pytest.fixture(params=["memory", "sqlite"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        yield ShardedMemoryStorage(max_size=1000, ttl=3600, shards=4)
+    else:
+        storage = SQLiteStorage(str(tmp_path / "sessions.db"), ttl=3600)
+        try:
+            yield storage
+        finally:
+            storage.close()
+
+class TestSessionStorage:
+    def test_store_and_read(self, storage):
+        storage.store("a", UserSession("andi"), 60)
+
+        assert storage.read("a").user == "andi"
+        assert storage.read("b") is None
+
+        storage.store("a", UserSession("bert"), 60)
+
+        assert storage.read("a").user == "bert"
+
+        storage.remove("a")
+
+        assert storage.read("a") is None
+
+    def test_expiry(self, storage):
+        storage.store("expired", UserSession("andi"), 0)
+        storage.store("valid", UserSession("bert"), 60)
+
+        assert storage.read("expired") is None
+        assert storage.read("valid").user == "bert"
+
+        storage.store("other", UserSession("carl"), 0)
+
+        assert storage.expire() >= 1
+        assert len(storage) == 1
+
+    def test_concurrent(self, storage):
+        errors = []
+
+        def run(thread: int):
+            try:
+                for i in range(200):
+                    token = f"{thread}-{i}"
+
+                    storage.store(token, UserSession(token), 60)
+                    assert storage.read(token).user == token
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(storage) == 800
+
+class TestShardedMemoryStorage:
+    def test_lru(self):
+        storage = ShardedMemoryStorage(max_size=2, shards=1)
+
+        storage.store("a", UserSession("a"), 60)
+        storage.store("b", UserSession("b"), 60)
+
+        storage.read("a") # b is the least recently used now
+        storage.store("c", UserSession("c"), 60)
+
+        assert storage.read("b") is None
+        assert storage.read("a") is not None
+        assert storage.read("c") is not None
+
+    def test_amortized_expiry(self):
+        storage = ShardedMemoryStorage(max_size=100, shards=1)
+
+        for i in range(8):
+            storage.store(f"expired-{i}", UserSession("x"), 0)
+
+        # every store drops a few expired sessions
+
+        storage.store("a", UserSession("a"), 60)
+        storage.store("b", UserSession("b"), 60)
+
+        assert len(storage) == 2
+
+class TestSQLiteStorage:
+    def test_shared(self, tmp_path):
+        path = str(tmp_path / "sessions.db")
+
+        storage = SQLiteStorage(path)
+        storage.store("token", {"user": "andi"}, 60)
+
+        script = (
+            "import sys\n"
+            "from portal.server.session_storage import SQLiteStorage\n"
+            "storage = SQLiteStorage(sys.argv[1])\n"
+            "print(storage.read('token')['user'])\n"
+            "storage.store('other', {'user': 'bert'}, 60)\n"
+        )
+
+        output = subprocess.run([sys.executable, "-c", script, path], capture_output=True, text=True, check=True).stdout
+
+        assert output.strip() == "andi"
+        assert storage.read("other") == {"user": "bert"}
+
+        storage.close()